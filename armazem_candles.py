@@ -0,0 +1,179 @@
+import os
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+from colorama import Fore, init
+
+init(autoreset=True)
+
+# Armazém local de candles (um arquivo binário por símbolo/timeframe).
+# Cada registro é (ts, o, h, l, c, v) em formato fixo, então o arquivo pode ser
+# aberto com np.memmap sem copiar nada e cresce só com append dos candles novos.
+
+DTYPE_CANDLE = np.dtype([
+    ('ts', '<i8'), ('o', '<f8'), ('h', '<f8'), ('l', '<f8'), ('c', '<f8'), ('v', '<f8')
+])
+COLUNAS = ['ts', 'o', 'h', 'l', 'c', 'v']
+DIR_PADRAO = os.getenv('DIR_CANDLES', 'dados/candles')
+
+
+def para_ms(data):
+    # Aceita None, ms (int), string ou datetime. Datas sem fuso são tratadas como UTC.
+    if data is None:
+        return None
+    if isinstance(data, (int, np.integer)):
+        return int(data)
+    ts = pd.Timestamp(data)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert('UTC').tz_localize(None)
+    return int(ts.value // 1_000_000)
+
+
+def ms_timeframe(timeframe):
+    unidades = {'s': 1_000, 'm': 60_000, 'h': 3_600_000, 'd': 86_400_000, 'w': 604_800_000}
+    return int(timeframe[:-1]) * unidades[timeframe[-1]]
+
+
+class ArmazemCandles:
+    def __init__(self, diretorio=DIR_PADRAO):
+        self.diretorio = diretorio
+
+    def caminho(self, symbol, timeframe):
+        pasta = os.path.join(self.diretorio, symbol.replace('/', '_'))
+        return os.path.join(pasta, f"{timeframe}.bin")
+
+    def abrir(self, symbol, timeframe):
+        # Memmap somente leitura do arquivo inteiro (array vazio se não existir)
+        caminho = self.caminho(symbol, timeframe)
+        if not os.path.exists(caminho) or os.path.getsize(caminho) == 0:
+            return np.empty(0, dtype=DTYPE_CANDLE)
+        return np.memmap(caminho, dtype=DTYPE_CANDLE, mode='r')
+
+    def ultimo_ts(self, symbol, timeframe):
+        caminho = self.caminho(symbol, timeframe)
+        if not os.path.exists(caminho) or os.path.getsize(caminho) < DTYPE_CANDLE.itemsize:
+            return None
+        with open(caminho, 'rb') as f:
+            f.seek(-DTYPE_CANDLE.itemsize, os.SEEK_END)
+            return int(np.frombuffer(f.read(DTYPE_CANDLE.itemsize), dtype=DTYPE_CANDLE)['ts'][0])
+
+    def anexar(self, symbol, timeframe, ohlcv):
+        # Grava apenas candles mais novos que o último timestamp armazenado
+        if len(ohlcv) == 0:
+            return 0
+        novos = np.array([tuple(c[:6]) for c in ohlcv], dtype=DTYPE_CANDLE)
+        novos = novos[np.argsort(novos['ts'], kind='stable')]
+        _, unicos = np.unique(novos['ts'], return_index=True)
+        novos = novos[unicos]
+
+        ultimo = self.ultimo_ts(symbol, timeframe)
+        if ultimo is not None:
+            novos = novos[novos['ts'] > ultimo]
+        if len(novos) == 0:
+            return 0
+
+        caminho = self.caminho(symbol, timeframe)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with open(caminho, 'ab') as f:
+            f.write(novos.tobytes())
+        return len(novos)
+
+    def mesclar(self, symbol, timeframe, dados):
+        # Usado pelo backfill: aceita candles mais antigos que o último gravado.
+        # Se tudo for novo, vira um append; senão reescreve o arquivo ordenado.
+        dados = np.asarray(dados, dtype=DTYPE_CANDLE)
+        if len(dados) == 0:
+            return 0
+        ultimo = self.ultimo_ts(symbol, timeframe)
+        if ultimo is None or dados['ts'].min() > ultimo:
+            return self.anexar(symbol, timeframe, dados.tolist())
+
+        atuais = np.array(self.abrir(symbol, timeframe))
+        todos = np.concatenate([atuais, dados])
+        todos = todos[np.argsort(todos['ts'], kind='stable')]
+        _, unicos = np.unique(todos['ts'], return_index=True)
+        todos = todos[unicos]
+
+        caminho = self.caminho(symbol, timeframe)
+        temporario = caminho + '.tmp'
+        with open(temporario, 'wb') as f:
+            f.write(todos.tobytes())
+        os.replace(temporario, caminho)
+        return len(todos) - len(atuais)
+
+    def sincronizar(self, exchange, symbol, timeframe='1m', limit=1000):
+        # Busca só o que falta desde o último candle gravado.
+        # O candle em formação (ainda não fechado) nunca é gravado.
+        passo = ms_timeframe(timeframe)
+        total = 0
+        while True:
+            ultimo = self.ultimo_ts(symbol, timeframe)
+            since = None if ultimo is None else ultimo + passo
+            ohlcv = exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=limit)
+            agora = exchange.milliseconds()
+            fechados = [c for c in ohlcv if c[0] + passo <= agora]
+            gravados = self.anexar(symbol, timeframe, fechados)
+            total += gravados
+            if gravados == 0 or len(ohlcv) < limit:
+                return total
+
+    def intervalo(self, symbol, timeframe='1m', inicio=None, fim=None):
+        # Linhas [a, b) do arquivo com ts no intervalo [inicio, fim)
+        ts = self.abrir(symbol, timeframe)['ts']
+        a = 0 if inicio is None else int(np.searchsorted(ts, para_ms(inicio), side='left'))
+        b = len(ts) if fim is None else int(np.searchsorted(ts, para_ms(fim), side='left'))
+        return a, b
+
+    def carregar_array(self, symbol, timeframe='1m', inicio=None, fim=None):
+        # Fatia do memmap no intervalo [inicio, fim) sem cópia
+        a, b = self.intervalo(symbol, timeframe, inicio, fim)
+        return self.abrir(symbol, timeframe)[a:b]
+
+    def ler(self, symbol, timeframe, a, b):
+        # Cópia das linhas [a, b) lida direto do arquivo: ao contrário do memmap, as
+        # páginas lidas não ficam mapeadas no processo (memória limitada por bloco)
+        if b <= a:
+            return np.empty(0, dtype=DTYPE_CANDLE)
+        with open(self.caminho(symbol, timeframe), 'rb') as f:
+            f.seek(a * DTYPE_CANDLE.itemsize)
+            return np.fromfile(f, dtype=DTYPE_CANDLE, count=b - a)
+
+    def carregar(self, symbol, timeframe='1m', inicio=None, fim=None, colunas=COLUNAS):
+        # DataFrame no mesmo formato que os scripts montam a partir do fetch_ohlcv
+        dados = self.carregar_array(symbol, timeframe, inicio, fim)
+        df = pd.DataFrame({novo: np.asarray(dados[orig]) for orig, novo in zip(COLUNAS, colunas)})
+        df[colunas[0]] = pd.to_datetime(df[colunas[0]], unit='ms')
+        return df
+
+
+def argumentos_periodo(argv=None):
+    # Opções de linha de comando comuns aos backtests:
+    #   python backtest_v20.py --armazem dados/candles --inicio 2026-01-01 --fim 2026-02-01
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--armazem', help="Diretório do armazém local (sem rede)")
+    parser.add_argument('--inicio')
+    parser.add_argument('--fim')
+    args = parser.parse_args(argv)
+    armazem = ArmazemCandles(args.armazem) if args.armazem else None
+    return {'armazem': armazem, 'inicio': args.inicio, 'fim': args.fim}
+
+
+if __name__ == "__main__":
+    # Sincroniza o armazém: python armazem_candles.py ETH/USDT SOL/USDT --timeframe 1m
+    from cliente_exchange import obter_cliente
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('symbols', nargs='+')
+    parser.add_argument('--timeframe', default='1m')
+    parser.add_argument('--diretorio', default=DIR_PADRAO)
+    args = parser.parse_args()
+
+    armazem = ArmazemCandles(args.diretorio)
+    exchange = obter_cliente()
+    for symbol in args.symbols:
+        try:
+            novos = armazem.sincronizar(exchange, symbol, args.timeframe)
+            print(f"{Fore.GREEN}✅ {symbol} {args.timeframe}: +{novos} candles")
+        except Exception as e:
+            print(f"{Fore.RED}Erro ao sincronizar {symbol}: {e}", file=sys.stderr)
@@ -0,0 +1,163 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from colorama import Fore, init
+
+from armazem_candles import ArmazemCandles, DTYPE_CANDLE, DIR_PADRAO, para_ms, ms_timeframe
+
+init(autoreset=True)
+
+# Backfill histórico paginado, paralelo e retomável.
+# O intervalo [inicio, fim) vira uma lista de páginas `since=`; cada página baixada
+# é salva em disco na hora (checkpoint). Se o processo morrer, a próxima execução
+# pula as páginas já salvas e continua de onde parou. No final tudo é mesclado
+# no armazém local.
+
+
+class LimitadorTaxa:
+    # Espaça as requisições de todas as threads em pelo menos `intervalo_ms`
+    def __init__(self, intervalo_ms):
+        self.intervalo = intervalo_ms / 1000.0
+        self.proximo = 0.0
+        self._lock = threading.Lock()
+
+    def aguardar(self):
+        with self._lock:
+            agora = time.monotonic()
+            espera = self.proximo - agora
+            self.proximo = max(agora, self.proximo) + self.intervalo
+        if espera > 0:
+            time.sleep(espera)
+
+
+class BackfillCandles:
+    def __init__(self, exchange, armazem=None, timeframe='1m', limit=1000,
+                 workers=4, tentativas=3):
+        self.exchange = exchange
+        self.armazem = armazem or ArmazemCandles()
+        self.timeframe = timeframe
+        self.passo = ms_timeframe(timeframe)
+        self.limit = limit
+        self.workers = workers
+        self.tentativas = tentativas
+        self.limitador = LimitadorTaxa(getattr(exchange, 'rateLimit', 50))
+
+    def paginas(self, inicio, fim):
+        # Lista de `since` cobrindo [inicio, fim) em blocos de `limit` candles
+        inicio = para_ms(inicio) // self.passo * self.passo
+        fim = min(para_ms(fim), self.exchange.milliseconds())
+        return list(range(inicio, fim, self.passo * self.limit))
+
+    def pasta_checkpoint(self, symbol, inicio):
+        nome = f"{symbol.replace('/', '_')}_{self.timeframe}_{para_ms(inicio)}"
+        return os.path.join(self.armazem.diretorio, '_backfill', nome)
+
+    def checkpoints(self, pasta):
+        # {since: (cobertura, arquivo)} com a maior cobertura salva de cada página.
+        # A cobertura é até onde a página estava completa quando foi baixada.
+        salvos = {}
+        for nome in os.listdir(pasta):
+            if not nome.endswith('.npy'):
+                continue
+            since, cobertura = (int(x) for x in nome[:-4].split('_'))
+            if since not in salvos or cobertura > salvos[since][0]:
+                salvos[since] = (cobertura, os.path.join(pasta, nome))
+        return salvos
+
+    def baixar_pagina(self, symbol, since, fim, pasta):
+        # Baixa uma página (com retentativas) e grava o checkpoint atomicamente
+        fim_pagina = min(since + self.passo * self.limit, fim)
+        for tentativa in range(1, self.tentativas + 1):
+            try:
+                self.limitador.aguardar()
+                ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe=self.timeframe,
+                                                  since=since, limit=self.limit)
+                break
+            except Exception:
+                if tentativa == self.tentativas:
+                    raise
+                time.sleep(2 ** tentativa * 0.5)
+
+        # Só entram candles fechados; a cobertura registra até onde a página vale
+        agora = self.exchange.milliseconds()
+        cobertura = min(fim_pagina, agora // self.passo * self.passo)
+        linhas = [tuple(c[:6]) for c in ohlcv if since <= c[0] < cobertura]
+        pagina = np.array(linhas, dtype=DTYPE_CANDLE)
+
+        destino = os.path.join(pasta, f"{since}_{cobertura}.npy")
+        temporario = destino + '.tmp'
+        with open(temporario, 'wb') as f:
+            np.save(f, pagina)
+        os.replace(temporario, destino)
+        return len(pagina)
+
+    def executar(self, symbol, inicio, fim):
+        fim_ms = para_ms(fim)
+        pasta = self.pasta_checkpoint(symbol, inicio)
+        os.makedirs(pasta, exist_ok=True)
+
+        # Uma página salva só conta se já cobre tudo o que esta execução precisa dela
+        todas = self.paginas(inicio, fim)
+        limite = min(fim_ms, self.exchange.milliseconds() // self.passo * self.passo)
+        salvos = self.checkpoints(pasta)
+        pendentes = [p for p in todas
+                     if p not in salvos or salvos[p][0] < min(p + self.passo * self.limit, limite)]
+        print(f"{Fore.CYAN}📥 Backfill {symbol} {self.timeframe}: {len(todas)} páginas "
+              f"({len(todas) - len(pendentes)} já salvas, {len(pendentes)} pendentes)")
+
+        falhas = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futuros = {pool.submit(self.baixar_pagina, symbol, p, fim_ms, pasta): p for p in pendentes}
+            for n, futuro in enumerate(as_completed(futuros), 1):
+                try:
+                    futuro.result()
+                except Exception as e:
+                    falhas += 1
+                    print(f"{Fore.RED}Erro na página since={futuros[futuro]}: {e}", file=sys.stderr)
+                if n % 50 == 0 or n == len(futuros):
+                    print(f"\r   {n}/{len(futuros)} páginas", end="")
+        if pendentes:
+            print()
+
+        if falhas:
+            print(f"{Fore.YELLOW}⚠️ {falhas} páginas falharam. Rode de novo para retomar.")
+            return 0
+
+        # Tudo baixado: mescla no armazém e descarta o checkpoint
+        salvos = self.checkpoints(pasta)
+        blocos = [np.load(salvos[p][1]) for p in todas]
+        dados = np.concatenate(blocos) if blocos else np.empty(0, dtype=DTYPE_CANDLE)
+        novos = self.armazem.mesclar(symbol, self.timeframe, dados)
+        shutil.rmtree(pasta)
+        print(f"{Fore.GREEN}✅ {symbol}: +{novos} candles gravados no armazém")
+        return novos
+
+
+if __name__ == "__main__":
+    # python backfill.py ETH/USDT SOL/USDT --inicio 2026-01-01 --fim 2026-03-01
+    parser = argparse.ArgumentParser()
+    parser.add_argument('symbols', nargs='+')
+    parser.add_argument('--inicio', required=True)
+    parser.add_argument('--fim', default=None)
+    parser.add_argument('--timeframe', default='1m')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--diretorio', default=DIR_PADRAO)
+    parser.add_argument('--falsa', action='store_true', help="Usa a exchange sintética local")
+    args = parser.parse_args()
+
+    if args.falsa:
+        from exchange_falsa import ExchangeFalsa
+        exchange = ExchangeFalsa()
+    else:
+        from cliente_exchange import obter_cliente
+        exchange = obter_cliente()
+
+    fim = args.fim if args.fim is not None else exchange.milliseconds()
+    backfill = BackfillCandles(exchange, ArmazemCandles(args.diretorio), args.timeframe, workers=args.workers)
+    for symbol in args.symbols:
+        backfill.executar(symbol, args.inicio, fim)
@@ -1,39 +1,63 @@
-import ccxt
 import pandas as pd
 import numpy as np
 from colorama import Fore, Style, init
+from cliente_exchange import obter_cliente
+from motor_simulacao import varrer_sinais, argumentos_backtest
+from monte_carlo import imprimir_monte_carlo
+from odds_polymarket import payouts_resultado, imprimir_payout_real
+from estrategias import sinais_v11
+from indicadores import Indicadores
 
 init(autoreset=True)
 
 class BacktestPolymarketV11_StandardReversion:
-    def __init__(self, symbol='BTC/USDT', limit=1440):
-        self.exchange = ccxt.binance()
+    def __init__(self, symbol='BTC/USDT', limit=1440, armazem=None, inicio=None, fim=None, max_posicoes=1,
+                 odds=None):
+        self.exchange = obter_cliente() # compartilhado: rate limit, coalescência e cache
         self.symbol = symbol
         self.limit = limit
         self.df_m1 = None
         self.trades = []
         
+        # Armazém local opcional: carrega por período, sem rede
+        self.armazem = armazem
+        self.inicio = inicio
+        self.fim = fim
+        
+        # Posições simultâneas na simulação (1 = slot único original, None = sem limite)
+        self.max_posicoes = max_posicoes
+        self.sinais = 0
+        
+        # Odds históricas do Polymarket (ArmazemOdds): PnL com o payout real de cada entrada
+        self.odds = odds
+        self.payouts = None
+        
     def buscar_dados(self):
         print(f"{Fore.CYAN}📥 Baixando dados V11 (Mean Reversion - StdDev 2.0)...")
+        if self.armazem is not None:
+            self.df_m1 = self.armazem.carregar(self.symbol, '1m', self.inicio, self.fim,
+                                               colunas=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+            return
+        
         ohlcv_m1 = self.exchange.fetch_ohlcv(self.symbol, timeframe='1m', limit=self.limit)
         self.df_m1 = pd.DataFrame(ohlcv_m1, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
         self.df_m1['timestamp'] = pd.to_datetime(self.df_m1['timestamp'], unit='ms')
 
     def calcular_indicadores(self):
         df = self.df_m1
+        ind = Indicadores(df, self.symbol)
         
         # 1. Bandas de Bollinger (Padrão: 20, 2.0)
-        df['ma_20'] = df['close'].rolling(window=20).mean()
-        df['std_20'] = df['close'].rolling(window=20).std()
+        df['ma_20'] = ind.media_movel('c', 20)
+        df['std_20'] = ind.desvio_movel('c', 20)
         
         # Ajuste: 2.0 Desvios (Mais permissivo que a V10)
-        df['bb_upper'] = df['ma_20'] + (df['std_20'] * 2.0)
-        df['bb_lower'] = df['ma_20'] - (df['std_20'] * 2.0)
+        df['bb_upper'], df['bb_lower'] = ind.bollinger(20, 2.0)
 
         # 2. ADX (Filtro de Lateralidade)
-        df['tr'] = df[['high', 'low', 'close']].diff().abs().max(axis=1)
-        df['dx'] = 100 * abs(df['high'].diff() - df['low'].diff()) / df['tr']
-        df['adx'] = df['dx'].ewm(span=14).mean()
+        df['tr'] = ind.true_range()
+        df['dx'] = ind.dx()
+        df['adx'] = ind.adx_ewm(14)
         
         df.dropna(inplace=True)
         self.df_m1 = df.reset_index(drop=True)
@@ -41,55 +65,42 @@ class BacktestPolymarketV11_StandardReversion:
     def executar_simulacao(self):
         print(f"{Fore.YELLOW}⚙️  Rodando V11 (Aposta: Tocou na banda 2.0 e ADX baixo -> Vai voltar)...\n")
         
-        i = 0
-        while i < (len(self.df_m1) - 16):
-            candle = self.df_m1.iloc[i]
-            candle_futuro = self.df_m1.iloc[i + 15]
-            
-            sinal = None
+        df = self.df_m1
+        close = df['close'].to_numpy()
+        
+        # FILTRO: Mercado Calmo (ADX < 30)
+        # Se o ADX estiver alto, o toque na banda pode virar tendência (não queremos isso)
+        # Preço FURANDO a Banda Superior? -> VENDE (PUT) | FURANDO a Inferior? -> COMPRA (CALL)
+        call, put = sinais_v11(close, df['bb_upper'].to_numpy(), df['bb_lower'].to_numpy(), df['adx'].to_numpy())
+        
+        # EXECUÇÃO (cooldown de 15 min aplicado pelo motor)
+        res = varrer_sinais(call, put, close, max_posicoes=self.max_posicoes)
+        self.sinais = res.sinais
+        if self.odds is not None:
+            self.payouts = payouts_resultado(self.odds, self.symbol, df['timestamp'].to_numpy('datetime64[ms]').astype(np.int64), res)
+        timestamps = df['timestamp'].iloc[res.indices]
+        
+        for ts, i, eh_call, diff, ganhou in zip(timestamps, res.indices, res.eh_call, res.diff, res.ganhou):
+            sinal = "CALL (UP)" if eh_call else "PUT (DOWN)"
+            resultado = "WIN" if ganhou else "LOSS"
             
-            # FILTRO: Mercado Calmo (ADX < 30)
-            # Se o ADX estiver alto, o toque na banda pode virar tendência (não queremos isso)
-            if candle['adx'] < 30:
-                
-                # Preço FURANDO a Banda Superior? -> VENDE (PUT)
-                if candle['close'] > candle['bb_upper']:
-                    sinal = "PUT (DOWN)"
-
-                # Preço FURANDO a Banda Inferior? -> COMPRA (CALL)
-                elif candle['close'] < candle['bb_lower']:
-                    sinal = "CALL (UP)"
-
-            # EXECUÇÃO
-            if sinal:
-                ganhou = False
-                diff = candle_futuro['close'] - candle['close']
-                
-                if sinal == "CALL (UP)": ganhou = diff > 0
-                else: ganhou = diff < 0 # PUT
-                
-                resultado = "WIN" if ganhou else "LOSS"
-                
-                # Diagnóstico V11
-                diag = ""
-                if resultado == "WIN":
-                    diag = "Mean Reversion: Respeitou a banda"
+            # Diagnóstico V11
+            diag = ""
+            if resultado == "WIN":
+                diag = "Mean Reversion: Respeitou a banda"
+            else:
+                # Se perdeu, foi porque "surfou a banda"?
+                if abs(diff) > (close[i] * 0.001):
+                    diag = "Band Riding: Rompeu a banda e foi embora (Tendência nasceu)"
                 else:
-                    # Se perdeu, foi porque "surfou a banda"?
-                    if abs(diff) > (candle['close'] * 0.001):
-                        diag = "Band Riding: Rompeu a banda e foi embora (Tendência nasceu)"
-                    else:
-                        diag = "Deriva: Ficou sambando fora da banda"
+                    diag = "Deriva: Ficou sambando fora da banda"
 
-                self.trades.append({
-                    'Timestamp': candle['timestamp'],
-                    'Tipo': sinal,
-                    'Resultado': resultado,
-                    'Diagnostico': diag
-                })
-                i += 15 # Cooldown de 15 min
-            else:
-                i += 1
+            self.trades.append({
+                'Timestamp': ts,
+                'Tipo': sinal,
+                'Resultado': resultado,
+                'Diagnostico': diag
+            })
 
     def gerar_relatorio(self):
         total = len(self.trades)
@@ -104,7 +115,11 @@ class BacktestPolymarketV11_StandardReversion:
         print(f"{Fore.CYAN}RESUMO BACKTEST V11 (Mean Reversion Standard)")
         print(f"{Fore.WHITE}{'='*40}")
         print(f"Total Trades: {total}") 
+        print(f"Sinais aproveitados: {total}/{self.sinais} (posições simultâneas: {self.max_posicoes or 'sem limite'})")
         print(f"Taxa de Acerto: {Fore.GREEN if taxa > 55 else Fore.RED}{taxa:.2f}%{Style.RESET_ALL}")
+        imprimir_monte_carlo([t['Resultado'] for t in self.trades])
+        if self.payouts is not None:
+            imprimir_payout_real([t['Resultado'] for t in self.trades], self.payouts)
         
         print(f"\n{Fore.YELLOW}🔍 ANÁLISE DE MOTIVOS:")
         causas = {}
@@ -116,8 +131,9 @@ class BacktestPolymarketV11_StandardReversion:
             print(f"- {d}: {q}x ({q/total*100:.1f}%)")
 
 # Execução
-bot = BacktestPolymarketV11_StandardReversion()
-bot.buscar_dados()
-bot.calcular_indicadores()
-bot.executar_simulacao()
-bot.gerar_relatorio()
\ No newline at end of file
+if __name__ == "__main__":
+    bot = BacktestPolymarketV11_StandardReversion(**argumentos_backtest())
+    bot.buscar_dados()
+    bot.calcular_indicadores()
+    bot.executar_simulacao()
+    bot.gerar_relatorio()
\ No newline at end of file
@@ -1,41 +1,91 @@
-import ccxt
+import time
+import asyncio
+import argparse
+import threading
 import pandas as pd
 import numpy as np
 from colorama import Fore, Style, init
+from cliente_exchange import obter_cliente
+from armazem_candles import argumentos_periodo
+from indicadores import Indicadores
+import indicadores_matriz as im
 
 init(autoreset=True)
 
+
+async def _em_thread(funcao):
+    # Chamada bloqueante numa thread daemon: uma busca parada no orçamento de peso
+    # (até 1 min) não segura o fim do processo depois que a tarefa foi cancelada
+    loop = asyncio.get_running_loop()
+    futuro = loop.create_future()
+
+    def entregar(resultado, erro):
+        if futuro.done():
+            return
+        if erro is not None:
+            futuro.set_exception(erro)
+        else:
+            futuro.set_result(resultado)
+
+    def rodar():
+        resultado, erro = None, None
+        try:
+            resultado = funcao()
+        except Exception as e:
+            erro = e
+        try:
+            loop.call_soon_threadsafe(entregar, resultado, erro)
+        except RuntimeError:
+            pass # loop já encerrado: ninguém espera mais
+    threading.Thread(target=rodar, daemon=True).start()
+    return await futuro
+
+
 class MarketScannerV14:
-    def __init__(self):
-        self.exchange = ccxt.binance()
+    def __init__(self, armazem=None, inicio=None, fim=None):
+        self.exchange = obter_cliente() # compartilhado: rate limit, coalescência e cache
         self.symbols = ['BTC/USDT', 'ETH/USDT', 'SOL/USDT']
         self.limit = 1000 # Últimos 1000 minutos
         
+        # Armazém local opcional: lê os últimos candles do período, sem rede
+        self.armazem = armazem
+        self.inicio = inicio
+        self.fim = fim
+        
+        # Falhas por ativo do último scan (nada de except silencioso)
+        self.falhas = {}
+        
     def obter_dados(self, symbol):
         try:
+            if self.armazem is not None:
+                df = self.armazem.carregar(symbol, '1m', self.inicio, self.fim)
+                if df.empty:
+                    return None
+                return df.tail(self.limit).reset_index(drop=True)
+            
             ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe='1m', limit=self.limit)
             df = pd.DataFrame(ohlcv, columns=['ts', 'o', 'h', 'l', 'c', 'v'])
             return df
-        except:
+        except Exception as e:
+            self.falhas[symbol] = f"{type(e).__name__}: {e}"
             return None
 
     def analisar_ativo(self, symbol, df):
+        ind = Indicadores(df, symbol)
+        
         # 1. Calcular ADX (Força da Tendência)
-        df['tr'] = df[['h', 'l', 'c']].diff().abs().max(axis=1)
-        df['dx'] = 100 * abs(df['h'].diff() - df['l'].diff()) / df['tr']
-        df['adx'] = df['dx'].ewm(span=14).mean()
+        df['tr'] = ind.true_range()
+        df['dx'] = ind.dx()
+        df['adx'] = ind.adx_ewm(14)
         
         # 2. Calcular Bandwidth (Largura das Bandas - Mede Volatilidade)
-        df['ma'] = df['c'].rolling(20).mean()
-        df['std'] = df['c'].rolling(20).std()
-        df['upper'] = df['ma'] + (2 * df['std'])
-        df['lower'] = df['ma'] - (2 * df['std'])
-        df['bandwidth'] = ((df['upper'] - df['lower']) / df['ma']) * 100
+        df['ma'] = ind.media_movel('c', 20)
+        df['std'] = ind.desvio_movel('c', 20)
+        df['upper'], df['lower'] = ind.bollinger(20, 2.0)
+        df['bandwidth'] = ind.bandwidth(20, 2.0) * 100
         
         # 3. Calcular Estocástico (Para ver se está saturado)
-        lowest_low = df['l'].rolling(14).min()
-        highest_high = df['h'].rolling(14).max()
-        df['k'] = 100 * ((df['c'] - lowest_low) / (highest_high - lowest_low))
+        df['k'] = ind.estocastico_k(14)
         
         # Pega o último candle completo
         ultimo = df.iloc[-2] 
@@ -48,11 +98,51 @@ class MarketScannerV14:
             'Stoch_K': ultimo['k']
         }
 
+    def analisar_lote(self, frames):
+        # Mesmo resultado do analisar_ativo, mas para todos os ativos de uma vez:
+        # candles alinhados numa matriz (ativos x tempo) e um kernel por indicador
+        if not frames:
+            return [] # nenhum ativo coletado (todas as buscas falharam)
+        painel = im.PainelCandles.de_frames(frames)
+        adx = im.adx_ewm(painel.h, painel.l, painel.c, 14)
+        bandwidth = im.bandwidth(painel.c, 20, 2.0) * 100
+        k = im.estocastico_k(painel.h, painel.l, painel.c, 14)
+        
+        # Último candle completo de cada ativo (o penúltimo com dados, como o iloc[-2])
+        n = painel.c.shape[1]
+        ultimo = n - 2 - np.argmax(~np.isnan(painel.c[:, ::-1]), axis=1)
+        return [{
+            'Symbol': symbol,
+            'Preco': painel.c[i, ultimo[i]],
+            'ADX': adx[i, ultimo[i]],
+            'Volatilidade_BB': bandwidth[i, ultimo[i]],
+            'Stoch_K': k[i, ultimo[i]]
+        } for i, symbol in enumerate(painel.symbols)]
+
+    def classificar_regime(self, dados):
+        # Classifica o Regime
+        if dados['ADX'] > 25:
+            return "TENDÊNCIA (Vivo)", Fore.GREEN
+        elif dados['Volatilidade_BB'] < 0.15: # Banda muito estreita
+            return "COMA (Morto)", Fore.RED
+        return "LATERAL (Ping-Pong)", Fore.CYAN
+
+    def calcular_score(self, dados):
+        # Lógica de Seleção: Queremos o ativo com maior ADX ou Volatilidade
+        return dados['ADX'] + (dados['Volatilidade_BB'] * 100)
+
+    def imprimir_falhas(self):
+        if self.falhas:
+            print(f"\n{Fore.RED}⚠️ {len(self.falhas)} ativo(s) com falha:")
+            for symbol, erro in sorted(self.falhas.items()):
+                print(f"{Fore.RED}- {symbol}: {erro}")
+
     def executar_scan(self):
         print(f"{Fore.YELLOW}📡 Iniciando Scanner Multi-Ativos (V14)...\n")
         print(f"{'ATIVO':<10} | {'ADX':<10} | {'VOLATIL(%)':<12} | {'REGIME DE MERCADO'}")
         print("-" * 60)
         
+        self.falhas = {}
         melhor_ativo = None
         maior_volatilidade = -1
         
@@ -60,33 +150,105 @@ class MarketScannerV14:
             df = self.obter_dados(symbol)
             if df is not None:
                 dados = self.analisar_ativo(symbol, df)
-                
-                # Classifica o Regime
-                regime = ""
-                cor = Fore.WHITE
-                
-                if dados['ADX'] > 25:
-                    regime = "TENDÊNCIA (Vivo)"
-                    cor = Fore.GREEN
-                elif dados['Volatilidade_BB'] < 0.15: # Banda muito estreita
-                    regime = "COMA (Morto)"
-                    cor = Fore.RED
-                else:
-                    regime = "LATERAL (Ping-Pong)"
-                    cor = Fore.CYAN
+                regime, cor = self.classificar_regime(dados)
                 
                 print(f"{cor}{dados['Symbol']:<10} | {dados['ADX']:.2f}       | {dados['Volatilidade_BB']:.4f}%      | {regime}")
                 
-                # Lógica de Seleção: Queremos o ativo com maior ADX ou Volatilidade
-                score = dados['ADX'] + (dados['Volatilidade_BB'] * 100)
+                score = self.calcular_score(dados)
                 if score > maior_volatilidade:
                     maior_volatilidade = score
                     melhor_ativo = dados['Symbol']
 
         print("-" * 60)
+        self.imprimir_falhas()
         print(f"\n{Fore.MAGENTA}🏆 Melhor Oportunidade Agora: {melhor_ativo}")
         print(f"Recomendação: Rodar Backtest específico para este ativo.")
 
+    # --- MODO ASSÍNCRONO (centenas de pares por minuto) ---
+
+    def symbols_usdt(self):
+        # Todos os pares spot ativos cotados em USDT
+        mercados = self.exchange.load_markets()
+        return sorted(m['symbol'] for m in mercados.values()
+                      if m.get('spot') and m.get('active') and m.get('quote') == 'USDT')
+
+    async def obter_dados_async(self, symbol, semaforo):
+        async with semaforo:
+            try:
+                ohlcv = await _em_thread(lambda: self.exchange.fetch_ohlcv(symbol, timeframe='1m', limit=self.limit))
+            except Exception as e:
+                self.falhas[symbol] = f"{type(e).__name__}: {e}"
+                return symbol, None
+        if len(ohlcv) < 30:
+            self.falhas[symbol] = f"Histórico insuficiente ({len(ohlcv)} candles)"
+            return symbol, None
+        return symbol, pd.DataFrame(ohlcv, columns=['ts', 'o', 'h', 'l', 'c', 'v'])
+
+    async def coletar_async(self, symbols, orcamento, concorrencia):
+        # Busca concorrente pelo cliente compartilhado (orçamento de peso do processo,
+        # pausa em 429/418, coalescência, cache e cassete): até `concorrencia` fetch
+        # bloqueantes em threads. O que não chegar no orçamento vira falha
+        semaforo = asyncio.Semaphore(concorrencia)
+        tarefas = {asyncio.create_task(self.obter_dados_async(s, semaforo)): s for s in symbols}
+        prontas, pendentes = await asyncio.wait(tarefas, timeout=orcamento)
+        for tarefa in pendentes:
+            tarefa.cancel()
+            self.falhas[tarefas[tarefa]] = f"Timeout (orçamento de {orcamento:.0f}s esgotado)"
+        if pendentes:
+            await asyncio.gather(*pendentes, return_exceptions=True)
+        
+        return {s: df for s, df in (t.result() for t in prontas) if df is not None}
+
+    def executar_scan_async(self, symbols=None, orcamento=50, concorrencia=20, top=20):
+        inicio = time.perf_counter()
+        self.falhas = {}
+        
+        if symbols is None:
+            symbols = self.symbols_usdt() if self.armazem is None else self.symbols
+        print(f"{Fore.YELLOW}📡 Scanner Assíncrono (V14): {len(symbols)} ativos | orçamento {orcamento}s\n")
+        
+        if self.armazem is not None:
+            frames = {s: df for s, df in ((s, self.obter_dados(s)) for s in symbols) if df is not None}
+        else:
+            frames = asyncio.run(self.coletar_async(symbols, orcamento, concorrencia))
+        coleta = time.perf_counter() - inicio
+        
+        # Indicadores em lote depois da coleta (uma matriz para todos os ativos)
+        resultados = []
+        for dados in self.analisar_lote(frames):
+            dados['Score'] = self.calcular_score(dados)
+            if dados['Score'] == dados['Score']: # descarta NaN
+                resultados.append(dados)
+            else:
+                self.falhas[dados['Symbol']] = "Indicadores indefinidos (histórico curto ou sem variação)"
+        resultados.sort(key=lambda d: d['Score'], reverse=True)
+        
+        print(f"{'#':<4} {'ATIVO':<14} | {'ADX':<8} | {'VOLATIL(%)':<10} | {'STOCH':<6} | {'SCORE':<8} | {'REGIME DE MERCADO'}")
+        print("-" * 80)
+        for n, dados in enumerate(resultados[:top], 1):
+            regime, cor = self.classificar_regime(dados)
+            print(f"{cor}{n:<4} {dados['Symbol']:<14} | {dados['ADX']:<8.2f} | {dados['Volatilidade_BB']:<10.4f} | "
+                  f"{dados['Stoch_K']:<6.1f} | {dados['Score']:<8.2f} | {regime}")
+        print("-" * 80)
+        
+        self.imprimir_falhas()
+        total = time.perf_counter() - inicio
+        print(f"\n⏱️  {len(resultados)}/{len(symbols)} ativos analisados em {total:.1f}s (coleta {coleta:.1f}s)")
+        if resultados:
+            print(f"{Fore.MAGENTA}🏆 Melhor Oportunidade Agora: {resultados[0]['Symbol']}")
+        return resultados
+
 # Execução
-scanner = MarketScannerV14()
-scanner.executar_scan()
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--todos', action='store_true', help="Varre todos os pares USDT (modo assíncrono)")
+    parser.add_argument('--orcamento', type=float, default=50, help="Tempo máximo da coleta (s)")
+    parser.add_argument('--concorrencia', type=int, default=20)
+    parser.add_argument('--top', type=int, default=20)
+    args, resto = parser.parse_known_args()
+    
+    scanner = MarketScannerV14(**argumentos_periodo(resto))
+    if args.todos:
+        scanner.executar_scan_async(orcamento=args.orcamento, concorrencia=args.concorrencia, top=args.top)
+    else:
+        scanner.executar_scan()
\ No newline at end of file
@@ -1,45 +1,75 @@
-import ccxt
+import argparse
 import pandas as pd
 import numpy as np
-from scipy.stats import norm
 from colorama import Fore, Style, init
+from cliente_exchange import obter_cliente
+from motor_simulacao import varrer_sinais, argumentos_backtest
+from monte_carlo import imprimir_monte_carlo
+from odds_polymarket import payouts_resultado, imprimir_payout_real
+from estrategias import sinais_v20
+from indicadores import Indicadores
+from reamostragem import mare_1h
+from liquidacao_segundos import reliquidar
 
 init(autoreset=True)
 
 class EthHullTideV20:
-    def __init__(self):
-        self.exchange = ccxt.binance()
+    def __init__(self, armazem=None, inicio=None, fim=None, max_posicoes=1, filtro_mare=False,
+                 liquidacao_1s=False, atraso_s=0.0, odds=None):
+        self.exchange = obter_cliente() # compartilhado: rate limit, coalescência e cache
         self.symbol = 'ETH/USDT'
         self.limit = 1440 # Aproximadamente 1 dia de dados em 1m
         self.trades = []
         self.df = None
         
+        # Armazém local opcional: carrega por período, sem rede
+        self.armazem = armazem
+        self.inicio = inicio
+        self.fim = fim
+        
+        # Posições simultâneas na simulação (1 = slot único original, None = sem limite)
+        self.max_posicoes = max_posicoes
+        self.sinais = 0
+        
+        # Odds históricas do Polymarket (ArmazemOdds): PnL com o payout real de cada entrada
+        self.odds = odds
+        self.payouts = None
+        
+        # Filtro opcional da maré 1h (barras de 1h montadas a partir do próprio 1m)
+        self.filtro_mare = filtro_mare
+        
+        # Liquidação no segundo exato (klines de 1s do armazém), entrada atraso_s
+        # depois do fechamento do candle do sinal
+        self.liquidacao_1s = liquidacao_1s
+        self.atraso_s = atraso_s
+        self.sem_1s = 0
+        
     def baixar_dados(self):
         print(f"{Fore.CYAN}📥 Baixando dados ETH para V20 (Alinhamento Tático 30m + Estratégico 60m)...")
+        if self.armazem is not None:
+            self.df = self.armazem.carregar(self.symbol, '1m', self.inicio, self.fim)
+            return
+        
         ohlcv = self.exchange.fetch_ohlcv(self.symbol, timeframe='1m', limit=self.limit)
         self.df = pd.DataFrame(ohlcv, columns=['ts', 'o', 'h', 'l', 'c', 'v'])
         self.df['ts'] = pd.to_datetime(self.df['ts'], unit='ms')
 
-    def calcular_z_score(self, df, window, forecast_horizon=15):
-        log_ret = np.log(df['c'] / df['c'].shift(1))
-        mu = log_ret.rolling(window=window).mean()
-        sigma = log_ret.rolling(window=window).std()
-        
-        # Z-Score de Hull
-        z_score = (mu * forecast_horizon) / (sigma * np.sqrt(forecast_horizon))
-        return z_score
-
     def calcular_metricas(self):
         df = self.df
+        ind = Indicadores(df, self.symbol)
         
         # Calculamos Apenas Tático (30m) e Estratégico (60m)
         # Ignoramos o ruído de 10m
-        df['z_tactical']  = self.calcular_z_score(df, window=30)
-        df['z_strategic'] = self.calcular_z_score(df, window=60)
+        df['z_tactical']  = ind.z_hull(30, T=15)
+        df['z_strategic'] = ind.z_hull(60, T=15)
         
         # Probabilidades
-        df['prob_tac'] = norm.cdf(df['z_tactical'])
-        df['prob_str'] = norm.cdf(df['z_strategic'])
+        df['prob_tac'] = ind.prob_hull(30, T=15)
+        df['prob_str'] = ind.prob_hull(60, T=15)
+        
+        # Maré 1h: Hull das barras de 1h já fechadas em cada minuto (sem lookahead)
+        if self.filtro_mare:
+            df['prob_mare'] = mare_1h(df, self.symbol)
         
         df.dropna(inplace=True)
         self.df = df.reset_index(drop=True)
@@ -47,60 +77,72 @@ class EthHullTideV20:
     def executar_simulacao(self):
         print(f"{Fore.YELLOW}⚙️  Rodando V20 (Tático agressivo, mas respeitando a Maré 60m)...")
         
-        i = 0
-        while i < (len(self.df) - 16):
-            row = self.df.iloc[i]
-            candle_future = self.df.iloc[i + 15]
-            
-            sinal = None
-            
-            # LÓGICA DE ALINHAMENTO
-            
-            # CALL:
-            # 1. Tático (30m) vê oportunidade clara (> 60%)
-            # 2. Estratégico (60m) NÃO está contra (> 50%)
-            if (row['prob_tac'] > 0.60) and (row['prob_str'] > 0.50):
-                sinal = "CALL"
-            
-            # PUT:
-            # 1. Tático (30m) vê queda clara (< 40%)
-            # 2. Estratégico (60m) NÃO está contra (< 50%)
-            elif (row['prob_tac'] < 0.40) and (row['prob_str'] < 0.50):
-                sinal = "PUT"
+        df = self.df
+        close = df['c'].to_numpy()
+        prob_tac = df['prob_tac'].to_numpy()
+        prob_str = df['prob_str'].to_numpy()
+        
+        # LÓGICA DE ALINHAMENTO
+        
+        # CALL:
+        # 1. Tático (30m) vê oportunidade clara (> 60%)
+        # 2. Estratégico (60m) NÃO está contra (> 50%)
+        
+        # PUT:
+        # 1. Tático (30m) vê queda clara (< 40%)
+        # 2. Estratégico (60m) NÃO está contra (< 50%)
+        call, put = sinais_v20(prob_tac, prob_str)
+        
+        # Maré 1h (opcional): a hora também não pode estar contra
+        if self.filtro_mare:
+            prob_mare = df['prob_mare'].to_numpy()
+            call &= prob_mare > 0.50
+            put &= prob_mare < 0.50
+        
+        # EXECUÇÃO (cooldown de 15 min aplicado pelo motor)
+        res = varrer_sinais(call, put, close, max_posicoes=self.max_posicoes)
+        self.sinais = res.sinais
+        if self.liquidacao_1s:
+            res = self.liquidar_segundos(res)
+        if self.odds is not None:
+            # Com a liquidação 1s a entrada é atraso_s depois do fechamento: as odds também
+            atraso_s = self.atraso_s if self.liquidacao_1s else 0.0
+            self.payouts = payouts_resultado(self.odds, self.symbol, df['ts'].to_numpy('datetime64[ms]').astype(np.int64),
+                                             res, atraso_s=atraso_s)
+        timestamps = df['ts'].iloc[res.indices]
+        
+        for ts, i, eh_call, diff, ganhou in zip(timestamps, res.indices, res.eh_call, res.diff, res.ganhou):
+            sinal = "CALL" if eh_call else "PUT"
+            resultado = "WIN" if ganhou else "LOSS"
             
-            # EXECUÇÃO
-            if sinal:
-                ganhou = False
-                diff = candle_future['c'] - row['c']
-                
-                if sinal == "CALL": ganhou = diff > 0
-                else: ganhou = diff < 0
-                
-                resultado = "WIN" if ganhou else "LOSS"
-                
-                # Diagnóstico V20
-                diag = ""
-                if resultado == "WIN":
-                    diag = "Full Alignment: 30m e 60m concordaram"
+            # Diagnóstico V20
+            diag = ""
+            if resultado == "WIN":
+                diag = "Full Alignment: 30m e 60m concordaram"
+            else:
+                # Se perdeu com tudo alinhado, foi um evento de cauda (Cisne Negro)?
+                if (sinal == "CALL" and diff < -close[i]*0.002) or (sinal == "PUT" and diff > close[i]*0.002):
+                    diag = "Evento de Cauda: Reversão violenta contra tendência macro"
                 else:
-                    # Se perdeu com tudo alinhado, foi um evento de cauda (Cisne Negro)?
-                    if (sinal == "CALL" and diff < -row['c']*0.002) or (sinal == "PUT" and diff > row['c']*0.002):
-                        diag = "Evento de Cauda: Reversão violenta contra tendência macro"
-                    else:
-                        diag = "Ruído de Mercado: Drift natural falhou (Normal)"
+                    diag = "Ruído de Mercado: Drift natural falhou (Normal)"
 
-                self.trades.append({
-                    'Timestamp': row['ts'],
-                    'Tipo': sinal,
-                    'Prob_Tac': f"{row['prob_tac']:.2f}",
-                    'Prob_Str': f"{row['prob_str']:.2f}",
-                    'Resultado': resultado,
-                    'Diagnostico': diag
-                })
-                
-                i += 15 # Cooldown
-            else:
-                i += 1
+            self.trades.append({
+                'Timestamp': ts,
+                'Tipo': sinal,
+                'Prob_Tac': f"{prob_tac[i]:.2f}",
+                'Prob_Str': f"{prob_str[i]:.2f}",
+                'Resultado': resultado,
+                'Diagnostico': diag
+            })
+
+    def liquidar_segundos(self, res):
+        ts = self.df['ts'].to_numpy('datetime64[ms]').astype(np.int64)
+        candles_1s = self.armazem.abrir(self.symbol, '1s')
+        liquidado, _ = reliquidar(res, ts, candles_1s, atraso_s=self.atraso_s)
+        self.sem_1s = len(res.indices) - len(liquidado.indices)
+        print(f"{Fore.CYAN}⏱️  Liquidação 1s (entrada {self.atraso_s:+g}s): {len(liquidado.indices)} trades "
+              f"({self.sem_1s} fora da cobertura de 1s)")
+        return liquidado
 
     def gerar_relatorio(self):
         total = len(self.trades)
@@ -115,6 +157,7 @@ class EthHullTideV20:
         print(f"{Fore.CYAN}RESUMO V20 (ETH HULL TIDE ALIGNMENT)")
         print(f"{Fore.WHITE}{'='*40}")
         print(f"Total Trades: {total}") 
+        print(f"Sinais aproveitados: {total}/{self.sinais} (posições simultâneas: {self.max_posicoes or 'sem limite'})")
         print(f"Taxa de Acerto: {Fore.GREEN if taxa > 60 else Fore.YELLOW if taxa > 55 else Fore.RED}{taxa:.2f}%{Style.RESET_ALL}")
         
         # Cálculo de Kelly (Gestão de Risco Profissional)
@@ -128,6 +171,9 @@ class EthHullTideV20:
             print(f"\n💰 Kelly Criterion: {Fore.GREEN}Apostar {kelly*100:.1f}% da banca por trade{Style.RESET_ALL}")
         else:
             print(f"\n💰 Kelly Criterion: {Fore.RED}NÃO OPERAR (Expectativa Negativa){Style.RESET_ALL}")
+        imprimir_monte_carlo([t['Resultado'] for t in self.trades])
+        if self.payouts is not None:
+            imprimir_payout_real([t['Resultado'] for t in self.trades], self.payouts)
 
         print(f"\n{Fore.YELLOW}🔍 ANÁLISE DE MOTIVOS:")
         causas = {}
@@ -139,8 +185,17 @@ class EthHullTideV20:
             print(f"- {d}: {q}x ({q/total*100:.1f}%)")
 
 # Execução
-bot = EthHullTideV20()
-bot.baixar_dados()
-bot.calcular_metricas()
-bot.executar_simulacao()
-bot.gerar_relatorio()
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--mare-1h', action='store_true', help="Exige a maré 1h a favor (precisa de 13h de histórico)")
+    parser.add_argument('--liquidacao-1s', action='store_true', help="Entrada e vencimento nos klines de 1s do armazém")
+    parser.add_argument('--atraso-s', type=float, default=0.0, help="Segundos entre o fechamento do candle e a entrada")
+    args, resto = parser.parse_known_args()
+    periodo = argumentos_backtest(resto)
+    if args.liquidacao_1s and periodo['armazem'] is None:
+        parser.error("--liquidacao-1s precisa de --armazem (python armazem_candles.py ETH/USDT --timeframe 1s)")
+    bot = EthHullTideV20(**periodo, filtro_mare=args.mare_1h, liquidacao_1s=args.liquidacao_1s, atraso_s=args.atraso_s)
+    bot.baixar_dados()
+    bot.calcular_metricas()
+    bot.executar_simulacao()
+    bot.gerar_relatorio()
\ No newline at end of file
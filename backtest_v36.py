@@ -1,42 +1,63 @@
-import ccxt
 import pandas as pd
 import numpy as np
-from scipy.stats import norm
 from colorama import Fore, Style, init
+from cliente_exchange import obter_cliente
+from motor_simulacao import varrer_sinais, argumentos_backtest
+from monte_carlo import imprimir_monte_carlo
+from odds_polymarket import payouts_resultado, imprimir_payout_real
+from estrategias import sinais_v36
+from indicadores import Indicadores
 
 init(autoreset=True)
 
 class SolanaExhaustionV36:
-    def __init__(self):
-        self.exchange = ccxt.binance()
+    def __init__(self, armazem=None, inicio=None, fim=None, max_posicoes=1, odds=None):
+        self.exchange = obter_cliente() # compartilhado: rate limit, coalescência e cache
         self.symbol = 'SOL/USDT'
         self.limit = 1440 
         self.trades = []
         self.df = None
         
+        # Armazém local opcional: carrega por período, sem rede
+        self.armazem = armazem
+        self.inicio = inicio
+        self.fim = fim
+        
+        # Posições simultâneas na simulação (1 = slot único original, None = sem limite)
+        self.max_posicoes = max_posicoes
+        self.sinais = 0
+        
+        # Odds históricas do Polymarket (ArmazemOdds): PnL com o payout real de cada entrada
+        self.odds = odds
+        self.payouts = None
+        
     def baixar_dados(self):
         print(f"{Fore.CYAN}📥 Baixando dados SOL para V36 (Filtro de Exaustão de Volume)...")
+        if self.armazem is not None:
+            self.df = self.armazem.carregar(self.symbol, '1m', self.inicio, self.fim)
+            return
+        
         ohlcv = self.exchange.fetch_ohlcv(self.symbol, timeframe='1m', limit=self.limit)
         self.df = pd.DataFrame(ohlcv, columns=['ts', 'o', 'h', 'l', 'c', 'v'])
         self.df['ts'] = pd.to_datetime(self.df['ts'], unit='ms')
 
     def calcular_indicadores(self):
         df = self.df
-        log_ret = np.log(df['c'] / df['c'].shift(1))
+        ind = Indicadores(df, self.symbol)
         T = 15
         
         # 1. MOTOR HULL PROBABILITY
-        df['sig30'] = log_ret.rolling(30).std()
-        df['mu30'] = log_ret.rolling(30).mean()
-        df['prob_tac'] = norm.cdf((df['mu30'] * T) / (df['sig30'] * np.sqrt(T)))
+        df['sig30'] = ind.desvio_movel('log_ret', 30)
+        df['mu30'] = ind.media_movel('log_ret', 30)
+        df['prob_tac'] = ind.prob_hull(30, T)
         
         # 2. Z-SCORE DE PREÇO (Mola)
-        df['ma20'] = df['c'].rolling(20).mean()
-        df['std20'] = df['c'].rolling(20).std()
-        df['z_score'] = (df['c'] - df['ma20']) / df['std20']
+        df['ma20'] = ind.media_movel('c', 20)
+        df['std20'] = ind.desvio_movel('c', 20)
+        df['z_score'] = ind.z_score(20)
         
         # 3. FILTRO DE VOLUME (Combustível)
-        df['vol_ma5'] = df['v'].rolling(5).mean()
+        df['vol_ma5'] = ind.vol_ma(5)
         
         df.dropna(inplace=True)
         self.df = df.reset_index(drop=True)
@@ -44,33 +65,26 @@ class SolanaExhaustionV36:
     def executar_simulacao(self):
         print(f"{Fore.YELLOW}⚙️  Executando V36: Operando Reversão APENAS com Volume em queda...")
         
-        i = 0
-        while i < (len(self.df) - 16):
-            row = self.df.iloc[i]
-            future = self.df.iloc[i + 15]
-            sinal = None
-            
-            # --- CONDIÇÃO DE EXAUSTÃO V36 ---
-            # Volume atual menor que a média curta (indicando que a força do movimento acabou)
-            vol_exaurido = row['v'] < row['vol_ma5']
-            
-            # Se Hull indica ALTA, Z-Score CARO (> 1.5) e Volume CAINDO
-            if row['prob_tac'] > 0.60 and row['z_score'] > 1.5 and vol_exaurido:
-                sinal = "PUT"
-            
-            # Se Hull indica BAIXA, Z-Score BARATO (< -1.5) e Volume CAINDO
-            elif row['prob_tac'] < 0.40 and row['z_score'] < -1.5 and vol_exaurido:
-                sinal = "CALL"
-            
-            if sinal:
-                ganhou = (future['c'] > row['c']) if sinal == "CALL" else (future['c'] < row['c'])
-                self.trades.append({
-                    'res': 'WIN' if ganhou else 'LOSS',
-                    'motivo': 'Exaustão Confirmada' if ganhou else 'Falso Cansaço (Rompimento)'
-                })
-                i += 15 
-            else:
-                i += 1
+        df = self.df
+        close = df['c'].to_numpy()
+        prob_tac = df['prob_tac'].to_numpy()
+        z_score = df['z_score'].to_numpy()
+        
+        # --- CONDIÇÃO DE EXAUSTÃO V36 ---
+        # Volume atual menor que a média curta (indicando que a força do movimento acabou)
+        # PUT: Hull indica ALTA, Z-Score CARO (> 1.5) e Volume CAINDO
+        # CALL: Hull indica BAIXA, Z-Score BARATO (< -1.5) e Volume CAINDO
+        call, put = sinais_v36(prob_tac, z_score, df['v'].to_numpy(), df['vol_ma5'].to_numpy())
+        
+        res = varrer_sinais(call, put, close, max_posicoes=self.max_posicoes)
+        self.sinais = res.sinais
+        if self.odds is not None:
+            self.payouts = payouts_resultado(self.odds, self.symbol, df['ts'].to_numpy('datetime64[ms]').astype(np.int64), res)
+        for ganhou in res.ganhou:
+            self.trades.append({
+                'res': 'WIN' if ganhou else 'LOSS',
+                'motivo': 'Exaustão Confirmada' if ganhou else 'Falso Cansaço (Rompimento)'
+            })
 
     def gerar_relatorio(self):
         total = len(self.trades)
@@ -85,6 +99,7 @@ class SolanaExhaustionV36:
         print(f"{Fore.MAGENTA}RELATÓRIO V36 - SOLANA EXHAUSTION SNIPER")
         print(f"{Fore.WHITE}{'='*40}")
         print(f"Total Trades: {total}")
+        print(f"Sinais aproveitados: {total}/{self.sinais} (posições simultâneas: {self.max_posicoes or 'sem limite'})")
         print(f"Taxa de Acerto: {Fore.GREEN if taxa > 60 else Fore.YELLOW}{taxa:.2f}%")
         
         W = taxa / 100
@@ -95,6 +110,9 @@ class SolanaExhaustionV36:
             print(f"💰 Kelly Criterion: {Fore.GREEN}{kelly:.2f}% (ALPHA DETECTADO)")
         else:
             print(f"💰 Kelly Criterion: {Fore.RED}{kelly:.2f}% (AGUARDAR MELHOR REGIME)")
+        imprimir_monte_carlo([t['res'] for t in self.trades])
+        if self.payouts is not None:
+            imprimir_payout_real([t['res'] for t in self.trades], self.payouts)
 
         print(f"\n{Fore.YELLOW}🔍 ANÁLISE DE MOTIVOS:")
         analise = {}
@@ -105,8 +123,9 @@ class SolanaExhaustionV36:
         print(f"{Fore.WHITE}{'='*40}")
 
 # Execução
-bot = SolanaExhaustionV36()
-bot.baixar_dados()
-bot.calcular_indicadores()
-bot.executar_simulacao()
-bot.gerar_relatorio()
\ No newline at end of file
+if __name__ == "__main__":
+    bot = SolanaExhaustionV36(**argumentos_backtest())
+    bot.baixar_dados()
+    bot.calcular_indicadores()
+    bot.executar_simulacao()
+    bot.gerar_relatorio()
\ No newline at end of file
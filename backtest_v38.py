@@ -1,58 +1,69 @@
-import ccxt
 import pandas as pd
 import numpy as np
-from scipy.stats import norm
 from colorama import Fore, Style, init
+from cliente_exchange import obter_cliente
+from motor_simulacao import varrer_sinais, argumentos_backtest
+from monte_carlo import imprimir_monte_carlo
+from odds_polymarket import payouts_resultado, imprimir_payout_real
+from estrategias import sinais_v38
+from indicadores import Indicadores
 
 init(autoreset=True)
 
 class SolanaADXSniperV38:
-    def __init__(self):
-        self.exchange = ccxt.binance()
+    def __init__(self, armazem=None, inicio=None, fim=None, max_posicoes=1, odds=None):
+        self.exchange = obter_cliente() # compartilhado: rate limit, coalescência e cache
         self.symbol = 'SOL/USDT'
         self.limit = 1440 
         self.trades = []
         self.df = None
         
+        # Armazém local opcional: carrega por período, sem rede
+        self.armazem = armazem
+        self.inicio = inicio
+        self.fim = fim
+        
+        # Posições simultâneas na simulação (1 = slot único original, None = sem limite)
+        self.max_posicoes = max_posicoes
+        self.sinais = 0
+        
+        # Odds históricas do Polymarket (ArmazemOdds): PnL com o payout real de cada entrada
+        self.odds = odds
+        self.payouts = None
+        
     def baixar_dados(self):
         print(f"{Fore.CYAN}📥 Baixando dados SOL para V38 (Filtro ADX + Correção de Typo)...")
+        if self.armazem is not None:
+            self.df = self.armazem.carregar(self.symbol, '1m', self.inicio, self.fim)
+            return
+        
         ohlcv = self.exchange.fetch_ohlcv(self.symbol, timeframe='1m', limit=self.limit)
         self.df = pd.DataFrame(ohlcv, columns=['ts', 'o', 'h', 'l', 'c', 'v'])
         self.df['ts'] = pd.to_datetime(self.df['ts'], unit='ms')
 
     def calcular_indicadores(self): # Nome correto aqui
         df = self.df
-        log_ret = np.log(df['c'] / df['c'].shift(1))
+        ind = Indicadores(df, self.symbol)
         T = 15
         
         # 1. MOTOR HULL (Referência Inversa)
-        df['sig30'] = log_ret.rolling(30).std()
-        df['mu30'] = log_ret.rolling(30).mean()
-        df['prob_tac'] = norm.cdf((df['mu30'] * T) / (df['sig30'] * np.sqrt(T)))
+        df['sig30'] = ind.desvio_movel('log_ret', 30)
+        df['mu30'] = ind.media_movel('log_ret', 30)
+        df['prob_tac'] = ind.prob_hull(30, T)
         
         # 2. Z-SCORE (Mola)
-        df['ma20'] = df['c'].rolling(20).mean()
-        df['std20'] = df['c'].rolling(20).std()
-        df['z_score'] = (df['c'] - df['ma20']) / df['std20']
+        df['ma20'] = ind.media_movel('c', 20)
+        df['std20'] = ind.desvio_movel('c', 20)
+        df['z_score'] = ind.z_score(20)
         
         # 3. VOLUME (Exaustão)
-        df['vol_ma5'] = df['v'].rolling(5).mean()
+        df['vol_ma5'] = ind.vol_ma(5)
         
         # 4. MÉTRICAS DE PAVIO
-        df['body'] = abs(df['c'] - df['o'])
-        df['upper_wick'] = df['h'] - df[['o', 'c']].max(axis=1)
-        df['lower_wick'] = df[['o', 'c']].min(axis=1) - df['l']
+        df['body'], df['upper_wick'], df['lower_wick'] = ind.pavios()
 
         # 5. ADX (Average Directional Index) - Medidor de Força
-        plus_dm = df['h'].diff().clip(lower=0)
-        minus_dm = df['l'].diff().clip(upper=0).abs()
-        tr = df[['h', 'l', 'c']].diff().abs().max(axis=1)
-        
-        tr_smooth = tr.rolling(14).sum()
-        plus_di = 100 * (plus_dm.rolling(14).sum() / tr_smooth)
-        minus_di = 100 * (minus_dm.rolling(14).sum() / tr_smooth)
-        dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
-        df['adx'] = dx.rolling(14).mean()
+        df['adx'] = ind.adx_di(14)
         
         df.dropna(inplace=True)
         self.df = df.reset_index(drop=True)
@@ -60,39 +71,28 @@ class SolanaADXSniperV38:
     def executar_simulacao(self):
         print(f"{Fore.YELLOW}⚙️  Executando V38: Reversão + Pavio + ADX < 30...")
         
-        i = 0
-        while i < (len(self.df) - 16):
-            row = self.df.iloc[i]
-            future = self.df.iloc[i + 15]
-            sinal = None
-            
-            # Filtros V36/V37
-            vol_exaurido = row['v'] < row['vol_ma5']
-            rejeicao_alta = row['upper_wick'] > (row['body'] * 0.7)
-            rejeicao_baixa = row['lower_wick'] > (row['body'] * 0.7)
-            
-            # NOVO FILTRO V38: ADX (Tendência Fraca/Moderada)
-            tendencia_calma = row['adx'] < 30
-
-            # Lógica PUT (Venda no topo)
-            if row['prob_tac'] > 0.60 and row['z_score'] > 1.5 and vol_exaurido and rejeicao_alta and tendencia_calma:
-                sinal = "PUT"
-            
-            # Lógica CALL (Compra no fundo)
-            elif row['prob_tac'] < 0.40 and row['z_score'] < -1.5 and vol_exaurido and rejeicao_baixa and tendencia_calma:
-                sinal = "CALL"
+        df = self.df
+        close = df['c'].to_numpy()
+        prob_tac = df['prob_tac'].to_numpy()
+        z_score = df['z_score'].to_numpy()
+        
+        # Filtros V36/V37 (volume exaurido + rejeição no pavio > 0.7 do corpo)
+        # NOVO FILTRO V38: ADX (Tendência Fraca/Moderada)
+        call, put = sinais_v38(prob_tac, z_score, df['v'].to_numpy(), df['vol_ma5'].to_numpy(),
+                               df['body'].to_numpy(), df['upper_wick'].to_numpy(), df['lower_wick'].to_numpy(),
+                               df['adx'].to_numpy())
+        
+        res = varrer_sinais(call, put, close, max_posicoes=self.max_posicoes)
+        self.sinais = res.sinais
+        if self.odds is not None:
+            self.payouts = payouts_resultado(self.odds, self.symbol, df['ts'].to_numpy('datetime64[ms]').astype(np.int64), res)
+        for ganhou in res.ganhou:
+            diag = "Vitoria ADX" if ganhou else "Derrota ADX (Trend Surpresa)"
             
-            if sinal:
-                ganhou = (future['c'] > row['c']) if sinal == "CALL" else (future['c'] < row['c'])
-                diag = "Vitoria ADX" if ganhou else "Derrota ADX (Trend Surpresa)"
-                
-                self.trades.append({
-                    'res': 'WIN' if ganhou else 'LOSS',
-                    'motivo': diag
-                })
-                i += 15 
-            else:
-                i += 1
+            self.trades.append({
+                'res': 'WIN' if ganhou else 'LOSS',
+                'motivo': diag
+            })
 
     def gerar_relatorio(self):
         total = len(self.trades)
@@ -107,16 +107,21 @@ class SolanaADXSniperV38:
         print(f"{Fore.MAGENTA}RELATÓRIO V38 - ADX SNIPER")
         print(f"{Fore.WHITE}{'='*40}")
         print(f"Total Trades: {total}")
+        print(f"Sinais aproveitados: {total}/{self.sinais} (posições simultâneas: {self.max_posicoes or 'sem limite'})")
         print(f"Taxa de Acerto: {Fore.GREEN if taxa > 65 else Fore.YELLOW}{taxa:.2f}%")
         
         W = taxa / 100
         kelly = (W - ((1 - W) / 0.85)) * 100
         print(f"💰 Kelly Criterion: {Fore.CYAN}{kelly:.2f}%")
+        imprimir_monte_carlo([t['res'] for t in self.trades])
+        if self.payouts is not None:
+            imprimir_payout_real([t['res'] for t in self.trades], self.payouts)
         print(f"{Fore.WHITE}{'='*40}")
 
 # Execução
-bot = SolanaADXSniperV38()
-bot.baixar_dados()
-bot.calcular_indicadores() # Nome corrigido
-bot.executar_simulacao()
-bot.gerar_relatorio()
\ No newline at end of file
+if __name__ == "__main__":
+    bot = SolanaADXSniperV38(**argumentos_backtest())
+    bot.baixar_dados()
+    bot.calcular_indicadores() # Nome corrigido
+    bot.executar_simulacao()
+    bot.gerar_relatorio()
\ No newline at end of file
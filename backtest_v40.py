@@ -1,96 +1,111 @@
-import ccxt
+import argparse
 import pandas as pd
 import numpy as np
-from scipy.stats import norm
 from colorama import Fore, Style, init
+from cliente_exchange import obter_cliente
+from motor_simulacao import varrer_sinais, argumentos_backtest
+from monte_carlo import imprimir_monte_carlo
+from odds_polymarket import payouts_resultado, imprimir_payout_real
+from estrategias import sinais_v40, ESTRATEGIAS
+from pipeline_compacto import frame_compacto
+from indicadores import Indicadores
 
 init(autoreset=True)
 
 class SolanaBandwidthV40:
-    def __init__(self):
-        self.exchange = ccxt.binance()
+    def __init__(self, armazem=None, inicio=None, fim=None, max_posicoes=1, compacto=False, odds=None):
+        self.exchange = obter_cliente() # compartilhado: rate limit, coalescência e cache
         self.symbol = 'SOL/USDT'
         self.limit = 1440 
         self.trades = []
         self.df = None
         
+        # Armazém local opcional: carrega por período, sem rede
+        self.armazem = armazem
+        self.inicio = inicio
+        self.fim = fim
+        
+        # Posições simultâneas na simulação (1 = slot único original, None = sem limite)
+        self.max_posicoes = max_posicoes
+        self.sinais = 0
+        
+        # Odds históricas do Polymarket (ArmazemOdds): PnL com o payout real de cada entrada
+        self.odds = odds
+        self.payouts = None
+        
+        # Modo compacto: só as colunas da regra, em float32 e sem a cópia do dropna
+        self.compacto = compacto
+        
     def baixar_dados(self):
         print(f"{Fore.CYAN}📥 Baixando dados SOL para V40 (Bollinger Bandwidth + Z-Score 2.0)...")
+        if self.armazem is not None:
+            self.df = self.armazem.carregar(self.symbol, '1m', self.inicio, self.fim)
+            return
+        
         ohlcv = self.exchange.fetch_ohlcv(self.symbol, timeframe='1m', limit=self.limit)
         self.df = pd.DataFrame(ohlcv, columns=['ts', 'o', 'h', 'l', 'c', 'v'])
         self.df['ts'] = pd.to_datetime(self.df['ts'], unit='ms')
 
     def calcular_indicadores(self):
+        if self.compacto:
+            return self.calcular_indicadores_compacto()
         df = self.df
-        log_ret = np.log(df['c'] / df['c'].shift(1))
+        ind = Indicadores(df, self.symbol)
         T = 15
         
         # 1. HULL PROBABILITY (Inversa)
-        df['sig30'] = log_ret.rolling(30).std()
-        df['mu30'] = log_ret.rolling(30).mean()
-        df['prob_tac'] = norm.cdf((df['mu30'] * T) / (df['sig30'] * np.sqrt(T)))
+        df['sig30'] = ind.desvio_movel('log_ret', 30)
+        df['mu30'] = ind.media_movel('log_ret', 30)
+        df['prob_tac'] = ind.prob_hull(30, T)
         
         # 2. BOLLINGER BANDS & Z-SCORE (Mola)
-        df['ma20'] = df['c'].rolling(20).mean()
-        df['std20'] = df['c'].rolling(20).std()
-        df['upper'] = df['ma20'] + (2 * df['std20'])
-        df['lower'] = df['ma20'] - (2 * df['std20'])
-        df['z_score'] = (df['c'] - df['ma20']) / df['std20']
+        df['ma20'] = ind.media_movel('c', 20)
+        df['std20'] = ind.desvio_movel('c', 20)
+        df['upper'], df['lower'] = ind.bollinger(20, 2.0)
+        df['z_score'] = ind.z_score(20)
         
         # 3. BANDWIDTH (Largura das Bandas)
-        df['bandwidth'] = (df['upper'] - df['lower']) / df['ma20']
-        df['bw_ma20'] = df['bandwidth'].rolling(20).mean()
+        df['bandwidth'] = ind.bandwidth(20, 2.0)
+        df['bw_ma20'] = ind.media_movel('bandwidth', 20)
         
         # 4. MÉTRICAS DE PAVIO & VOLUME
-        df['body'] = abs(df['c'] - df['o'])
-        df['upper_wick'] = df['h'] - df[['o', 'c']].max(axis=1)
-        df['lower_wick'] = df[['o', 'c']].min(axis=1) - df['l']
-        df['vol_ma5'] = df['v'].rolling(5).mean()
+        df['body'], df['upper_wick'], df['lower_wick'] = ind.pavios()
+        df['vol_ma5'] = ind.vol_ma(5)
 
         # 5. ADX (Trend Strength)
-        plus_dm = df['h'].diff().clip(lower=0)
-        minus_dm = df['l'].diff().clip(upper=0).abs()
-        tr = df[['h', 'l', 'c']].diff().abs().max(axis=1)
-        tr_smooth = tr.rolling(14).sum()
-        plus_di = 100 * (plus_dm.rolling(14).sum() / tr_smooth)
-        minus_di = 100 * (minus_dm.rolling(14).sum() / tr_smooth)
-        df['adx'] = (100 * abs(plus_di - minus_di) / (plus_di + minus_di)).rolling(14).mean()
+        df['adx'] = ind.adx_di(14)
         
         df.dropna(inplace=True)
         self.df = df.reset_index(drop=True)
 
+    def calcular_indicadores_compacto(self):
+        # Só o que a executar_simulacao lê: o close e os parâmetros de sinais_v40
+        # (+ o ts, para as odds do Polymarket)
+        colunas = ('c',) + ESTRATEGIAS['V40'].colunas
+        extras = ('ts',) if self.odds is not None else ()
+        self.df = frame_compacto(self.df, colunas, renomear={'adx_di': 'adx'}, extras=extras)
+
     def executar_simulacao(self):
         print(f"{Fore.YELLOW}⚙️  Executando V40: Z-Score 2.0 + Bandwidth Expansion...")
         
-        i = 0
-        while i < (len(self.df) - 16):
-            row = self.df.iloc[i]
-            future = self.df.iloc[i + 15]
-            sinal = None
-            
-            # FILTROS DE PRECISÃO
-            # Agora exigimos Z-Score 2.0 (Extremo)
-            # E exigimos que as bandas estejam mais abertas que a média (Sem Squeeze)
-            vol_exaurido = row['v'] < row['vol_ma5']
-            tendencia_calma = row['adx'] < 30
-            bandas_abertas = row['bandwidth'] > row['bw_ma20']
-            
-            # Lógica PUT
-            if row['z_score'] > 2.0 and row['prob_tac'] > 0.60 and bandas_abertas and vol_exaurido and tendencia_calma:
-                if row['upper_wick'] > (row['body'] * 0.6):
-                    sinal = "PUT"
-            
-            # Lógica CALL
-            elif row['z_score'] < -2.0 and row['prob_tac'] < 0.40 and bandas_abertas and vol_exaurido and tendencia_calma:
-                if row['lower_wick'] > (row['body'] * 0.6):
-                    sinal = "CALL"
-            
-            if sinal:
-                ganhou = (future['c'] > row['c']) if sinal == "CALL" else (future['c'] < row['c'])
-                self.trades.append({'res': 'WIN' if ganhou else 'LOSS'})
-                i += 15 
-            else:
-                i += 1
+        df = self.df
+        close = df['c'].to_numpy()
+        prob_tac = df['prob_tac'].to_numpy()
+        z_score = df['z_score'].to_numpy()
+        
+        # FILTROS DE PRECISÃO
+        # Agora exigimos Z-Score 2.0 (Extremo)
+        # E exigimos que as bandas estejam mais abertas que a média (Sem Squeeze)
+        call, put = sinais_v40(prob_tac, z_score, df['v'].to_numpy(), df['vol_ma5'].to_numpy(),
+                               df['body'].to_numpy(), df['upper_wick'].to_numpy(), df['lower_wick'].to_numpy(),
+                               df['adx'].to_numpy(), df['bandwidth'].to_numpy(), df['bw_ma20'].to_numpy())
+        
+        res = varrer_sinais(call, put, close, max_posicoes=self.max_posicoes)
+        self.sinais = res.sinais
+        if self.odds is not None:
+            self.payouts = payouts_resultado(self.odds, self.symbol, df['ts'].to_numpy('datetime64[ms]').astype(np.int64), res)
+        for ganhou in res.ganhou:
+            self.trades.append({'res': 'WIN' if ganhou else 'LOSS'})
 
     def gerar_relatorio(self):
         total = len(self.trades)
@@ -105,16 +120,24 @@ class SolanaBandwidthV40:
         print(f"{Fore.MAGENTA}RELATÓRIO V40 - BANDWIDTH SENTINEL")
         print(f"{Fore.WHITE}{'='*40}")
         print(f"Total Trades: {total}")
+        print(f"Sinais aproveitados: {total}/{self.sinais} (posições simultâneas: {self.max_posicoes or 'sem limite'})")
         print(f"Taxa de Acerto: {Fore.GREEN if taxa > 65 else Fore.YELLOW}{taxa:.2f}%")
         
         W = taxa / 100
         kelly = (W - ((1 - W) / 0.85)) * 100
         print(f"💰 Kelly Criterion: {Fore.CYAN}{kelly:.2f}%")
+        imprimir_monte_carlo([t['res'] for t in self.trades])
+        if self.payouts is not None:
+            imprimir_payout_real([t['res'] for t in self.trades], self.payouts)
         print(f"{Fore.WHITE}{'='*40}")
 
 # Execução
-bot = SolanaBandwidthV40()
-bot.baixar_dados()
-bot.calcular_indicadores()
-bot.executar_simulacao()
-bot.gerar_relatorio()
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--compacto', action='store_true', help="Pipeline compacto (float32, menos memória)")
+    args, resto = parser.parse_known_args()
+    bot = SolanaBandwidthV40(**argumentos_backtest(resto), compacto=args.compacto)
+    bot.baixar_dados()
+    bot.calcular_indicadores()
+    bot.executar_simulacao()
+    bot.gerar_relatorio()
\ No newline at end of file
@@ -0,0 +1,393 @@
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+import contextlib
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from colorama import Fore, Style, init
+
+from exchange_falsa import gerar_candles
+from indicadores import Indicadores, CacheIndicadores, CACHE
+from backtest_v11 import BacktestPolymarketV11_StandardReversion
+from backtest_v20 import EthHullTideV20
+from backtest_v36 import SolanaExhaustionV36
+from backtest_v38 import SolanaADXSniperV38
+from backtest_v39 import SolanaRSISniperV39
+from backtest_v40 import SolanaBandwidthV40
+import script_v4
+
+init(autoreset=True)
+
+# Benchmark offline dos indicadores e das estratégias (V11 -> V40).
+# Roda sobre candles sintéticos determinísticos (GBM com volume, o mesmo
+# gerador da exchange falsa), mede tempo de parede e pico de memória
+# (tracemalloc) de cada etapa e confere os trades contra o loop original
+# com df.iloc linha a linha. O resultado vai para um JSON que pode ser
+# comparado com uma execução anterior (--comparar) para pegar regressões.
+
+TAMANHOS_PADRAO = [1_000, 100_000, 1_000_000]
+MAX_LEGADO = 20_000 # O loop com iloc leva ~100 µs por candle: acima disso só a versão nova roda
+DIR_RESULTADOS = os.path.join('dados', 'benchmarks')
+
+COLUNAS_CURTAS = ['ts', 'o', 'h', 'l', 'c', 'v']
+COLUNAS_LONGAS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+
+def frame_sintetico(n, seed=42, colunas=COLUNAS_CURTAS):
+    # Mesmo formato que os backtests montam a partir do ccxt (ts em datetime)
+    df = pd.DataFrame(gerar_candles(n, seed=seed), columns=colunas)
+    df[colunas[0]] = pd.to_datetime(df[colunas[0]].astype(np.int64), unit='ms')
+    return df
+
+
+def medir(preparar, executar, repeticoes=3):
+    # (melhor tempo em s, pico de memória em MB, retorno da última execução).
+    # O pico vem de uma execução extra com tracemalloc, fora da cronometragem.
+    tempos = []
+    retorno = None
+    for _ in range(repeticoes):
+        args = preparar()
+        inicio = time.perf_counter()
+        retorno = executar(*args)
+        tempos.append(time.perf_counter() - inicio)
+
+    args = preparar()
+    tracemalloc.start()
+    try:
+        executar(*args)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(tempos), pico / 2**20, retorno
+
+
+# --- INDICADORES ---
+
+# Cada indicador é medido do zero (cache vazio), incluindo as séries de que depende
+INDICADORES = {
+    'log_ret': lambda ind: ind.log_ret(),
+    'media_movel_20': lambda ind: ind.media_movel('c', 20),
+    'desvio_movel_20': lambda ind: ind.desvio_movel('c', 20),
+    'z_hull_30': lambda ind: ind.z_hull(30, 15),
+    'prob_hull_30': lambda ind: ind.prob_hull(30, 15),
+    'prob_hull_60': lambda ind: ind.prob_hull(60, 15),
+    'bollinger_20': lambda ind: ind.bollinger(20, 2.0),
+    'z_score_20': lambda ind: ind.z_score(20),
+    'bandwidth_20': lambda ind: ind.bandwidth(20, 2.0),
+    'pavios': lambda ind: ind.pavios(),
+    'vol_ma_5': lambda ind: ind.vol_ma(5),
+    'true_range': lambda ind: ind.true_range(),
+    'adx_ewm_14': lambda ind: ind.adx_ewm(14),
+    'adx_di_14': lambda ind: ind.adx_di(14),
+    'rsi_7': lambda ind: ind.rsi(7),
+    'estocastico_k_14': lambda ind: ind.estocastico_k(14),
+}
+
+
+def medir_indicadores(df, repeticoes):
+    linhas = []
+    for nome, calcular in INDICADORES.items():
+        preparar = lambda: (Indicadores(df, 'BENCH', cache=CacheIndicadores()),)
+        segundos, pico, _ = medir(preparar, calcular, repeticoes)
+        linhas.append({'grupo': 'indicador', 'nome': nome, 'etapa': 'calcular', 'n': len(df),
+                       'segundos': segundos, 'pico_mb': pico})
+    return linhas
+
+
+# --- ESTRATÉGIAS ---
+
+# Regras originais, linha a linha, de cada versão (referência do loop legado)
+def regra_v11(row):
+    if row['adx'] < 30:
+        if row['close'] > row['bb_upper']:
+            return "PUT"
+        elif row['close'] < row['bb_lower']:
+            return "CALL"
+    return None
+
+
+def regra_v20(row):
+    if (row['prob_tac'] > 0.60) and (row['prob_str'] > 0.50):
+        return "CALL"
+    elif (row['prob_tac'] < 0.40) and (row['prob_str'] < 0.50):
+        return "PUT"
+    return None
+
+
+def regra_v36(row):
+    vol_exaurido = row['v'] < row['vol_ma5']
+    if row['prob_tac'] > 0.60 and row['z_score'] > 1.5 and vol_exaurido:
+        return "PUT"
+    elif row['prob_tac'] < 0.40 and row['z_score'] < -1.5 and vol_exaurido:
+        return "CALL"
+    return None
+
+
+def regra_v38(row):
+    vol_exaurido = row['v'] < row['vol_ma5']
+    tendencia_calma = row['adx'] < 30
+    if row['prob_tac'] > 0.60 and row['z_score'] > 1.5 and vol_exaurido and row['upper_wick'] > (row['body'] * 0.7) and tendencia_calma:
+        return "PUT"
+    elif row['prob_tac'] < 0.40 and row['z_score'] < -1.5 and vol_exaurido and row['lower_wick'] > (row['body'] * 0.7) and tendencia_calma:
+        return "CALL"
+    return None
+
+
+def regra_v39(row):
+    vol_exaurido = row['v'] < row['vol_ma5']
+    tendencia_calma = row['adx'] < 30
+    if row['prob_tac'] > 0.60 and row['z_score'] > 1.5 and vol_exaurido and row['upper_wick'] > (row['body'] * 0.6) and tendencia_calma and row['rsi'] > 70:
+        return "PUT"
+    elif row['prob_tac'] < 0.40 and row['z_score'] < -1.5 and vol_exaurido and row['lower_wick'] > (row['body'] * 0.6) and tendencia_calma and row['rsi'] < 30:
+        return "CALL"
+    return None
+
+
+def regra_v40(row):
+    vol_exaurido = row['v'] < row['vol_ma5']
+    tendencia_calma = row['adx'] < 30
+    bandas_abertas = row['bandwidth'] > row['bw_ma20']
+    # O setup decide o if/elif; o pavio só confirma dentro do ramo
+    if row['z_score'] > 2.0 and row['prob_tac'] > 0.60 and bandas_abertas and vol_exaurido and tendencia_calma:
+        return "PUT" if row['upper_wick'] > (row['body'] * 0.6) else None
+    elif row['z_score'] < -2.0 and row['prob_tac'] < 0.40 and bandas_abertas and vol_exaurido and tendencia_calma:
+        return "CALL" if row['lower_wick'] > (row['body'] * 0.6) else None
+    return None
+
+
+# nome -> (classe, atributo do DataFrame, colunas, método de indicadores, regra legada)
+ESTRATEGIAS = {
+    'V11': (BacktestPolymarketV11_StandardReversion, 'df_m1', COLUNAS_LONGAS, 'calcular_indicadores', regra_v11),
+    'V20': (EthHullTideV20, 'df', COLUNAS_CURTAS, 'calcular_metricas', regra_v20),
+    'script_v4': (script_v4.EthHullTideV20, 'df', COLUNAS_CURTAS, 'calcular_metricas', regra_v20),
+    'V36': (SolanaExhaustionV36, 'df', COLUNAS_CURTAS, 'calcular_indicadores', regra_v36),
+    'V38': (SolanaADXSniperV38, 'df', COLUNAS_CURTAS, 'calcular_indicadores', regra_v38),
+    'V39': (SolanaRSISniperV39, 'df', COLUNAS_CURTAS, 'calcular_indicadores', regra_v39),
+    'V40': (SolanaBandwidthV40, 'df', COLUNAS_CURTAS, 'calcular_indicadores', regra_v40),
+}
+
+
+def simulacao_legada(df, regra, col_close='c'):
+    # O loop original: df.iloc por candle, vencimento em i+15 e cooldown de 15
+    resultados = []
+    i = 0
+    while i < (len(df) - 16):
+        row = df.iloc[i]
+        future = df.iloc[i + 15]
+        sinal = regra(row)
+        if sinal:
+            diff = future[col_close] - row[col_close]
+            ganhou = diff > 0 if sinal == "CALL" else diff < 0
+            resultados.append('WIN' if ganhou else 'LOSS')
+            i += 15
+        else:
+            i += 1
+    return resultados
+
+
+def resultados_trades(trades):
+    # V11/V20 gravam 'Resultado', V36-V40 gravam 'res'
+    return [t['res'] if 'res' in t else t['Resultado'] for t in trades]
+
+
+def novo_bot(classe, atributo, df, **kwargs):
+    bot = classe(**kwargs)
+    setattr(bot, atributo, df)
+    return bot
+
+
+def silencioso(metodo):
+    # Os métodos imprimem cabeçalhos coloridos; fora da medição não interessam
+    def executar(*args):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return metodo(*args)
+    return executar
+
+
+def medir_estrategia(nome, df_base, repeticoes, max_legado, seed=42):
+    classe, atributo, colunas, metodo_ind, regra = ESTRATEGIAS[nome]
+    df_base = df_base.set_axis(colunas, axis=1)
+    linhas = []
+
+    # 1. Indicadores (cache global vazio a cada execução: mede o cálculo, não o cache)
+    def preparar_ind():
+        CACHE.limpar()
+        return (novo_bot(classe, atributo, df_base.copy()),)
+    segundos, pico, bot = medir(preparar_ind, silencioso(lambda b: getattr(b, metodo_ind)() or b), repeticoes)
+    linhas.append({'grupo': 'estrategia', 'nome': nome, 'etapa': metodo_ind, 'n': len(df_base),
+                   'segundos': segundos, 'pico_mb': pico})
+    df_ind = getattr(bot, atributo)
+    pico_normal = pico
+
+    # 2. Simulação sobre o frame já com indicadores
+    preparar_sim = lambda: (novo_bot(classe, atributo, df_ind),)
+    segundos, pico, bot = medir(preparar_sim, silencioso(lambda b: b.executar_simulacao() or b), repeticoes)
+    linha = {'grupo': 'estrategia', 'nome': nome, 'etapa': 'executar_simulacao', 'n': len(df_base),
+             'segundos': segundos, 'pico_mb': pico, 'trades': len(bot.trades)}
+    trades = resultados_trades(bot.trades)
+
+    # 2a. Cache quente com outro dataset do mesmo período e tamanho (outro seed):
+    # os trades têm de ser os mesmos de uma execução com o cache vazio
+    outro = frame_sintetico(len(df_base), seed + 1).set_axis(colunas, axis=1)
+    executar_tudo = silencioso(lambda b: getattr(b, metodo_ind)() or b.executar_simulacao() or b)
+    quente = resultados_trades(executar_tudo(novo_bot(classe, atributo, outro.copy())).trades)
+    CACHE.limpar()
+    frio = resultados_trades(executar_tudo(novo_bot(classe, atributo, outro.copy())).trades)
+    linha['cache'] = {'trades': len(frio), 'confere': quente == frio}
+
+    # 2b. Pipeline compacto (float32, só as colunas da regra), onde existir:
+    # pico por milhão de candles, ganho sobre o caminho normal e os mesmos trades
+    if hasattr(classe, 'calcular_indicadores_compacto'):
+        def preparar_comp():
+            CACHE.limpar()
+            return (novo_bot(classe, atributo, df_base.copy(), compacto=True),)
+        seg_comp, pico_comp, bot = medir(preparar_comp, silencioso(lambda b: b.calcular_indicadores() or b), repeticoes)
+        silencioso(bot.executar_simulacao)()
+        linhas.append({'grupo': 'estrategia', 'nome': nome, 'etapa': 'calcular_compacto', 'n': len(df_base),
+                       'segundos': seg_comp, 'pico_mb': pico_comp,
+                       'compacto': {
+                           'mb_por_milhao': pico_comp * 1_000_000 / len(df_base),
+                           'reducao': pico_normal / pico_comp if pico_comp else float('inf'),
+                           'confere': resultados_trades(bot.trades) == trades,
+                       }})
+
+    # 3. Conferência contra o loop legado num prefixo do frame
+    if max_legado:
+        prefixo = df_ind.iloc[:max_legado].copy()
+        col_close = colunas[4]
+        inicio = time.perf_counter()
+        esperado = simulacao_legada(prefixo, regra, col_close)
+        segundos_legado = time.perf_counter() - inicio
+        bot = novo_bot(classe, atributo, prefixo)
+        inicio = time.perf_counter()
+        silencioso(bot.executar_simulacao)()
+        segundos_novo = time.perf_counter() - inicio
+        linha['legado'] = {
+            'n': len(prefixo),
+            'segundos': segundos_legado,
+            'segundos_novo': segundos_novo,
+            'trades': len(esperado),
+            'confere': resultados_trades(bot.trades) == esperado,
+        }
+    linhas.append(linha)
+    return linhas
+
+
+# --- EXECUÇÃO / COMPARAÇÃO ---
+
+def metadados(args):
+    return {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'plataforma': platform.platform(),
+        'processador': platform.processor() or platform.machine(),
+        'seed': args.seed,
+        'repeticoes': args.repeticoes,
+    }
+
+
+def chave(linha):
+    return (linha['grupo'], linha['nome'], linha['etapa'], linha['n'])
+
+
+def imprimir_linha(linha):
+    extra = ""
+    if 'trades' in linha:
+        extra += f" | {linha['trades']} trades"
+    if 'compacto' in linha:
+        comp = linha['compacto']
+        cor = Fore.GREEN if comp['confere'] else Fore.RED
+        status = "mesmos trades" if comp['confere'] else "TRADES DIVERGEM"
+        extra += (f" | {comp['mb_por_milhao']:.0f} MB/1M candles, x{comp['reducao']:.1f} menos memória"
+                  f" | {cor}{status}{Style.RESET_ALL}")
+    if 'cache' in linha:
+        cor = Fore.GREEN if linha['cache']['confere'] else Fore.RED
+        status = "confere" if linha['cache']['confere'] else "DIVERGE"
+        extra += f" | cache mesmo período: {cor}{status}{Style.RESET_ALL}"
+    if 'legado' in linha:
+        leg = linha['legado']
+        cor = Fore.GREEN if leg['confere'] else Fore.RED
+        status = "confere" if leg['confere'] else "DIVERGE"
+        ganho = leg['segundos'] / leg['segundos_novo'] if leg['segundos_novo'] else float('inf')
+        extra += f" | legado ({leg['n']}): {cor}{status}{Style.RESET_ALL} x{ganho:.0f}"
+    print(f"{linha['nome']:<18} {linha['etapa']:<20} {linha['n']:>9} | "
+          f"{linha['segundos'] * 1000:>10.2f} ms | {linha['pico_mb']:>8.1f} MB{extra}")
+
+
+def comparar(atual, base, tolerancia, piso_ms=1.0):
+    # Razão atual/base por medição; acima da tolerância conta como regressão.
+    # Medições abaixo do piso (ms / MB) são ruído de relógio e não contam.
+    anteriores = {chave(l): l for l in base['resultados']}
+    regressoes = 0
+    print(f"\n{Fore.WHITE}{'='*40}")
+    print(f"{Fore.MAGENTA}COMPARAÇÃO COM {base['meta']['data']}")
+    print(f"{Fore.WHITE}{'='*40}")
+    for linha in atual['resultados']:
+        anterior = anteriores.get(chave(linha))
+        if anterior is None or not anterior['segundos']:
+            continue
+        razao = linha['segundos'] / anterior['segundos']
+        razao_mem = linha['pico_mb'] / anterior['pico_mb'] if anterior['pico_mb'] else 1.0
+        regrediu = ((razao > tolerancia and linha['segundos'] * 1000 > piso_ms)
+                    or (razao_mem > tolerancia and linha['pico_mb'] > piso_ms))
+        regressoes += regrediu
+        cor = Fore.RED if regrediu else (Fore.GREEN if razao < 1 / tolerancia else Fore.WHITE)
+        print(f"{cor}{linha['nome']:<18} {linha['etapa']:<20} {linha['n']:>9} | "
+              f"tempo x{razao:.2f} | memória x{razao_mem:.2f}")
+    print(f"\n{Fore.RED if regressoes else Fore.GREEN}{regressoes} regressão(ões) acima de x{tolerancia:.2f}")
+    return regressoes
+
+
+if __name__ == "__main__":
+    # python benchmark.py --tamanhos 1000 100000 --comparar dados/benchmarks/base.json
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=TAMANHOS_PADRAO)
+    parser.add_argument('--estrategias', nargs='+', default=list(ESTRATEGIAS), choices=list(ESTRATEGIAS))
+    parser.add_argument('--sem-indicadores', action='store_true')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--max-legado', type=int, default=MAX_LEGADO,
+                        help="Candles conferidos contra o loop legado (0 desliga)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--saida', help="JSON de saída (padrão: dados/benchmarks/<data>.json)")
+    parser.add_argument('--comparar', help="JSON de uma execução anterior")
+    parser.add_argument('--tolerancia', type=float, default=1.25, help="Razão atual/base tolerada")
+    parser.add_argument('--piso-ms', type=float, default=1.0, help="Ignora medições abaixo disso (ms / MB)")
+    args = parser.parse_args()
+
+    resultado = {'meta': metadados(args), 'resultados': []}
+    print(f"{Fore.YELLOW}⏱️  Benchmark offline | tamanhos {args.tamanhos} | seed {args.seed}\n")
+    for n in args.tamanhos:
+        df = frame_sintetico(n, args.seed)
+        print(f"{Fore.CYAN}📊 {n} candles")
+        linhas = [] if args.sem_indicadores else medir_indicadores(df, args.repeticoes)
+        for nome in args.estrategias:
+            linhas.extend(medir_estrategia(nome, df, args.repeticoes, args.max_legado, args.seed))
+        for linha in linhas:
+            imprimir_linha(linha)
+        resultado['resultados'].extend(linhas)
+        print()
+
+    saida = args.saida or os.path.join(DIR_RESULTADOS, datetime.now().strftime('%Y%m%d_%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(saida) or '.', exist_ok=True)
+    with open(saida, 'w') as f:
+        json.dump(resultado, f, indent=2)
+    print(f"💾 Resultados salvos em {saida}")
+
+    divergentes = [l['nome'] for l in resultado['resultados']
+                   if not all(l.get(k, {}).get('confere', True) for k in ('legado', 'compacto', 'cache'))]
+    if divergentes:
+        print(f"{Fore.RED}⚠️ Trades divergentes (loop legado, pipeline compacto ou cache): {', '.join(sorted(set(divergentes)))}")
+
+    regressoes = 0
+    if args.comparar:
+        with open(args.comparar) as f:
+            regressoes = comparar(resultado, json.load(f), args.tolerancia, args.piso_ms)
+    sys.exit(1 if divergentes or regressoes else 0)
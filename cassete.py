@@ -0,0 +1,233 @@
+import os
+import sys
+import gzip
+import json
+import time
+import argparse
+import threading
+from collections import Counter, defaultdict, deque
+from colorama import Fore, init
+
+init(autoreset=True)
+
+# Cassete: grava as respostas da exchange e serve de volta sem rede.
+# O `limit=1440` dos backtests sempre quer dizer "o último dia", então cada rodada
+# via um mercado diferente. Com a cassete, uma rodada gravada vira um arquivo
+# gzip de JSON lines e qualquer rodada seguinte (backtests, torneio, bot ao vivo)
+# recebe exatamente as mesmas respostas, na mesma ordem, sem tocar na Binance.
+#
+# A cassete fica por baixo do ClienteExchange (no lugar do ccxt): só chamadas que
+# iriam mesmo para a rede são gravadas; cache e coalescência continuam valendo.
+# Ligada pelo ambiente, sem mudar nenhum script:
+#   CASSETE_GRAVAR=cassetes/dia.jsonl.gz python backtest_v20.py
+#   CASSETE_REPRODUZIR=cassetes/dia.jsonl.gz python backtest_v20.py
+#   CASSETE_VELOCIDADE=1 -> ritmo da gravação (0 = o mais rápido possível; 60 = 60x)
+#
+# Formato: 1ª linha = cabeçalho {"cassete": 1, "exchange", "rateLimit", "ms"};
+# depois uma linha por chamada {"ms", "metodo", "chamada", "resposta"} ou "erro".
+# "ms" é o relógio da exchange no início da chamada; no replay ele vira o
+# exchange.milliseconds() do processo (relógio virtual).
+
+VERSAO = 1
+VELOCIDADE = float(os.getenv('CASSETE_VELOCIDADE', 0))
+DESCARGA = 100 # linhas entre descargas do gzip no disco
+
+# Parâmetros de cada endpoint na ordem do ccxt: fetch_ohlcv('ETH/USDT', '1m') e
+# fetch_ohlcv('ETH/USDT', timeframe='1m', since=None) viram a mesma chamada
+ASSINATURAS = {
+    'fetch_ohlcv': ('symbol', 'timeframe', 'since', 'limit', 'params'),
+    'fetch_ticker': ('symbol', 'params'),
+    'fetch_tickers': ('symbols', 'params'),
+    'fetch_order_book': ('symbol', 'limit', 'params'),
+    'fetch_trades': ('symbol', 'since', 'limit', 'params'),
+    'load_markets': ('reload', 'params'),
+}
+
+
+class ErroCassete(LookupError):
+    pass
+
+
+def normalizar(metodo, args, kwargs):
+    # Argumentos -> dict só com os valores informados (None / {} contam como ausentes)
+    nomes = ASSINATURAS[metodo]
+    chamada = dict(zip(nomes, args))
+    chamada.update(kwargs)
+    return {nome: valor for nome, valor in chamada.items() if valor is not None and valor != {}}
+
+
+def chave(metodo, chamada):
+    return json.dumps([metodo, chamada], sort_keys=True, separators=(',', ':'))
+
+
+def erro_gravado(registro):
+    # Levanta de novo o erro com o mesmo nome de classe do ccxt (o ClienteExchange decide
+    # retentativa pelo nome, ver cliente_exchange.retentavel)
+    classe = type(registro['erro']['tipo'], (Exception,), {})
+    return classe(registro['erro']['mensagem'])
+
+
+class GravadorCassete:
+    def __init__(self, exchange, caminho, nome='binance'):
+        self.exchange = exchange
+        self.caminho = caminho
+        self.gravadas = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+        self._arquivo = gzip.open(caminho, 'wt', encoding='utf-8')
+        cabecalho = {'cassete': VERSAO, 'exchange': nome,
+                     'rateLimit': getattr(exchange, 'rateLimit', None), 'ms': exchange.milliseconds()}
+        self._arquivo.write(json.dumps(cabecalho) + '\n')
+
+    def __getattr__(self, nome):
+        if nome in ASSINATURAS:
+            return lambda *args, **kwargs: self._gravar(nome, args, kwargs)
+        if nome.startswith('_'):
+            raise AttributeError(nome)
+        return getattr(self.exchange, nome)
+
+    def _gravar(self, metodo, args, kwargs):
+        registro = {'ms': self.exchange.milliseconds(), 'metodo': metodo,
+                    'chamada': normalizar(metodo, args, kwargs)}
+        try:
+            resposta = getattr(self.exchange, metodo)(*args, **kwargs)
+        except Exception as e:
+            registro['erro'] = {'tipo': type(e).__name__, 'mensagem': str(e)}
+            self._escrever(registro)
+            raise
+        registro['resposta'] = resposta
+        self._escrever(registro)
+        return resposta
+
+    def _escrever(self, registro):
+        linha = json.dumps(registro, separators=(',', ':'), default=_serializar)
+        with self._lock:
+            self._arquivo.write(linha + '\n')
+            self.gravadas += 1
+            if self.gravadas % DESCARGA == 0:
+                self._arquivo.flush()
+
+    def fechar(self):
+        with self._lock:
+            if not self._arquivo.closed:
+                self._arquivo.close()
+
+
+class ReprodutorCassete:
+    def __init__(self, caminho, velocidade=VELOCIDADE, relogio=time.monotonic, dormir=time.sleep):
+        # velocidade: 1 = ritmo real da gravação, 60 = 60x, 0/None = sem esperar
+        self.caminho = caminho
+        self.velocidade = velocidade or None
+        self.relogio = relogio
+        self.dormir = dormir
+        self._filas = defaultdict(deque) # chave -> registros ainda não servidos
+        self._ultimas = {} # chave -> último registro servido (repetido se a fila acabar)
+        self.servidas = 0
+        self._lock = threading.Lock()
+
+        with gzip.open(caminho, 'rt', encoding='utf-8') as f:
+            cabecalho = json.loads(f.readline())
+            if cabecalho.get('cassete') != VERSAO:
+                raise ErroCassete(f"{caminho}: não é uma cassete v{VERSAO}")
+            for linha in f:
+                registro = json.loads(linha)
+                self._filas[chave(registro['metodo'], registro['chamada'])].append(registro)
+        self.nome = cabecalho['exchange']
+        self.rateLimit = cabecalho['rateLimit']
+        self.inicio_ms = cabecalho['ms']
+        self._agora_ms = self.inicio_ms
+        self._partida = None # relógio local no primeiro uso (ritmo real)
+
+    def __getattr__(self, nome):
+        if nome in ASSINATURAS:
+            return lambda *args, **kwargs: self._servir(nome, args, kwargs)
+        raise AttributeError(f"{nome}: não gravado na cassete {self.caminho}")
+
+    def _decorrido_ms(self):
+        if self._partida is None:
+            self._partida = self.relogio()
+        return (self.relogio() - self._partida) * self.velocidade * 1000
+
+    def milliseconds(self):
+        # Relógio virtual: no ritmo real anda sozinho; no modo rápido fica no
+        # instante da última resposta servida
+        if self.velocidade:
+            return int(self.inicio_ms + self._decorrido_ms())
+        return self._agora_ms
+
+    def _servir(self, metodo, args, kwargs):
+        k = chave(metodo, normalizar(metodo, args, kwargs))
+        with self._lock:
+            fila = self._filas.get(k)
+            if fila:
+                registro = self._ultimas[k] = fila.popleft()
+            elif k in self._ultimas:
+                # Mais chamadas que na gravação: a resposta mais recente de novo
+                registro = self._ultimas[k]
+            else:
+                raise ErroCassete(f"chamada não gravada em {self.caminho}: {k}")
+            self.servidas += 1
+
+        if self.velocidade:
+            espera = (registro['ms'] - self.inicio_ms - self._decorrido_ms()) / self.velocidade / 1000
+            if espera > 0:
+                self.dormir(espera)
+        with self._lock:
+            self._agora_ms = max(self._agora_ms, registro['ms'])
+        if 'erro' in registro:
+            raise erro_gravado(registro)
+        return registro['resposta']
+
+    def restantes(self):
+        return sum(len(fila) for fila in self._filas.values())
+
+
+def _serializar(valor):
+    # Tipos do NumPy nas respostas (exchange falsa, ccxt com parse numérico)
+    if hasattr(valor, 'tolist'):
+        return valor.tolist()
+    raise TypeError(f"{type(valor).__name__} não serializável")
+
+
+def exchange_do_ambiente(nome, criar):
+    # Fábrica do obter_cliente: CASSETE_REPRODUZIR dispensa o ccxt; CASSETE_GRAVAR
+    # embrulha a exchange real
+    reproduzir = os.getenv('CASSETE_REPRODUZIR')
+    if reproduzir:
+        return ReprodutorCassete(reproduzir)
+    gravar = os.getenv('CASSETE_GRAVAR')
+    if gravar:
+        import atexit
+        gravador = GravadorCassete(criar(), gravar, nome)
+        atexit.register(gravador.fechar)
+        return gravador
+    return criar()
+
+
+def resumo(caminho):
+    with gzip.open(caminho, 'rt', encoding='utf-8') as f:
+        cabecalho = json.loads(f.readline())
+        registros = [json.loads(linha) for linha in f]
+    return cabecalho, registros
+
+
+if __name__ == "__main__":
+    # python cassete.py cassetes/dia.jsonl.gz
+    parser = argparse.ArgumentParser()
+    parser.add_argument('caminho')
+    args = parser.parse_args()
+
+    try:
+        cabecalho, registros = resumo(args.caminho)
+    except (OSError, ValueError) as e:
+        print(f"{Fore.RED}Erro ao ler {args.caminho}: {e}", file=sys.stderr)
+        sys.exit(1)
+    tamanho = os.path.getsize(args.caminho) / 1024
+    print(f"{Fore.CYAN}📼 {args.caminho}: {cabecalho['exchange']}, {len(registros)} chamadas, {tamanho:.1f} KB")
+    if registros:
+        duracao = (registros[-1]['ms'] - cabecalho['ms']) / 1000
+        print(f"Duração da gravação: {duracao:.1f}s")
+    por_metodo = Counter(r['metodo'] for r in registros)
+    erros = Counter(r['metodo'] for r in registros if 'erro' in r)
+    for metodo, n in por_metodo.most_common():
+        print(f"  {metodo}: {n}" + (f" ({Fore.RED}{erros[metodo]} erros{Fore.RESET})" if erros[metodo] else ""))
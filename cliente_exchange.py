@@ -0,0 +1,300 @@
+import os
+import time
+import random
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+# Cliente de exchange compartilhado por todos os scripts do processo.
+# Cada classe criava o seu ccxt.binance() sem enableRateLimit: scanner, bot e
+# backtests rodando juntos repetiam os mesmos fetch_ohlcv e arriscavam ban de IP.
+# Aqui há uma instância ccxt por exchange (uma sessão HTTP, conexões reaproveitadas),
+# criada só no primeiro uso (o import do ccxt custa ~0.5s), e por cima dela:
+#  - orçamento de peso por minuto (o "request weight" da Binance) para o processo
+#    inteiro; o peso que a Binance devolve no header x-mbx-used-weight-1m conta o
+#    IP todo, então outros processos no mesmo IP também entram na conta;
+#  - requisições idênticas simultâneas (mesmo método/símbolo/timeframe/since/limit)
+#    viram uma só: quem chega depois espera a que já está em voo;
+#  - cache das respostas recentes com TTL (página só com candles fechados não muda
+#    mais e fica bem mais tempo), LRU limitado em linhas e varrido dos expirados;
+#  - retentativas com backoff exponencial + jitter nos erros de rede / rate limit.
+#
+# Qualquer objeto com a interface do ccxt serve de exchange (ex.: ExchangeFalsa).
+
+PESO_MAX_MINUTO = int(os.getenv('PESO_MAX_MINUTO', 1200)) # a Binance corta em 6000/min por IP
+JANELA_PESO_S = 60.0
+TTL_S = 2.0 # resposta "ao vivo" (candle em formação)
+TTL_HISTORICO_S = 3600.0 # página só com candles fechados
+CACHE_MAX_LINHAS = int(os.getenv('CACHE_EXCHANGE_LINHAS', 200_000)) # ~200 páginas de 1000 candles
+TENTATIVAS = 4
+BACKOFF_S = 0.5
+
+# Peso de cada endpoint na Binance spot (/api/v3/klines = 2, exchangeInfo = 20...)
+PESOS = {'fetch_ohlcv': 2, 'fetch_ticker': 2, 'fetch_order_book': 5, 'load_markets': 20}
+
+# Erros que valem nova tentativa (nomes das classes do ccxt: a ExchangeFalsa e os
+# testes não precisam importar o ccxt para levantar um deles)
+RETENTAVEIS = {'NetworkError', 'RequestTimeout', 'ExchangeNotAvailable', 'DDoSProtection',
+               'RateLimitExceeded', 'OnMaintenance', 'ConnectionError', 'TimeoutError'}
+LIMITE_TAXA = {'DDoSProtection', 'RateLimitExceeded'}
+
+
+def retentavel(erro):
+    return any(classe.__name__ in RETENTAVEIS for classe in type(erro).__mro__)
+
+
+class OrcamentoPeso:
+    # Janela deslizante de peso gasto; quem passaria do limite espera a janela liberar
+    def __init__(self, peso_max=PESO_MAX_MINUTO, janela=JANELA_PESO_S, relogio=time.monotonic, dormir=time.sleep):
+        self.peso_max = peso_max
+        self.janela = janela
+        self.relogio = relogio
+        self.dormir = dormir
+        self._gastos = deque() # (instante, peso)
+        self._usado = 0
+        self._pausa_ate = 0.0
+        self._lock = threading.Lock()
+
+    def _expirar(self, agora):
+        while self._gastos and self._gastos[0][0] <= agora - self.janela:
+            self._usado -= self._gastos.popleft()[1]
+
+    def usado(self):
+        with self._lock:
+            self._expirar(self.relogio())
+            return self._usado
+
+    def reservar(self, peso):
+        # Bloqueia até caber `peso` na janela; devolve o tempo esperado (s)
+        esperado = 0.0
+        while True:
+            with self._lock:
+                agora = self.relogio()
+                self._expirar(agora)
+                espera = self._pausa_ate - agora
+                if espera <= 0:
+                    if self._usado + peso <= self.peso_max or not self._gastos:
+                        self._gastos.append((agora, peso))
+                        self._usado += peso
+                        return esperado
+                    espera = self._gastos[0][0] + self.janela - agora
+            espera = max(espera, 0.001)
+            self.dormir(espera)
+            esperado += espera
+
+    def sincronizar(self, usado_servidor):
+        # Peso que o servidor diz já ter contado para o IP (todos os processos):
+        # a diferença entra como gasto agora
+        with self._lock:
+            agora = self.relogio()
+            self._expirar(agora)
+            extra = usado_servidor - self._usado
+            if extra > 0:
+                self._gastos.append((agora, extra))
+                self._usado += extra
+
+    def pausar(self, segundos):
+        # 429/418: ninguém no processo manda nada até passar a pausa
+        with self._lock:
+            self._pausa_ate = max(self._pausa_ate, self.relogio() + segundos)
+
+
+class ClienteExchange:
+    def __init__(self, exchange=None, fabrica=None, peso_max=PESO_MAX_MINUTO, ttl=TTL_S,
+                 ttl_historico=TTL_HISTORICO_S, tentativas=TENTATIVAS, backoff=BACKOFF_S,
+                 max_linhas=CACHE_MAX_LINHAS, relogio=time.monotonic, dormir=time.sleep):
+        # `exchange` pronto ou `fabrica()` que o cria no primeiro uso
+        self._exchange = exchange
+        self._fabrica = fabrica
+        self.orcamento = OrcamentoPeso(peso_max, relogio=relogio, dormir=dormir)
+        self.ttl = ttl
+        self.ttl_historico = ttl_historico
+        self.tentativas = tentativas
+        self.backoff = backoff
+        self.relogio = relogio
+        self.dormir = dormir
+        self.max_linhas = max_linhas
+        self.linhas = 0 # linhas no cache (uma por candle; 1 para respostas que não são lista)
+        self._cache = OrderedDict() # chave -> (expira, resposta, linhas), do menos para o mais usado
+        self._proxima_varredura = 0.0
+        self._em_voo = {} # chave -> Future
+        self._lock = threading.Lock()
+        self.estatisticas = {'requisicoes': 0, 'cache': 0, 'coalescidas': 0, 'retentativas': 0, 'espera_s': 0.0}
+
+    @property
+    def exchange(self):
+        with self._lock:
+            if self._exchange is None:
+                self._exchange = self._fabrica()
+            return self._exchange
+
+    def __getattr__(self, nome):
+        # O resto da interface do ccxt (milliseconds, rateLimit, markets...) passa direto
+        if nome.startswith('_'):
+            raise AttributeError(nome)
+        return getattr(self.exchange, nome)
+
+    # --- ENDPOINTS ---
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        chave = ('fetch_ohlcv', symbol, timeframe, since, limit, _congelar(params))
+        return self._obter(chave, PESOS['fetch_ohlcv'],
+                           lambda: self.exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since,
+                                                             limit=limit, **({'params': params} if params else {})),
+                           lambda resposta: self._ttl_ohlcv(resposta, timeframe))
+
+    def fetch_ticker(self, symbol):
+        return self._obter(('fetch_ticker', symbol), PESOS['fetch_ticker'],
+                           lambda: self.exchange.fetch_ticker(symbol))
+
+    def load_markets(self, reload=False):
+        if reload:
+            self.limpar_cache()
+        return self._obter(('load_markets',), PESOS['load_markets'],
+                           lambda: self.exchange.load_markets(), lambda _: self.ttl_historico)
+
+    def limpar_cache(self):
+        with self._lock:
+            self._cache.clear()
+            self.linhas = 0
+
+    # --- NÚCLEO ---
+
+    def _obter(self, chave, peso, buscar, ttl=None):
+        with self._lock:
+            agora = self.relogio()
+            salvo = self._cache.get(chave)
+            if salvo is not None:
+                if salvo[0] > agora:
+                    self._cache.move_to_end(chave)
+                    self.estatisticas['cache'] += 1
+                    return _copiar(salvo[1])
+                self._remover(chave)
+            futuro = self._em_voo.get(chave)
+            dono = futuro is None
+            if dono:
+                futuro = self._em_voo[chave] = Future()
+            else:
+                self.estatisticas['coalescidas'] += 1
+
+        if not dono:
+            return _copiar(futuro.result())
+
+        try:
+            resposta = self._com_retentativas(peso, buscar)
+        except BaseException as e:
+            with self._lock:
+                del self._em_voo[chave]
+            futuro.set_exception(e)
+            raise
+        validade = ttl(resposta) if ttl is not None else self.ttl
+        with self._lock:
+            if validade > 0:
+                self._guardar(chave, resposta, validade)
+            del self._em_voo[chave]
+        futuro.set_result(resposta)
+        return _copiar(resposta)
+
+    def _guardar(self, chave, resposta, validade):
+        # Chamado com o lock. A ordem LRU não é a de vencimento (TTLs de 2s e de 1h
+        # misturados), então os expirados saem numa varredura completa a cada `ttl`
+        agora = self.relogio()
+        if agora >= self._proxima_varredura:
+            for k in [k for k, salvo in self._cache.items() if salvo[0] <= agora]:
+                self._remover(k)
+            self._proxima_varredura = agora + self.ttl
+        linhas = len(resposta) if isinstance(resposta, list) else 1
+        if linhas > self.max_linhas:
+            return
+        if chave in self._cache:
+            self._remover(chave)
+        self._cache[chave] = (agora + validade, resposta, linhas)
+        self.linhas += linhas
+        # Despeja os menos usados até caber no limite
+        while self.linhas > self.max_linhas:
+            _, (_, _, liberadas) = self._cache.popitem(last=False)
+            self.linhas -= liberadas
+
+    def _remover(self, chave):
+        self.linhas -= self._cache.pop(chave)[2]
+
+    def _com_retentativas(self, peso, buscar):
+        for tentativa in range(1, self.tentativas + 1):
+            self.estatisticas['espera_s'] += self.orcamento.reservar(peso)
+            try:
+                self.estatisticas['requisicoes'] += 1
+                resposta = buscar()
+                self._ler_peso_servidor()
+                return resposta
+            except Exception as e:
+                if not retentavel(e) or tentativa == self.tentativas:
+                    raise
+                self.estatisticas['retentativas'] += 1
+                espera = self.backoff * 2 ** (tentativa - 1) * (1 + random.random())
+                if any(classe.__name__ in LIMITE_TAXA for classe in type(e).__mro__):
+                    # Rate limit do servidor: o processo todo para (Retry-After se vier)
+                    espera = max(espera, self._retry_after())
+                    self.orcamento.pausar(espera)
+                self.dormir(espera)
+
+    def _headers(self):
+        return getattr(self._exchange, 'last_response_headers', None) or {}
+
+    def _ler_peso_servidor(self):
+        for nome, valor in self._headers().items():
+            if nome.lower() == 'x-mbx-used-weight-1m':
+                self.orcamento.sincronizar(int(valor))
+
+    def _retry_after(self):
+        for nome, valor in self._headers().items():
+            if nome.lower() == 'retry-after':
+                return float(valor)
+        return 0.0
+
+    def _ttl_ohlcv(self, resposta, timeframe):
+        # Página sem o candle em formação não muda mais: cache longo
+        if not resposta:
+            return self.ttl
+        from armazem_candles import ms_timeframe
+        fechada = resposta[-1][0] + ms_timeframe(timeframe) <= self.exchange.milliseconds()
+        return self.ttl_historico if fechada else self.ttl
+
+
+def _congelar(params):
+    return tuple(sorted(params.items())) if params else None
+
+
+def _copiar(resposta):
+    # Cada chamador recebe suas próprias linhas (a resposta fica no cache)
+    if isinstance(resposta, list):
+        return [list(linha) if isinstance(linha, list) else linha for linha in resposta]
+    return resposta
+
+
+# --- REGISTRO DO PROCESSO ---
+
+_CLIENTES = {}
+_LOCK_CLIENTES = threading.Lock()
+
+
+def obter_cliente(nome='binance', **opcoes):
+    # Cliente único por exchange no processo (mesma sessão HTTP e mesmo orçamento)
+    with _LOCK_CLIENTES:
+        if nome not in _CLIENTES:
+            def criar():
+                import ccxt
+                return getattr(ccxt, nome)({'enableRateLimit': True})
+
+            def fabrica():
+                # CASSETE_GRAVAR / CASSETE_REPRODUZIR trocam a exchange (ver cassete.py)
+                from cassete import exchange_do_ambiente
+                return exchange_do_ambiente(nome, criar)
+            _CLIENTES[nome] = ClienteExchange(fabrica=fabrica, **opcoes)
+        return _CLIENTES[nome]
+
+
+def registrar_cliente(cliente, nome='binance'):
+    # Troca o cliente do processo (ex.: ClienteExchange(ExchangeFalsa()) em testes e replays)
+    with _LOCK_CLIENTES:
+        _CLIENTES[nome] = cliente
+    return cliente
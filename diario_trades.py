@@ -0,0 +1,340 @@
+import os
+import csv
+import queue
+import sqlite3
+import calendar
+import argparse
+import threading
+from datetime import datetime, timedelta
+from colorama import Fore, Style, init
+
+init(autoreset=True)
+
+# Diário de trades em SQLite (modo WAL) no lugar do historico_trades.csv.
+# O bot só enfileira cada trade liquidado; uma thread escritora grava em lotes,
+# numa transação por lote. Índices em horário, lado e resultado, e uma tabela
+# agregada por hora (mantida por trigger) respondem taxa de acerto, estatísticas
+# por hora e PnL sem varrer a tabela inteira.
+#
+# Horários são gravados como vieram do bot (hora local, sem fuso): `entrada_ms`
+# é esse relógio de parede em ms, então a hora do dia bate com a do CSV.
+
+CAMINHO_PADRAO = os.getenv('DIARIO_TRADES', os.path.join('dados', 'diario_trades.db'))
+PAYOUT = 0.85
+HORA_MS = 3_600_000
+MIN_MS, MAX_MS = -2**62, 2**62 # período aberto
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY,
+    entrada_ms INTEGER NOT NULL,
+    saida_ms INTEGER,
+    tipo TEXT NOT NULL,
+    preco_entrada REAL NOT NULL,
+    preco_saida REAL,
+    p30 REAL,
+    p60 REAL,
+    status TEXT NOT NULL,
+    stake REAL NOT NULL DEFAULT 1.0,
+    pnl REAL NOT NULL,
+    UNIQUE (entrada_ms, tipo)
+);
+CREATE INDEX IF NOT EXISTS idx_trades_entrada ON trades (entrada_ms);
+CREATE INDEX IF NOT EXISTS idx_trades_tipo ON trades (tipo, entrada_ms);
+CREATE INDEX IF NOT EXISTS idx_trades_status ON trades (status, entrada_ms);
+
+CREATE TABLE IF NOT EXISTS trades_por_hora (
+    hora INTEGER NOT NULL,   -- entrada_ms // 3600000
+    tipo TEXT NOT NULL,
+    trades INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    pnl REAL NOT NULL,
+    PRIMARY KEY (hora, tipo)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_trades_por_hora AFTER INSERT ON trades BEGIN
+    INSERT INTO trades_por_hora (hora, tipo, trades, wins, pnl)
+    VALUES (NEW.entrada_ms / 3600000, NEW.tipo, 1, NEW.status = 'WIN', NEW.pnl)
+    ON CONFLICT (hora, tipo) DO UPDATE SET
+        trades = trades + 1,
+        wins = wins + excluded.wins,
+        pnl = pnl + excluded.pnl;
+END;
+"""
+
+DESCARREGAR = object() # marcador na fila: grava o lote atual sem esperar o intervalo
+
+COLUNAS = ('entrada_ms', 'saida_ms', 'tipo', 'preco_entrada', 'preco_saida', 'p30', 'p60', 'status', 'stake', 'pnl')
+
+
+def para_ms(momento):
+    # datetime (sem fuso) ou texto 'YYYY-MM-DD HH:MM:SS' -> ms do relógio de parede
+    if momento is None:
+        return None
+    if isinstance(momento, (int, float)):
+        return int(momento)
+    if isinstance(momento, str):
+        momento = datetime.fromisoformat(momento)
+    return calendar.timegm(momento.timetuple()) * 1000 + momento.microsecond // 1000
+
+
+def de_ms(ms):
+    return datetime(1970, 1, 1) + timedelta(milliseconds=ms)
+
+
+def linha_trade(trade):
+    # dict do bot -> tupla na ordem de COLUNAS
+    stake = trade.get('stake', 1.0)
+    pnl = trade.get('pnl')
+    if pnl is None:
+        pnl = stake * PAYOUT if trade['status'] == 'WIN' else -stake
+    return (para_ms(trade['entrada']), para_ms(trade.get('saida')), trade['tipo'], float(trade['preco']),
+            trade.get('preco_saida'), trade.get('p30'), trade.get('p60'), trade['status'], stake, pnl)
+
+
+class DiarioTrades:
+    def __init__(self, caminho=CAMINHO_PADRAO, tamanho_lote=500, intervalo_flush=1.0):
+        self.caminho = caminho
+        self.tamanho_lote = tamanho_lote
+        self.intervalo_flush = intervalo_flush
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+
+        with self._conectar() as conexao:
+            conexao.executescript(ESQUEMA)
+
+        # Leitura numa conexão própria (WAL: leitores não bloqueiam o escritor)
+        self._leitura = self._conectar(check_same_thread=False)
+        self._lock_leitura = threading.Lock()
+
+        self._fila = queue.Queue()
+        self._escritor = None
+        self.gravados = 0
+        self.ignorados = 0 # duplicados (mesma entrada e lado)
+
+    def _conectar(self, **kwargs):
+        conexao = sqlite3.connect(self.caminho, timeout=30, **kwargs)
+        conexao.execute("PRAGMA journal_mode=WAL")
+        conexao.execute("PRAGMA synchronous=NORMAL")
+        return conexao
+
+    # --- ESCRITA ---
+
+    def registrar(self, trade):
+        # Enfileira um trade liquidado; a gravação acontece na thread escritora.
+        # `trade`: entrada, tipo, preco, status e, opcionais, saida, preco_saida, p30, p60, stake, pnl
+        if self._escritor is None:
+            self._escritor = threading.Thread(target=self._escrever, name='diario-trades', daemon=True)
+            self._escritor.start()
+        self._fila.put(linha_trade(trade))
+
+    def _gravar(self, conexao, linhas):
+        ultimo_id = "SELECT COALESCE(MAX(id), 0) FROM trades"
+        with conexao:
+            antes = conexao.execute(ultimo_id).fetchone()[0]
+            conexao.executemany(f"INSERT OR IGNORE INTO trades ({', '.join(COLUNAS)}) "
+                                f"VALUES ({', '.join('?' * len(COLUNAS))})", linhas)
+            # ids são sequenciais (nada é apagado): a diferença é o que entrou de fato
+            inseridos = conexao.execute(ultimo_id).fetchone()[0] - antes
+        self.gravados += inseridos
+        self.ignorados += len(linhas) - inseridos
+
+    def _escrever(self):
+        conexao = self._conectar()
+        while True:
+            item = self._fila.get()
+            if item is None:
+                self._fila.task_done()
+                break
+            if item is DESCARREGAR:
+                self._fila.task_done()
+                continue
+            lote = [item]
+            # Junta o que chegar até encher o lote ou passar o intervalo
+            try:
+                while len(lote) < self.tamanho_lote:
+                    proximo = self._fila.get(timeout=self.intervalo_flush)
+                    if proximo is None:
+                        self._fila.put(None) # reprocessa o sinal de parada depois do lote
+                        self._fila.task_done()
+                        break
+                    if proximo is DESCARREGAR:
+                        self._fila.task_done()
+                        break
+                    lote.append(proximo)
+            except queue.Empty:
+                pass
+            try:
+                self._gravar(conexao, lote)
+            except sqlite3.Error as e:
+                print(f"{Fore.RED}Erro ao gravar {len(lote)} trade(s) no diário: {e}")
+            for _ in lote:
+                self._fila.task_done()
+        conexao.close()
+
+    def flush(self):
+        # Bloqueia até tudo que foi enfileirado estar gravado. O marcador faz a thread
+        # gravar o lote na hora, em vez de esperar o intervalo_flush
+        if self._escritor is None:
+            return
+        self._fila.put(DESCARREGAR)
+        self._fila.join()
+
+    def fechar(self):
+        if self._escritor is not None and self._escritor.is_alive():
+            self._fila.put(None)
+            self._escritor.join()
+            self._escritor = None
+        self._leitura.close()
+
+    def importar_csv(self, caminho='historico_trades.csv'):
+        # Importa o CSV antigo do bot (Data,Tipo,Preco_Entrada,Prob_Tatico,Prob_Estrategico,Status).
+        # Reimportar é seguro: (entrada, lado) repetido é ignorado.
+        conexao = self._conectar()
+        gravados = self.gravados
+        lote = []
+        with open(caminho, newline='') as f:
+            for registro in csv.DictReader(f):
+                lote.append(linha_trade({
+                    'entrada': registro['Data'],
+                    'tipo': registro['Tipo'],
+                    'preco': registro['Preco_Entrada'],
+                    'p30': float(registro['Prob_Tatico']),
+                    'p60': float(registro['Prob_Estrategico']),
+                    'status': registro['Status'],
+                }))
+                if len(lote) >= 10_000:
+                    self._gravar(conexao, lote)
+                    lote = []
+        if lote:
+            self._gravar(conexao, lote)
+        conexao.close()
+        return self.gravados - gravados
+
+    # --- CONSULTAS ---
+
+    def _consultar(self, sql, parametros=()):
+        with self._lock_leitura:
+            return self._leitura.execute(sql, parametros).fetchall()
+
+    def __len__(self):
+        return self._consultar("SELECT COUNT(*) FROM trades")[0][0]
+
+    def taxa_movel(self, n=100, ate=None, tipo=None):
+        # Taxa de acerto dos últimos `n` trades (até `ate`), lendo só n linhas do índice
+        filtros, parametros = [], []
+        if ate is not None:
+            filtros.append("entrada_ms <= ?")
+            parametros.append(para_ms(ate))
+        if tipo is not None:
+            filtros.append("tipo = ?")
+            parametros.append(tipo)
+        where = f"WHERE {' AND '.join(filtros)}" if filtros else ""
+        total, wins = self._consultar(
+            f"SELECT COUNT(*), COALESCE(SUM(status = 'WIN'), 0) FROM "
+            f"(SELECT status FROM trades {where} ORDER BY entrada_ms DESC LIMIT ?)", (*parametros, n))[0]
+        return wins / total if total else float('nan')
+
+    def serie_taxa_movel(self, n=100, inicio=None, fim=None):
+        # [(entrada, taxa dos últimos n)] no período (janela deslizante no próprio SQLite)
+        linhas = self._consultar(
+            "SELECT entrada_ms, AVG(status = 'WIN') OVER (ORDER BY entrada_ms ROWS BETWEEN ? PRECEDING AND CURRENT ROW) "
+            "FROM trades WHERE entrada_ms >= ? AND entrada_ms < ? ORDER BY entrada_ms",
+            (n - 1, *self._periodo(inicio, fim)))
+        return [(de_ms(ms), taxa) for ms, taxa in linhas]
+
+    @staticmethod
+    def _periodo(inicio, fim):
+        return (para_ms(inicio) if inicio is not None else MIN_MS,
+                para_ms(fim) if fim is not None else MAX_MS)
+
+    def resumo(self, inicio=None, fim=None, tipo=None):
+        # {trades, wins, taxa, pnl} em [inicio, fim). As horas cheias vêm da tabela
+        # agregada; só as pontas quebradas do período leem trades (pelo índice).
+        inicio_ms, fim_ms = self._periodo(inicio, fim)
+        filtro_tipo = "AND tipo = ?" if tipo is not None else ""
+        extra = (tipo,) if tipo is not None else ()
+
+        hora_ini = -(-inicio_ms // HORA_MS)
+        hora_fim = fim_ms // HORA_MS
+        partes = []
+        if hora_ini < hora_fim:
+            partes.append(self._consultar(
+                f"SELECT COALESCE(SUM(trades), 0), COALESCE(SUM(wins), 0), COALESCE(SUM(pnl), 0) "
+                f"FROM trades_por_hora WHERE hora >= ? AND hora < ? {filtro_tipo}", (hora_ini, hora_fim, *extra))[0])
+            pontas = [(inicio_ms, hora_ini * HORA_MS), (hora_fim * HORA_MS, fim_ms)]
+        else:
+            pontas = [(inicio_ms, fim_ms)] # período menor que uma hora cheia
+        for a, b in pontas:
+            if a < b:
+                partes.append(self._consultar(
+                    f"SELECT COUNT(*), COALESCE(SUM(status = 'WIN'), 0), COALESCE(SUM(pnl), 0) FROM trades "
+                    f"WHERE entrada_ms >= ? AND entrada_ms < ? {filtro_tipo}", (a, b, *extra))[0])
+
+        total = sum(p[0] for p in partes)
+        wins = sum(p[1] for p in partes)
+        pnl = sum(p[2] for p in partes)
+        return {'trades': total, 'wins': wins, 'taxa': wins / total if total else float('nan'), 'pnl': pnl}
+
+    def por_hora(self, inicio=None, fim=None):
+        # Estatísticas por hora do dia (0-23), direto da tabela agregada
+        # Granularidade de hora: horas parcialmente no período entram inteiras
+        inicio_ms, fim_ms = self._periodo(inicio, fim)
+        hora_ini, hora_fim = inicio_ms // HORA_MS, -(-fim_ms // HORA_MS)
+        linhas = self._consultar(
+            "SELECT hora % 24, SUM(trades), SUM(wins), SUM(pnl) FROM trades_por_hora "
+            "WHERE hora >= ? AND hora < ? GROUP BY hora % 24 ORDER BY hora % 24", (hora_ini, hora_fim))
+        return [{'hora': h, 'trades': t, 'wins': w, 'taxa': w / t, 'pnl': p} for h, t, w, p in linhas]
+
+    def trades(self, inicio=None, fim=None):
+        # Trades em [inicio, fim) na ordem de entrada (dicts com as COLUNAS)
+        linhas = self._consultar(
+            f"SELECT {', '.join(COLUNAS)} FROM trades WHERE entrada_ms >= ? AND entrada_ms < ? ORDER BY entrada_ms",
+            self._periodo(inicio, fim))
+        return [dict(zip(COLUNAS, linha)) for linha in linhas]
+
+    def por_lado(self, inicio=None, fim=None):
+        return {tipo: self.resumo(inicio, fim, tipo) for tipo in ('CALL', 'PUT')}
+
+    def pnl(self, inicio=None, fim=None):
+        return self.resumo(inicio, fim)['pnl']
+
+
+def imprimir_resumo(diario, inicio=None, fim=None, n_movel=100):
+    r = diario.resumo(inicio, fim)
+    print(f"\n{Fore.WHITE}{'='*40}")
+    print(f"{Fore.MAGENTA}DIÁRIO DE TRADES ({diario.caminho})")
+    print(f"{Fore.WHITE}{'='*40}")
+    if not r['trades']:
+        print(f"{Fore.RED}⚠️ Nenhum trade no período.")
+        return
+    cor = Fore.GREEN if r['pnl'] > 0 else Fore.RED
+    print(f"Total Trades: {r['trades']} | Taxa de Acerto: {r['taxa']*100:.2f}% | PnL: {cor}{r['pnl']:+.2f}{Style.RESET_ALL}")
+    print(f"Taxa móvel (últimos {n_movel}): {diario.taxa_movel(n_movel, ate=fim)*100:.2f}%")
+    for tipo, lado in diario.por_lado(inicio, fim).items():
+        if lado['trades']:
+            print(f"- {tipo}: {lado['trades']} trades | {lado['taxa']*100:.2f}% | PnL {lado['pnl']:+.2f}")
+
+    print(f"\n{Fore.YELLOW}🕐 POR HORA DO DIA:")
+    for h in diario.por_hora(inicio, fim):
+        cor = Fore.GREEN if h['pnl'] > 0 else Fore.RED
+        print(f"{h['hora']:02d}h | {h['trades']:>6} trades | {h['taxa']*100:6.2f}% | {cor}PnL {h['pnl']:+.2f}")
+
+
+if __name__ == "__main__":
+    # python diario_trades.py --importar historico_trades.csv
+    # python diario_trades.py --inicio 2026-02-01 --fim 2026-03-01 --movel 200
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--diario', default=CAMINHO_PADRAO)
+    parser.add_argument('--importar', help="CSV antigo do bot para importar")
+    parser.add_argument('--inicio')
+    parser.add_argument('--fim')
+    parser.add_argument('--movel', type=int, default=100, help="Trades da taxa de acerto móvel")
+    args = parser.parse_args()
+
+    diario = DiarioTrades(args.diario)
+    if args.importar:
+        print(f"{Fore.CYAN}📥 {diario.importar_csv(args.importar)} trade(s) importado(s) de {args.importar}")
+    imprimir_resumo(diario, args.inicio, args.fim, args.movel)
+    diario.fechar()
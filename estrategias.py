@@ -0,0 +1,145 @@
+import inspect
+import numpy as np
+from collections import namedtuple
+from indicadores import Indicadores, CACHE
+from motor_simulacao import varrer_sinais
+
+# Registro das estratégias V11 -> V40.
+# Cada versão é só uma função de sinal: recebe as colunas de indicadores que usa
+# (pelo nome dos parâmetros) e devolve os vetores (call, put) já exclusivos.
+# Os backtests chamam a mesma função; o torneio junta as colunas pedidas por
+# todas as estratégias registradas, calcula a união uma vez por ativo e avalia
+# cada regra sobre os mesmos arrays.
+#
+# Nova versão = uma função com @estrategia(...) aqui, sem copiar um backtest:
+#
+#   @estrategia('V41', 'SOL/USDT', "Z-Score 2.5 + volume")
+#   def sinais_v41(z_score, v, vol_ma5):
+#       ...
+#       return call, put
+
+# Colunas disponíveis para as regras: nome -> cálculo na biblioteca de indicadores
+CATALOGO = {
+    'c': lambda ind: ind.serie('c'),
+    'v': lambda ind: ind.serie('v'),
+    'prob_tac': lambda ind: ind.prob_hull(30, 15),
+    'prob_str': lambda ind: ind.prob_hull(60, 15),
+    'z_score': lambda ind: ind.z_score(20),
+    'bb_upper': lambda ind: ind.bollinger(20, 2.0)[0],
+    'bb_lower': lambda ind: ind.bollinger(20, 2.0)[1],
+    'bandwidth': lambda ind: ind.bandwidth(20, 2.0),
+    'bw_ma20': lambda ind: ind.media_movel('bandwidth', 20),
+    'vol_ma5': lambda ind: ind.vol_ma(5),
+    'body': lambda ind: ind.pavios()[0],
+    'upper_wick': lambda ind: ind.pavios()[1],
+    'lower_wick': lambda ind: ind.pavios()[2],
+    'dx': lambda ind: ind.dx(),
+    'adx_ewm': lambda ind: ind.adx_ewm(14),
+    'adx_di': lambda ind: ind.adx_di(14),
+    'rsi': lambda ind: ind.rsi(7),
+}
+
+# sinais: função (call, put); colunas: parâmetros dela; validar: colunas extras que
+# o backtest original também passava pelo dropna (mudam quais candles existem)
+Estrategia = namedtuple('Estrategia', ['nome', 'symbol', 'descricao', 'sinais', 'colunas', 'validar'])
+
+ESTRATEGIAS = {}
+
+
+def estrategia(nome, symbol, descricao='', validar=()):
+    def registrar(sinais):
+        colunas = tuple(inspect.signature(sinais).parameters)
+        faltando = [col for col in colunas + tuple(validar) if col not in CATALOGO]
+        if faltando:
+            raise ValueError(f"{nome}: colunas fora do CATALOGO: {faltando}")
+        ESTRATEGIAS[nome] = Estrategia(nome, symbol, descricao, sinais, colunas, tuple(validar))
+        return sinais
+    return registrar
+
+
+# --- REGRAS ---
+
+@estrategia('V11', 'BTC/USDT', "Bollinger 2.0 + ADX ewm < 30 (reversão)", validar=('dx',))
+def sinais_v11(c, bb_upper, bb_lower, adx_ewm):
+    # Mercado calmo (ADX < 30) e preço furando a banda: aposta na volta
+    mercado_calmo = adx_ewm < 30
+    put = mercado_calmo & (c > bb_upper)
+    call = mercado_calmo & (c < bb_lower) & ~put
+    return call, put
+
+
+@estrategia('V20', 'ETH/USDT', "Hull 30m a favor e maré 60m não contra")
+def sinais_v20(prob_tac, prob_str):
+    call = (prob_tac > 0.60) & (prob_str > 0.50)
+    put = (prob_tac < 0.40) & (prob_str < 0.50) & ~call
+    return call, put
+
+
+@estrategia('V36', 'SOL/USDT', "Hull inverso + Z-Score 1.5 + volume em queda")
+def sinais_v36(prob_tac, z_score, v, vol_ma5):
+    vol_exaurido = v < vol_ma5
+    put = (prob_tac > 0.60) & (z_score > 1.5) & vol_exaurido
+    call = (prob_tac < 0.40) & (z_score < -1.5) & vol_exaurido & ~put
+    return call, put
+
+
+@estrategia('V38', 'SOL/USDT', "V36 + pavio 0.7 + ADX DI < 30")
+def sinais_v38(prob_tac, z_score, v, vol_ma5, body, upper_wick, lower_wick, adx_di):
+    vol_exaurido = v < vol_ma5
+    tendencia_calma = adx_di < 30
+    put = (prob_tac > 0.60) & (z_score > 1.5) & vol_exaurido & (upper_wick > body * 0.7) & tendencia_calma
+    call = (prob_tac < 0.40) & (z_score < -1.5) & vol_exaurido & (lower_wick > body * 0.7) & tendencia_calma & ~put
+    return call, put
+
+
+@estrategia('V39', 'SOL/USDT', "V38 com pavio 0.6 + RSI(7) 70/30")
+def sinais_v39(prob_tac, z_score, v, vol_ma5, body, upper_wick, lower_wick, adx_di, rsi):
+    vol_exaurido = v < vol_ma5
+    tendencia_calma = adx_di < 30
+    put = ((prob_tac > 0.60) & (z_score > 1.5) & vol_exaurido & (upper_wick > body * 0.6)
+           & tendencia_calma & (rsi > 70))
+    call = ((prob_tac < 0.40) & (z_score < -1.5) & vol_exaurido & (lower_wick > body * 0.6)
+            & tendencia_calma & (rsi < 30) & ~put)
+    return call, put
+
+
+@estrategia('V40', 'SOL/USDT', "Z-Score 2.0 + bandas abrindo + pavio 0.6 + ADX DI < 30")
+def sinais_v40(prob_tac, z_score, v, vol_ma5, body, upper_wick, lower_wick, adx_di, bandwidth, bw_ma20):
+    vol_exaurido = v < vol_ma5
+    tendencia_calma = adx_di < 30
+    bandas_abertas = bandwidth > bw_ma20
+    # O setup decide o if/elif; o pavio só confirma dentro do ramo
+    setup_put = (z_score > 2.0) & (prob_tac > 0.60) & bandas_abertas & vol_exaurido & tendencia_calma
+    setup_call = (z_score < -2.0) & (prob_tac < 0.40) & bandas_abertas & vol_exaurido & tendencia_calma & ~setup_put
+    return setup_call & (lower_wick > body * 0.6), setup_put & (upper_wick > body * 0.6)
+
+
+# --- AVALIAÇÃO EM LOTE ---
+
+def colunas_necessarias(estrategias):
+    nomes = {'c'}
+    for est in estrategias:
+        nomes.update(est.colunas)
+        nomes.update(est.validar)
+    return sorted(nomes)
+
+
+def calcular_colunas(df, nomes, symbol=None, cache=CACHE):
+    # União das colunas pedidas, cada uma calculada uma vez (cache de indicadores)
+    ind = Indicadores(df, symbol, cache=cache)
+    return {nome: CATALOGO[nome](ind).to_numpy(dtype=np.float64) for nome in nomes}
+
+
+def sinais_validos(est, colunas):
+    # (call, put, close) só nos candles sem NaN nas colunas da estratégia, como o
+    # dropna do backtest isolado: o vencimento conta candles desse recorte
+    valido = np.ones(len(colunas['c']), dtype=bool)
+    for nome in est.colunas + est.validar + ('c',):
+        valido &= ~np.isnan(colunas[nome])
+    call, put = est.sinais(**{nome: colunas[nome][valido] for nome in est.colunas})
+    return call, put, colunas['c'][valido]
+
+
+def avaliar(est, colunas, max_posicoes=1):
+    # Mesmo resultado do backtest isolado da estratégia
+    return varrer_sinais(*sinais_validos(est, colunas), max_posicoes=max_posicoes)
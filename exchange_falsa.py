@@ -0,0 +1,142 @@
+import json
+import asyncio
+import threading
+import time
+import numpy as np
+
+# Exchange falsa para rodar backfill, scanner e testes sem rede.
+# Serve candles sintéticos determinísticos com a mesma assinatura do ccxt
+# (fetch_ohlcv / milliseconds / rateLimit) e um stand-in local do stream
+# de klines da Binance (websocket) que faz replay de candles gravados.
+# FonteOddsFalsa faz o papel da API de odds do Polymarket (odds_polymarket.py).
+
+
+def gerar_candles(n, inicio_ms=1_700_000_000_000, passo_ms=60_000, seed=42,
+                  preco_inicial=100.0, volatilidade=0.0015):
+    # Passeio geométrico (GBM sem drift) com pavios e volume log-normal.
+    # Retorna array (n, 6) no formato do ccxt: [ts, o, h, l, c, v]
+    rng = np.random.default_rng(seed)
+    retornos = rng.normal(0.0, volatilidade, n)
+    close = preco_inicial * np.exp(np.cumsum(retornos))
+    open_ = np.concatenate(([preco_inicial], close[:-1]))
+    high = np.maximum(open_, close) * (1 + rng.exponential(volatilidade / 2, n))
+    low = np.minimum(open_, close) * (1 - rng.exponential(volatilidade / 2, n))
+    volume = rng.lognormal(3.0, 0.8, n) * (1 + 50 * np.abs(retornos))
+    ts = inicio_ms + passo_ms * np.arange(n, dtype=np.int64)
+    return np.column_stack([ts, open_, high, low, close, volume])
+
+
+class NetworkError(Exception):
+    # Mesmo nome do erro de rede do ccxt: o ClienteExchange tenta de novo
+    pass
+
+
+class ExchangeFalsa:
+    def __init__(self, inicio_ms=1_700_000_000_000, n=100_000, passo_ms=60_000,
+                 seed=42, agora_ms=None, latencia=0.0, rate_limit=50):
+        self.candles = gerar_candles(n, inicio_ms, passo_ms, seed)
+        self.ts = self.candles[:, 0].astype(np.int64)
+        self.passo_ms = passo_ms
+        # Por padrão o "agora" fica no meio do último candle (em formação)
+        self.agora_ms = agora_ms if agora_ms is not None else int(self.ts[-1]) + passo_ms // 2
+        self.latencia = latencia
+        self.rateLimit = rate_limit
+        self.chamadas = 0
+        self.falhas = 0 # as próximas `falhas` chamadas levantam NetworkError
+        self._lock = threading.Lock()
+
+    def milliseconds(self):
+        return self.agora_ms
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=500):
+        with self._lock:
+            self.chamadas += 1
+            falhar = self.falhas > 0
+            self.falhas -= falhar
+        if falhar:
+            raise NetworkError("conexão recusada (falha simulada)")
+        if self.latencia:
+            time.sleep(self.latencia)
+
+        visiveis = int(np.searchsorted(self.ts, self.agora_ms, side='right'))
+        if since is None:
+            a = max(visiveis - limit, 0)
+        else:
+            a = int(np.searchsorted(self.ts, since, side='left'))
+        b = min(a + limit, visiveis)
+        return [[int(linha[0])] + [float(x) for x in linha[1:]] for linha in self.candles[a:b]]
+
+
+class FonteOddsFalsa:
+    # Snapshots (ts, p_up, p_down) a cada `passo_ms`: p_up oscila em torno de 0.5 e
+    # o Down custa o complemento mais um spread (a soma passa de 1, como no livro real)
+    def __init__(self, inicio_ms=1_700_000_000_000, n=100_000, passo_ms=10_000, seed=42, spread=0.02):
+        rng = np.random.default_rng(seed)
+        self.ts = inicio_ms + passo_ms * np.arange(n, dtype=np.int64)
+        ruido = np.clip(np.cumsum(rng.normal(0.0, 0.01, n)) * 0.2, -0.3, 0.3)
+        self.p_up = np.round(np.clip(0.5 + ruido + rng.normal(0.0, 0.02, n), 0.05, 0.95), 3)
+        self.p_down = np.round(np.clip(1.0 - self.p_up + spread, 0.05, 0.99), 3)
+        self.chamadas = 0
+
+    def buscar_odds(self, symbol, since=None, limit=1000):
+        self.chamadas += 1
+        a = 0 if since is None else int(np.searchsorted(self.ts, since, side='left'))
+        b = min(a + limit, len(self.ts))
+        return [[int(self.ts[i]), float(self.p_up[i]), float(self.p_down[i])] for i in range(a, b)]
+
+
+def mensagem_kline(candle, fechado, symbol='ETHUSDT', passo_ms=60_000, close=None):
+    # Mesmo formato do evento `kline` da Binance (preços como string)
+    ts, o, h, l, c, v = candle[:6]
+    c = c if close is None else close
+    return json.dumps({
+        'e': 'kline', 'E': int(ts) + passo_ms, 's': symbol,
+        'k': {
+            't': int(ts), 'T': int(ts) + passo_ms - 1, 's': symbol, 'i': '1m',
+            'o': str(o), 'h': str(h), 'l': str(l), 'c': str(c), 'v': str(v), 'x': fechado,
+        },
+    })
+
+
+class ServidorKlinesWS:
+    # Websocket local que faz replay de candles: `parciais` atualizações do candle
+    # em formação (close interpolado entre open e close) seguidas do candle fechado.
+    def __init__(self, candles, intervalo=0.0, parciais=0, symbol='ETHUSDT'):
+        self.candles = candles
+        self.intervalo = intervalo
+        self.parciais = parciais
+        self.symbol = symbol
+        self.enviados = 0
+        self._runner = None
+
+    async def _replay(self, request):
+        from aiohttp import web
+
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        for candle in self.candles:
+            o, c = float(candle[1]), float(candle[4])
+            for p in range(1, self.parciais + 1):
+                parcial = o + (c - o) * p / (self.parciais + 1)
+                await ws.send_str(mensagem_kline(candle, False, self.symbol, close=parcial))
+            await ws.send_str(mensagem_kline(candle, True, self.symbol))
+            self.enviados += 1
+            await asyncio.sleep(self.intervalo)
+        await ws.close()
+        return ws
+
+    async def iniciar(self, host='127.0.0.1', porta=0):
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_get('/ws/{stream}', self._replay)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, porta)
+        await site.start()
+        host, porta = self._runner.addresses[0][:2]
+        return f"ws://{host}:{porta}/ws"
+
+    async def parar(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
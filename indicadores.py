@@ -0,0 +1,222 @@
+import os
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from scipy.stats import norm
+
+# Biblioteca única de indicadores usada por todas as versões (V11 -> V40,
+# scanner, varredura). As fórmulas são exatamente as que estavam copiadas em
+# cada backtest; a diferença é que cada resultado passa por um cache LRU com
+# limite de memória, chaveado por (symbol, timeframe, impressão digital dos dados,
+# indicador, parâmetros). Quando várias estratégias ou pontos da varredura
+# pedem o mesmo rolling(30).std() da mesma série, ele é calculado uma vez só.
+#
+# As Series devolvidas são compartilhadas pelo cache: não modifique in-place.
+
+
+class CacheIndicadores:
+    def __init__(self, max_bytes=256 * 2**20):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def tamanho(valor):
+        if isinstance(valor, tuple):
+            return sum(CacheIndicadores.tamanho(v) for v in valor)
+        return valor.values.nbytes if hasattr(valor, 'values') else np.asarray(valor).nbytes
+
+    def obter(self, chave, calcular):
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.hits += 1
+                return self._itens[chave][0]
+            self.misses += 1
+
+        valor = calcular()
+        tamanho = self.tamanho(valor)
+        if tamanho > self.max_bytes:
+            return valor
+
+        with self._lock:
+            if chave not in self._itens:
+                self._itens[chave] = (valor, tamanho)
+                self.bytes += tamanho
+            # Despeja os menos usados até caber no limite
+            while self.bytes > self.max_bytes:
+                _, (_, liberado) = self._itens.popitem(last=False)
+                self.bytes -= liberado
+        return valor
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._itens)
+
+
+CACHE = CacheIndicadores(int(os.getenv('CACHE_INDICADORES_MB', 256)) * 2**20)
+
+# Nomes curtos (ts, o, h, l, c, v) ou longos (timestamp, open, ..., volume)
+COLUNAS_CURTAS = {'ts': 'ts', 'o': 'o', 'h': 'h', 'l': 'l', 'c': 'c', 'v': 'v'}
+COLUNAS_LONGAS = {'ts': 'timestamp', 'o': 'open', 'h': 'high', 'l': 'low', 'c': 'close', 'v': 'volume'}
+
+
+def _bytes(valores):
+    return (valores.astype(str) if valores.dtype == object else np.ascontiguousarray(valores)).tobytes()
+
+
+class Indicadores:
+    # Indicadores de um DataFrame de candles, memoizados no cache global.
+    # Crie antes do dropna: a chave de dados usa o frame cru.
+    def __init__(self, df, symbol=None, timeframe='1m', cache=CACHE):
+        self.df = df
+        self.cache = cache
+        self.col = COLUNAS_LONGAS if 'close' in df.columns else COLUNAS_CURTAS
+        self.chave_dados = self._chave_dados(symbol, timeframe)
+
+    def _chave_dados(self, symbol, timeframe):
+        # Impressão digital do conteúdo (ts + OHLCV) sempre: mesmo símbolo, período e
+        # tamanho com valores diferentes (candle em formação que mudou entre dois
+        # fetch no mesmo minuto, outro dataset sintético) não pode reaproveitar nada.
+        # O índice também entra: as Series do cache carregam o índice do primeiro frame,
+        # e o df[col] = serie de outro índice (reset_index, fatia, bloco do walk-forward)
+        # realinharia para NaN ou linhas erradas
+        n = len(self.df)
+        h = hashlib.blake2b(digest_size=16)
+        indice = self.df.index
+        if isinstance(indice, pd.RangeIndex):
+            h.update(f"{indice.start}:{indice.stop}:{indice.step}".encode())
+        else:
+            h.update(_bytes(indice.to_numpy()))
+        if self.col['ts'] in self.df.columns:
+            h.update(_bytes(self.df[self.col['ts']].to_numpy()))
+        for k in ('o', 'h', 'l', 'c', 'v'):
+            h.update(np.ascontiguousarray(self.df[self.col[k]].to_numpy(dtype=np.float64)).tobytes())
+        return (symbol, timeframe, h.hexdigest(), n)
+
+    def _memo(self, nome, params, calcular):
+        return self.cache.obter((self.chave_dados, nome, params), calcular)
+
+    def serie(self, nome):
+        # 'o', 'h', 'l', 'c', 'v' ou uma série derivada ('log_ret', 'bandwidth')
+        if nome in self.col:
+            return self.df[self.col[nome]]
+        return getattr(self, nome)()
+
+    # --- BLOCOS BÁSICOS ---
+
+    def log_ret(self):
+        c = self.serie('c')
+        return self._memo('log_ret', (), lambda: np.log(c / c.shift(1)))
+
+    def media_movel(self, nome, janela):
+        return self._memo('media', (nome, janela), lambda: self.serie(nome).rolling(window=janela).mean())
+
+    def desvio_movel(self, nome, janela):
+        return self._memo('desvio', (nome, janela), lambda: self.serie(nome).rolling(window=janela).std())
+
+    # --- HULL ---
+
+    def z_hull(self, janela, T=15):
+        # Z-Score de Hull: (mu * T) / (sigma * sqrt(T)) dos log-retornos
+        def calcular():
+            mu = self.media_movel('log_ret', janela)
+            sigma = self.desvio_movel('log_ret', janela)
+            return (mu * T) / (sigma * np.sqrt(T))
+        return self._memo('z_hull', (janela, T), calcular)
+
+    def prob_hull(self, janela, T=15):
+        def calcular():
+            z = self.z_hull(janela, T)
+            return pd.Series(norm.cdf(z), index=z.index)
+        return self._memo('prob_hull', (janela, T), calcular)
+
+    # --- BOLLINGER ---
+
+    def bollinger(self, janela=20, desvios=2.0):
+        # (upper, lower)
+        def calcular():
+            ma = self.media_movel('c', janela)
+            std = self.desvio_movel('c', janela)
+            return ma + (std * desvios), ma - (std * desvios)
+        return self._memo('bollinger', (janela, desvios), calcular)
+
+    def z_score(self, janela=20):
+        # Z-Score de preço (mola)
+        def calcular():
+            return (self.serie('c') - self.media_movel('c', janela)) / self.desvio_movel('c', janela)
+        return self._memo('z_score', (janela,), calcular)
+
+    def bandwidth(self, janela=20, desvios=2.0):
+        # Largura relativa das bandas (fração; o scanner V14 mostra em %)
+        def calcular():
+            upper, lower = self.bollinger(janela, desvios)
+            return (upper - lower) / self.media_movel('c', janela)
+        return self._memo('bandwidth', (janela, desvios), calcular)
+
+    # --- CANDLE / VOLUME ---
+
+    def pavios(self):
+        # (body, upper_wick, lower_wick)
+        def calcular():
+            o, h, l, c = (self.serie(k) for k in 'ohlc')
+            oc = pd.concat([o, c], axis=1)
+            return abs(c - o), h - oc.max(axis=1), oc.min(axis=1) - l
+        return self._memo('pavios', (), calcular)
+
+    def vol_ma(self, janela=5):
+        return self.media_movel('v', janela)
+
+    # --- FORÇA / OSCILADORES ---
+
+    def true_range(self):
+        # Maior variação absoluta entre h, l e c de um candle para o outro
+        def calcular():
+            hlc = pd.concat([self.serie('h'), self.serie('l'), self.serie('c')], axis=1)
+            return hlc.diff().abs().max(axis=1)
+        return self._memo('true_range', (), calcular)
+
+    def dx(self):
+        # DX "rápido" do V11/V14: 100 * |Δh - Δl| / tr
+        def calcular():
+            return 100 * abs(self.serie('h').diff() - self.serie('l').diff()) / self.true_range()
+        return self._memo('dx', (), calcular)
+
+    def adx_ewm(self, span=14):
+        return self._memo('adx_ewm', (span,), lambda: self.dx().ewm(span=span).mean())
+
+    def adx_di(self, periodo=14):
+        # ADX via DI+/DI- (V38-V40)
+        def calcular():
+            plus_dm = self.serie('h').diff().clip(lower=0)
+            minus_dm = self.serie('l').diff().clip(upper=0).abs()
+            tr_smooth = self.true_range().rolling(periodo).sum()
+            plus_di = 100 * (plus_dm.rolling(periodo).sum() / tr_smooth)
+            minus_di = 100 * (minus_dm.rolling(periodo).sum() / tr_smooth)
+            return (100 * abs(plus_di - minus_di) / (plus_di + minus_di)).rolling(periodo).mean()
+        return self._memo('adx_di', (periodo,), calcular)
+
+    def rsi(self, periodo=7):
+        def calcular():
+            delta = self.serie('c').diff()
+            gain = (delta.where(delta > 0, 0)).rolling(window=periodo).mean()
+            loss = (-delta.where(delta < 0, 0)).rolling(window=periodo).mean()
+            rs = gain / loss
+            return 100 - (100 / (1 + rs))
+        return self._memo('rsi', (periodo,), calcular)
+
+    def estocastico_k(self, periodo=14):
+        def calcular():
+            lowest_low = self.serie('l').rolling(periodo).min()
+            highest_high = self.serie('h').rolling(periodo).max()
+            return 100 * ((self.serie('c') - lowest_low) / (highest_high - lowest_low))
+        return self._memo('estocastico_k', (periodo,), calcular)
@@ -0,0 +1,265 @@
+import math
+from collections import deque
+
+# Indicadores incrementais O(1) por candle para o bot ao vivo.
+# Em vez de montar um DataFrame e refazer rolling() sobre a janela inteira a cada
+# tick, cada indicador guarda só o estado da janela (Welford deslizante / somas)
+# e é atualizado a cada candle fechado. Os valores batem com as fórmulas pandas
+# dos backtests (rolling com ddof=1, ewm com adjust=True).
+
+NAN = float('nan')
+
+
+def cdf_normal(z):
+    # Equivalente a scipy.stats.norm.cdf para um escalar
+    if z != z:
+        return NAN
+    return 0.5 * math.erfc(-z / math.sqrt(2.0))
+
+
+class JanelaRolante:
+    # Média e desvio padrão (ddof=1) de uma janela deslizante via Welford
+    def __init__(self, tamanho, recalcular_a_cada=10_000):
+        self.tamanho = tamanho
+        self.valores = deque(maxlen=tamanho)
+        self.media_atual = 0.0
+        self.m2 = 0.0
+        self.recalcular_a_cada = recalcular_a_cada
+        self._atualizacoes = 0
+
+    @property
+    def cheia(self):
+        return len(self.valores) == self.tamanho
+
+    def _passo(self, x):
+        # Novo (média, m2, n) se `x` entrasse na janela, sem alterar o estado
+        n = len(self.valores)
+        if n < self.tamanho:
+            n += 1
+            delta = x - self.media_atual
+            media = self.media_atual + delta / n
+            return media, self.m2 + delta * (x - media), n
+        y = self.valores[0]
+        media = self.media_atual + (x - y) / n
+        m2 = self.m2 + (x - y) * (x - media + y - self.media_atual)
+        return media, max(m2, 0.0), n
+
+    def adicionar(self, x):
+        self.media_atual, self.m2, _ = self._passo(x)
+        self.valores.append(x)
+        self._atualizacoes += 1
+        if self._atualizacoes % self.recalcular_a_cada == 0:
+            self._recalcular()
+
+    def _recalcular(self):
+        # Zera o erro acumulado de ponto flutuante de tempos em tempos
+        n = len(self.valores)
+        self.media_atual = math.fsum(self.valores) / n
+        self.m2 = math.fsum((v - self.media_atual) ** 2 for v in self.valores)
+
+    def media(self):
+        return self.media_atual if self.cheia else NAN
+
+    def desvio(self):
+        if not self.cheia or self.tamanho < 2:
+            return NAN
+        return math.sqrt(self.m2 / (self.tamanho - 1))
+
+    def para_dict(self):
+        return {'tamanho': self.tamanho, 'valores': list(self.valores)}
+
+    @classmethod
+    def de_dict(cls, dados):
+        janela = cls(dados['tamanho'])
+        janela.valores.extend(dados['valores'])
+        if janela.valores:
+            janela._recalcular()
+        return janela
+
+    def espiar(self, x):
+        # (média, desvio) da janela como se `x` fosse o próximo valor
+        media, m2, n = self._passo(x)
+        if n < self.tamanho:
+            return NAN, NAN
+        return media, math.sqrt(m2 / (n - 1)) if n > 1 else NAN
+
+
+class EstadoHull:
+    # Probabilidade de Hull (log-retornos) para várias janelas ao mesmo tempo
+    def __init__(self, janelas=(30, 60), horizonte=15):
+        self.horizonte = horizonte
+        self.janelas = {j: JanelaRolante(j) for j in janelas}
+        self.ultimo_close = None
+
+    def atualizar(self, close):
+        if self.ultimo_close is not None:
+            r = math.log(close / self.ultimo_close)
+            for janela in self.janelas.values():
+                janela.adicionar(r)
+        self.ultimo_close = close
+
+    def para_dict(self):
+        # Snapshot serializável em JSON (floats voltam idênticos)
+        return {
+            'horizonte': self.horizonte,
+            'ultimo_close': self.ultimo_close,
+            'janelas': [janela.para_dict() for janela in self.janelas.values()],
+        }
+
+    @classmethod
+    def de_dict(cls, dados):
+        estado = cls(janelas=(), horizonte=dados['horizonte'])
+        estado.janelas = {j['tamanho']: JanelaRolante.de_dict(j) for j in dados['janelas']}
+        estado.ultimo_close = dados['ultimo_close']
+        return estado
+
+    def _prob(self, mu, sigma):
+        T = self.horizonte
+        if sigma != sigma or mu != mu:
+            return NAN
+        if sigma == 0:
+            return NAN if mu == 0 else (1.0 if mu > 0 else 0.0)
+        return cdf_normal((mu * T) / (sigma * math.sqrt(T)))
+
+    def probabilidades(self, preco_parcial=None):
+        # {janela: prob}. Com `preco_parcial`, inclui o candle em formação sem gravá-lo.
+        probs = {}
+        for tamanho, janela in self.janelas.items():
+            if preco_parcial is not None and self.ultimo_close is not None:
+                mu, sigma = janela.espiar(math.log(preco_parcial / self.ultimo_close))
+            else:
+                mu, sigma = janela.media(), janela.desvio()
+            probs[tamanho] = self._prob(mu, sigma)
+        return probs
+
+
+class BollingerIncremental:
+    # MA20 / STD20 / Z-Score de preço
+    def __init__(self, janela=20, desvios=2.0):
+        self.janela = JanelaRolante(janela)
+        self.desvios = desvios
+        self.ultimo_close = NAN
+
+    def atualizar(self, close):
+        self.janela.adicionar(close)
+        self.ultimo_close = close
+
+    def valores(self):
+        ma, std = self.janela.media(), self.janela.desvio()
+        return {
+            'ma20': ma,
+            'std20': std,
+            'upper': ma + self.desvios * std,
+            'lower': ma - self.desvios * std,
+            'z_score': (self.ultimo_close - ma) / std if std else NAN,
+        }
+
+
+class MediaVolume:
+    # vol_ma5
+    def __init__(self, janela=5):
+        self.janela = JanelaRolante(janela)
+
+    def atualizar(self, volume):
+        self.janela.adicionar(volume)
+
+    def valor(self):
+        return self.janela.media()
+
+
+class RSIIncremental:
+    # RSI com médias simples de ganhos/perdas (igual ao rolling(7) do V39)
+    def __init__(self, periodo=7):
+        self.ganhos = JanelaRolante(periodo)
+        self.perdas = JanelaRolante(periodo)
+        self.ultimo_close = None
+
+    def atualizar(self, close):
+        # No pandas o primeiro delta (NaN) entra como 0 nas duas séries
+        delta = 0.0 if self.ultimo_close is None else close - self.ultimo_close
+        self.ganhos.adicionar(delta if delta > 0 else 0.0)
+        self.perdas.adicionar(-delta if delta < 0 else 0.0)
+        self.ultimo_close = close
+
+    def valor(self):
+        ganho, perda = self.ganhos.media(), self.perdas.media()
+        if ganho != ganho or perda != perda:
+            return NAN
+        if perda == 0:
+            return NAN if ganho == 0 else 100.0
+        return 100 - (100 / (1 + ganho / perda))
+
+
+class ADXIncremental:
+    # ADX via DI+/DI- com somas de 14 e média de 14 do DX (V38-V40)
+    def __init__(self, periodo=14):
+        self.tr = deque(maxlen=periodo)
+        self.plus_dm = deque(maxlen=periodo)
+        self.minus_dm = deque(maxlen=periodo)
+        self.soma_tr = self.soma_plus = self.soma_minus = 0.0
+        self.dx = JanelaRolante(periodo)
+        self.periodo = periodo
+        self.anterior = None
+
+    def _empurrar(self, fila, soma, valor):
+        if len(fila) == fila.maxlen:
+            soma -= fila[0]
+        fila.append(valor)
+        return soma + valor
+
+    def atualizar(self, high, low, close):
+        if self.anterior is None:
+            self.anterior = (high, low, close)
+            return
+        h0, l0, c0 = self.anterior
+        self.anterior = (high, low, close)
+
+        tr = max(abs(high - h0), abs(low - l0), abs(close - c0))
+        self.soma_tr = self._empurrar(self.tr, self.soma_tr, tr)
+        self.soma_plus = self._empurrar(self.plus_dm, self.soma_plus, max(high - h0, 0.0))
+        self.soma_minus = self._empurrar(self.minus_dm, self.soma_minus, abs(min(low - l0, 0.0)))
+
+        if len(self.tr) < self.periodo:
+            return
+        plus_di = 100 * (self.soma_plus / self.soma_tr) if self.soma_tr > 0 else NAN
+        minus_di = 100 * (self.soma_minus / self.soma_tr) if self.soma_tr > 0 else NAN
+        soma_di = plus_di + minus_di
+        if soma_di > 0:
+            self.dx.adicionar(100 * abs(plus_di - minus_di) / soma_di)
+        else:
+            # Trecho parado: no pandas o dx é 0/0 = NaN e a média de 14 fica NaN
+            # enquanto ele estiver na janela. Recomeçar a janela dá o mesmo efeito:
+            # só volta a ter valor depois de `periodo` dx válidos
+            self.dx = JanelaRolante(self.periodo)
+
+    def valor(self):
+        return self.dx.media()
+
+
+class ADXEwmIncremental:
+    # ADX "rápido" do V11/V14: dx = 100*|Δh - Δl|/tr suavizado por ewm(span=14)
+    def __init__(self, span=14):
+        self.decaimento = 1 - 2 / (span + 1)
+        self.numerador = 0.0
+        self.denominador = 0.0
+        self.anterior = None
+
+    def atualizar(self, high, low, close):
+        if self.anterior is None:
+            self.anterior = (high, low, close)
+            return
+        h0, l0, c0 = self.anterior
+        self.anterior = (high, low, close)
+
+        tr = max(abs(high - h0), abs(low - l0), abs(close - c0))
+        dx = 100 * abs((high - h0) - (low - l0)) / tr if tr > 0 else NAN
+
+        # ewm(adjust=True): valores NaN não entram, mas os pesos antigos continuam decaindo
+        self.numerador *= self.decaimento
+        self.denominador *= self.decaimento
+        if dx == dx:
+            self.numerador += dx
+            self.denominador += 1.0
+
+    def valor(self):
+        return self.numerador / self.denominador if self.denominador else NAN
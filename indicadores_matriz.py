@@ -0,0 +1,202 @@
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Indicadores em lote para N ativos de uma vez.
+# Os candles ficam alinhados numa matriz (ativos x tempo) e cada kernel roda
+# sobre a matriz inteira numa chamada NumPy, em vez de N pipelines pandas com
+# dropna/reset_index próprios. As fórmulas e a semântica de NaN são as mesmas
+# da biblioteca `indicadores` (rolling com janela cheia, ddof=1, ewm adjust=True).
+
+
+def _ts_ms(serie):
+    # Timestamps em ms, venham como int (ccxt) ou datetime (armazém / backtests)
+    if np.issubdtype(serie.dtype, np.datetime64):
+        return serie.to_numpy().astype('datetime64[ms]').astype(np.int64)
+    return serie.to_numpy(dtype=np.int64)
+
+
+class PainelCandles:
+    # Candles alinhados por timestamp: ts (T,) e o/h/l/c/v (N, T). Buracos viram NaN.
+    def __init__(self, symbols, ts, o, h, l, c, v):
+        self.symbols = list(symbols)
+        self.ts = np.asarray(ts, dtype=np.int64)
+        self.o, self.h, self.l, self.c, self.v = (np.asarray(x, dtype=np.float64) for x in (o, h, l, c, v))
+
+    @classmethod
+    def de_frames(cls, frames):
+        # {symbol: DataFrame com colunas ts, o, h, l, c, v} -> matriz alinhada pela união dos ts
+        symbols = list(frames)
+        ts_frames = [_ts_ms(frames[s]['ts']) for s in symbols]
+        ts = np.unique(np.concatenate(ts_frames)) if symbols else np.empty(0, dtype=np.int64)
+        matrizes = {k: np.full((len(symbols), len(ts)), np.nan) for k in 'ohlcv'}
+        for i, s in enumerate(symbols):
+            pos = np.searchsorted(ts, ts_frames[i])
+            for k in 'ohlcv':
+                matrizes[k][i, pos] = frames[s][k].to_numpy(dtype=np.float64)
+        return cls(symbols, ts, *(matrizes[k] for k in 'ohlcv'))
+
+    @classmethod
+    def do_armazem(cls, armazem, symbols, timeframe='1m', inicio=None, fim=None):
+        frames = {}
+        for s in symbols:
+            dados = armazem.carregar_array(s, timeframe, inicio, fim)
+            if len(dados):
+                frames[s] = pd.DataFrame({k: np.asarray(dados[k]) for k in ('ts', 'o', 'h', 'l', 'c', 'v')})
+        return cls.de_frames(frames)
+
+    def __len__(self):
+        return len(self.symbols)
+
+
+# --- BLOCOS BÁSICOS (sempre ao longo do último eixo) ---
+
+def _alinhar(resultado, janela):
+    # Resultado de janelas completas (N, T - janela + 1) -> (N, T) com NaN no começo
+    faltam = janela - 1
+    preenchimento = np.full(resultado.shape[:-1] + (faltam,), np.nan)
+    return np.concatenate([preenchimento, resultado], axis=-1)
+
+
+def _soma_janela(x, janela):
+    # Soma deslizante somando `janela` fatias deslocadas (sem cumsum: sem erro acumulado)
+    t = x.shape[-1] - janela + 1
+    if t <= 0:
+        return np.full(x.shape, np.nan)
+    soma = x[..., 0:t].copy()
+    for k in range(1, janela):
+        soma += x[..., k:k + t]
+    return _alinhar(soma, janela)
+
+
+def diff(x):
+    d = np.full(x.shape, np.nan)
+    d[..., 1:] = x[..., 1:] - x[..., :-1]
+    return d
+
+
+def media_movel(x, janela):
+    return _soma_janela(x, janela) / janela
+
+
+def desvio_movel(x, janela):
+    # Desvio padrão amostral (ddof=1) em duas passadas, como o rolling().std() do pandas
+    t = x.shape[-1] - janela + 1
+    if t <= 0:
+        return np.full(x.shape, np.nan)
+    media = media_movel(x, janela)[..., janela - 1:]
+    quadrados = np.zeros(media.shape)
+    for k in range(janela):
+        quadrados += (x[..., k:k + t] - media) ** 2
+    return _alinhar(np.sqrt(quadrados / (janela - 1)), janela)
+
+
+def minimo_movel(x, janela):
+    if x.shape[-1] < janela:
+        return np.full(x.shape, np.nan)
+    return _alinhar(sliding_window_view(x, janela, axis=-1).min(axis=-1), janela)
+
+
+def maximo_movel(x, janela):
+    if x.shape[-1] < janela:
+        return np.full(x.shape, np.nan)
+    return _alinhar(sliding_window_view(x, janela, axis=-1).max(axis=-1), janela)
+
+
+def ewm_media(x, span):
+    # ewm(span).mean() com adjust=True: NaN não entra, mas os pesos continuam decaindo
+    decaimento = 1 - 2 / (span + 1)
+    saida = np.full(x.shape, np.nan)
+    numerador = np.zeros(x.shape[:-1])
+    denominador = np.zeros(x.shape[:-1])
+    for t in range(x.shape[-1]):
+        valido = ~np.isnan(x[..., t])
+        numerador = numerador * decaimento + np.where(valido, x[..., t], 0.0)
+        denominador = denominador * decaimento + valido
+        with np.errstate(invalid='ignore', divide='ignore'):
+            saida[..., t] = np.where(denominador > 0, numerador / denominador, np.nan)
+    return saida
+
+
+# --- KERNELS DAS ESTRATÉGIAS ---
+
+def log_ret(c):
+    r = np.full(c.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r[..., 1:] = np.log(c[..., 1:] / c[..., :-1])
+    return r
+
+
+def z_hull(c, janela, T=15):
+    r = log_ret(c)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (media_movel(r, janela) * T) / (desvio_movel(r, janela) * np.sqrt(T))
+
+
+def prob_hull(c, janela, T=15):
+    return ndtr(z_hull(c, janela, T))
+
+
+def bollinger(c, janela=20, desvios=2.0):
+    # (ma, std, upper, lower)
+    ma = media_movel(c, janela)
+    std = desvio_movel(c, janela)
+    return ma, std, ma + (std * desvios), ma - (std * desvios)
+
+
+def z_score(c, janela=20):
+    ma, std, _, _ = bollinger(c, janela)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (c - ma) / std
+
+
+def bandwidth(c, janela=20, desvios=2.0):
+    ma, _, upper, lower = bollinger(c, janela, desvios)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (upper - lower) / ma
+
+
+def true_range(h, l, c):
+    # max(|Δh|, |Δl|, |Δc|) ignorando NaN (como o max(axis=1) do pandas)
+    with np.errstate(invalid='ignore'):
+        return np.fmax(np.fmax(np.abs(diff(h)), np.abs(diff(l))), np.abs(diff(c)))
+
+
+def adx_ewm(h, l, c, span=14):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dx = 100 * np.abs(diff(h) - diff(l)) / true_range(h, l, c)
+    return ewm_media(dx, span)
+
+
+def adx_di(h, l, c, periodo=14):
+    plus_dm = np.clip(diff(h), 0, None)
+    minus_dm = np.abs(np.clip(diff(l), None, 0))
+    tr_smooth = _soma_janela(true_range(h, l, c), periodo)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        plus_di = 100 * (_soma_janela(plus_dm, periodo) / tr_smooth)
+        minus_di = 100 * (_soma_janela(minus_dm, periodo) / tr_smooth)
+        dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+    return media_movel(dx, periodo)
+
+
+def rsi(c, periodo=7):
+    delta = diff(c)
+    # where(delta > 0, 0) do pandas: NaN vira 0 nas duas séries
+    with np.errstate(invalid='ignore'):
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = -np.where(delta < 0, delta, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = media_movel(gain, periodo) / media_movel(loss, periodo)
+        valores = 100 - (100 / (1 + rs))
+    # ...mas o preenchimento antes do primeiro candle do ativo não conta
+    inicio = np.argmax(~np.isnan(c), axis=-1)
+    valores[np.arange(c.shape[-1]) < inicio[..., None] + periodo - 1] = np.nan
+    return valores
+
+
+def estocastico_k(h, l, c, periodo=14):
+    lowest_low = minimo_movel(l, periodo)
+    highest_high = maximo_movel(h, periodo)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 * ((c - lowest_low) / (highest_high - lowest_low))
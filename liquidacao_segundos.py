@@ -0,0 +1,62 @@
+import numpy as np
+from collections import namedtuple
+from motor_simulacao import ResultadoSimulacao, HORIZONTE
+
+# Liquidação dos backtests no segundo exato, com klines de 1s do armazém.
+# O 1m decide pelo close do 15º candle; o contrato real vence num instante e o
+# bot ao vivo entra em segundos quaisquer. Aqui cada trade escolhido pelo motor
+# (os sinais continuam no 1m) ganha preço de entrada e de vencimento pelo último
+# candle de 1s fechado até o instante ("as-of").
+#
+# Um dia de 1s são ~86.400 linhas por ativo, um ano ~31,5 milhões (~1,5 GB): o
+# arquivo fica em memmap e todos os trades são buscados de uma vez com
+# np.searchsorted sobre o campo ts do memmap (sem cópia: a bisseção só lê as
+# páginas que visita). Nada de lookup linha a linha no pandas.
+
+MS_SEGUNDO = 1_000
+TOLERANCIA_MS = 5_000 # candle de 1s mais antigo aceito antes do instante (buracos no 1s)
+
+Liquidacao = namedtuple('Liquidacao', ['preco_entrada', 'preco_saida', 'diff', 'ganhou', 'valido'])
+
+
+def asof(ts, instantes):
+    # Índice do último ts <= instante para cada instante (-1 se nenhum)
+    return np.searchsorted(ts, np.asarray(instantes, dtype=np.int64), side='right') - 1
+
+
+def precos_asof(candles, instantes, tolerancia=TOLERANCIA_MS):
+    # (preço, válido): close do último candle de 1s que fechou até o instante.
+    # O candle de ts s cobre [s, s + 1s): o close dele é o preço no instante s + 1s
+    instantes = np.asarray(instantes, dtype=np.int64)
+    if len(candles) == 0:
+        return np.full(len(instantes), np.nan), np.zeros(len(instantes), dtype=bool)
+    idx = asof(candles['ts'], instantes - MS_SEGUNDO)
+    pos = np.maximum(idx, 0)
+    fechamento = np.asarray(candles['ts'][pos]) + MS_SEGUNDO
+    valido = (idx >= 0) & (instantes - fechamento <= tolerancia)
+    return np.where(valido, np.asarray(candles['c'][pos]), np.nan), valido
+
+
+def liquidar(candles, entradas_ms, eh_call, horizonte_ms, tolerancia=TOLERANCIA_MS):
+    # Entrada no instante `entradas_ms`, vencimento `horizonte_ms` depois.
+    # Empate perde, como no 1m e no resultado_binario do bot
+    entradas_ms = np.asarray(entradas_ms, dtype=np.int64)
+    preco_entrada, ok_entrada = precos_asof(candles, entradas_ms, tolerancia)
+    preco_saida, ok_saida = precos_asof(candles, entradas_ms + horizonte_ms, tolerancia)
+    diff = preco_saida - preco_entrada
+    ganhou = np.where(eh_call, diff > 0, diff < 0)
+    return Liquidacao(preco_entrada, preco_saida, diff, ganhou, ok_entrada & ok_saida)
+
+
+def reliquidar(res, ts_1m, candles, horizonte=HORIZONTE, atraso_s=0.0, tolerancia=TOLERANCIA_MS):
+    # Resultado do motor (1m) -> mesmo resultado liquidado no 1s.
+    # `ts_1m`: abertura (ms) de cada linha do frame que gerou os sinais. A entrada é
+    # no fechamento do candle do sinal + `atraso_s` (escalar ou um por trade;
+    # negativo = antes do fechamento, como o bot decidindo no candle em formação).
+    # Trades sem 1s cobrindo entrada e vencimento saem. Devolve (res, liquidação).
+    ts_1m = np.asarray(ts_1m, dtype=np.int64)
+    entradas = ts_1m[res.indices] + 60_000 + np.round(np.asarray(atraso_s) * MS_SEGUNDO).astype(np.int64)
+    liq = liquidar(candles, entradas, res.eh_call, horizonte * 60_000, tolerancia)
+    ok = liq.valido
+    liq = Liquidacao(*(campo[ok] for campo in liq))
+    return ResultadoSimulacao(res.indices[ok], res.eh_call[ok], liq.diff, liq.ganhou, res.sinais), liq
@@ -1,48 +1,195 @@
-import ccxt
-import pandas as pd
-import numpy as np
-from scipy.stats import norm
 import time
+T_INICIO = time.perf_counter() # partida do processo: mede o tempo até o bot ficar pronto
 import os
+import sched
+import json
+import signal
+import atexit
+import asyncio
 from datetime import datetime, timedelta
 from colorama import Fore, Style, init
+from indicadores_incrementais import EstadoHull
+from livro_posicoes import LivroPosicoes, resultado_binario
+from diario_trades import DiarioTrades
 
 init(autoreset=True)
 
+WS_BINANCE = "wss://stream.binance.com:9443/ws"
+
+class Relogio:
+    # Relógio de parede do bot (agora, segundos desde a época e espera).
+    # O replay (replay_bot.py) injeta um relógio virtual que só anda quando dorme.
+    def agora(self):
+        return datetime.now()
+
+    def segundos(self):
+        return time.time()
+
+    def dormir(self, segundos):
+        time.sleep(segundos)
+
 class EthSentinelV21:
-    def __init__(self):
-        self.exchange = ccxt.binance()
+    def __init__(self, relogio=None, diario=None):
+        self._exchange = None # ccxt carrega sob demanda (ver `exchange`)
         self.symbol = 'ETH/USDT'
+        self.relogio = relogio or Relogio()
+        
+        # Diário de trades (SQLite/WAL, gravação em lote numa thread própria).
+        # O CSV antigo é importado na partida; reimportar não duplica nada.
         self.file_log = "historico_trades.csv"
-        self.active_trade = None # Controla se estamos posicionados
+        if diario is not None:
+            self.diario = diario # diário próprio (replay): nada de CSV antigo
+        else:
+            self.diario = DiarioTrades() # caminho em DIARIO_TRADES
+            if os.path.exists(self.file_log):
+                self.diario.importar_csv(self.file_log)
         
-        # Cria CSV se não existir
-        if not os.path.exists(self.file_log):
-            with open(self.file_log, 'w') as f:
-                f.write("Data,Tipo,Preco_Entrada,Prob_Tatico,Prob_Estrategico,Status\n")
+        # Livro de posições: várias binárias abertas, liquidadas pelo vencimento.
+        # MAX_POSICOES=1 é o comportamento original (um trade por vez).
+        exposicao_max = os.getenv('EXPOSICAO_MAX')
+        self.livro = LivroPosicoes(max_posicoes=int(os.getenv('MAX_POSICOES', '1')) or None,
+                                   exposicao_max=float(exposicao_max) if exposicao_max else None)
+        self.candle_ultima_entrada = None # no máximo uma entrada por candle
+        
+        # Estado incremental (janelas 30m/60m de log-retornos)
+        # Só candles fechados entram no estado; o candle em formação é "espiado"
+        self.estado = EstadoHull(janelas=(30, 60), horizonte=15)
+        self.ultimo_fechado = None # ts do último candle fechado já incorporado
+        self.warmup = 100 # candles buscados na partida (ou após um buraco grande)
+        
+        # Modo stream: por padrão só candles fechados disparam entradas.
+        # Com `parciais=True` as atualizações do candle em formação também avaliam sinal.
+        self.parciais = os.getenv('STREAM_PARCIAIS', '0') == '1'
+        self.intervalo_rest = 30 # Polling REST (fallback do stream)
+        
+        # Modo rest agendado: acorda logo após cada fechamento de candle 1m e
+        # liquida cada posição num timer próprio, no vencimento exato.
+        self.margem_fechamento = 2.0 # s após o fechamento para a exchange publicar o candle
+        self.tentativas_candle = 5
+        self.file_latencia = os.getenv('LOG_LATENCIA', 'logs/latencias.csv')
+        
+        # Snapshot do estado (posições, janelas do Hull, último candle) para reinício a quente.
+        # Caminho vazio desliga o snapshot (e LOG_LATENCIA vazio, o log de latências)
+        self.file_estado = os.getenv('ARQUIVO_ESTADO', 'estado/estado_bot.json')
+
+    @property
+    def exchange(self):
+        # Cliente compartilhado do processo; o ccxt (import de ~0.5s) só carrega no primeiro uso
+        if self._exchange is None:
+            from cliente_exchange import obter_cliente
+            self._exchange = obter_cliente()
+        return self._exchange
 
-    def obter_probabilidades_reais(self):
+    @exchange.setter
+    def exchange(self, exchange):
+        self._exchange = exchange
+
+    # --- SNAPSHOT / REINÍCIO A QUENTE ---
+
+    def salvar_estado(self):
+        # Grava o snapshot de forma atômica (arquivo temporário + rename)
+        if not self.file_estado:
+            return
+        dados = {
+            'symbol': self.symbol,
+            'ultimo_fechado': self.ultimo_fechado,
+            'candle_ultima_entrada': self.candle_ultima_entrada,
+            'estado': self.estado.para_dict(),
+            'posicoes': [{**p, 'entrada': p['entrada'].isoformat(), 'saida': p['saida'].isoformat()}
+                         for p in self.livro.abertas()],
+        }
+        pasta = os.path.dirname(self.file_estado)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        tmp = self.file_estado + '.tmp'
         try:
-            # Precisamos de pelo menos 60 candles para o cálculo estratégico
-            ohlcv = self.exchange.fetch_ohlcv(self.symbol, timeframe='1m', limit=100)
-            df = pd.DataFrame(ohlcv, columns=['ts', 'o', 'h', 'l', 'c', 'v'])
+            # json.dumps de uma vez (encoder em C); json.dump escreve pedaço a pedaço
+            with open(tmp, 'w') as f:
+                f.write(json.dumps(dados))
+            os.replace(tmp, self.file_estado)
+        except OSError as e:
+            print(f"{Fore.RED}Erro ao salvar estado: {e}")
+
+    def carregar_estado(self):
+        # Restaura o snapshot, se houver. Devolve True quando o estado foi carregado.
+        if not self.file_estado or not os.path.exists(self.file_estado):
+            return False
+        try:
+            with open(self.file_estado) as f:
+                dados = json.load(f)
+            if dados['symbol'] != self.symbol:
+                return False
+            posicoes = [{**p, 'entrada': datetime.fromisoformat(p['entrada']), 'saida': datetime.fromisoformat(p['saida'])}
+                        for p in dados['posicoes']]
+            estado = EstadoHull.de_dict(dados['estado'])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"{Fore.RED}Snapshot ignorado ({e!r}): partida a frio")
+            return False
+        
+        self.livro.restaurar(posicoes)
+        self.estado = estado
+        self.ultimo_fechado = dados['ultimo_fechado']
+        self.candle_ultima_entrada = dados['candle_ultima_entrada']
+        return True
+
+    def retomar(self):
+        # Partida: snapshot -> liquida o que venceu com o bot fora -> busca só os candles que faltam
+        com_snapshot = self.carregar_estado()
+        antes = self.ultimo_fechado
+        
+        for posicao in self.livro.abertas():
+            if posicao['saida'] <= self.relogio.agora():
+                self.liquidar_no_vencimento(posicao)
+        self.obter_probabilidades_reais()
+        
+        if antes is not None and self.ultimo_fechado is not None and self.ultimo_fechado - antes <= self.warmup * 60_000:
+            origem = f"snapshot, {(self.ultimo_fechado - antes) // 60_000} candle(s) recuperado(s)"
+        else:
+            origem = "partida a frio"
+        taxa = self.diario.taxa_movel(100)
+        if taxa == taxa:
+            print(f"📒 Diário: {len(self.diario)} trade(s) | acerto dos últimos 100: {taxa:.1%}")
+        print(f"{Fore.CYAN}⚡ Pronto em {time.perf_counter() - T_INICIO:.2f}s ({origem}, {len(self.livro)} posição(ões) aberta(s))")
+        return com_snapshot
+
+    def obter_probabilidades_reais(self, parcial=True):
+        # (p30, p60, preço). Com `parcial=False` ignora o candle em formação:
+        # probabilidades e preço do último candle fechado.
+        try:
+            agora_ms = self.exchange.milliseconds()
             
-            # Cálculo de Hull (Log Returns)
-            log_ret = np.log(df['c'] / df['c'].shift(1))
+            # Partida (ou buraco maior que o warm-up): precisamos de pelo menos 60 candles
+            if self.ultimo_fechado is None or agora_ms - self.ultimo_fechado > self.warmup * 60_000:
+                self.estado = EstadoHull(janelas=(30, 60), horizonte=15)
+                self.ultimo_fechado = None
+                ohlcv = self.exchange.fetch_ohlcv(self.symbol, timeframe='1m', limit=self.warmup)
+            else:
+                # Só o que chegou depois do último candle fechado
+                ohlcv = self.exchange.fetch_ohlcv(self.symbol, timeframe='1m', since=self.ultimo_fechado + 60_000)
             
-            # Horizonte Tático (30m)
-            mu_30 = log_ret.rolling(window=30).mean().iloc[-1]
-            sigma_30 = log_ret.rolling(window=30).std().iloc[-1]
-            z_30 = (mu_30 * 15) / (sigma_30 * np.sqrt(15))
-            prob_30 = norm.cdf(z_30)
+            if not ohlcv:
+                return None, None, None
             
-            # Horizonte Estratégico (60m)
-            mu_60 = log_ret.rolling(window=60).mean().iloc[-1]
-            sigma_60 = log_ret.rolling(window=60).std().iloc[-1]
-            z_60 = (mu_60 * 15) / (sigma_60 * np.sqrt(15))
-            prob_60 = norm.cdf(z_60)
+            # Candles já fechados entram no estado em O(1) cada
+            anterior = self.ultimo_fechado
+            for candle in ohlcv:
+                if candle[0] + 60_000 > agora_ms:
+                    break
+                if self.ultimo_fechado is None or candle[0] > self.ultimo_fechado:
+                    self.estado.atualizar(candle[4])
+                    self.ultimo_fechado = candle[0]
+            if self.ultimo_fechado != anterior:
+                self.salvar_estado()
             
-            preco_atual = df['c'].iloc[-1]
+            # Cálculo de Hull (Log Returns) incluindo o candle em formação
+            # Horizonte Tático (30m) e Estratégico (60m)
+            if parcial and ohlcv[-1][0] > self.ultimo_fechado:
+                preco_atual = ohlcv[-1][4]
+                probs = self.estado.probabilidades(preco_parcial=preco_atual)
+            else:
+                preco_atual = self.estado.ultimo_close
+                probs = self.estado.probabilidades()
+            prob_30, prob_60 = probs[30], probs[60]
             
             return prob_30, prob_60, preco_atual
             
@@ -50,98 +197,294 @@ class EthSentinelV21:
             print(f"{Fore.RED}Erro na API/Cálculo: {e}")
             return None, None, None
 
-    def gerenciar_trade_ativo(self, preco_atual):
-        if self.active_trade:
-            agora = datetime.now()
-            tempo_restante = (self.active_trade['saida'] - agora).total_seconds()
+    def liquidar(self, posicao, preco_saida):
+        resultado, lucro = resultado_binario(posicao['tipo'], posicao['preco'], preco_saida, posicao['stake'])
+        
+        print(f"\n{Fore.MAGENTA}🏁 TRADE FINALIZADO: {resultado} (PnL: {lucro})")
+        
+        # Salva no diário (só enfileira: o disco fica com a thread escritora)
+        self.diario.registrar({**posicao, 'preco_saida': preco_saida, 'status': resultado, 'pnl': lucro})
+
+    def gerenciar_posicoes(self, preco_atual, agora=None):
+        # Liquida, em ordem de vencimento, todas as posições vencidas até `agora`
+        agora = agora or self.relogio.agora()
+        vencidas = self.livro.vencidas(agora)
+        for posicao in vencidas:
+            self.liquidar(posicao, preco_atual)
+        if vencidas:
+            # Trade no disco antes do snapshot sem a posição: um SIGTERM entre os
+            # dois não pode sumir com ele do diário e do snapshot ao mesmo tempo
+            self.diario.flush()
+            self.salvar_estado()
+        
+        if self.livro:
+            # Status de espera (próximo vencimento)
+            tempo_restante = max((self.livro.proximo_vencimento() - agora).total_seconds(), 0)
+            mins = int(tempo_restante // 60)
+            secs = int(tempo_restante % 60)
+            print(f"\r🔒 {len(self.livro)} trade(s) em andamento (exposição {self.livro.exposicao:.0f})... "
+                  f"Próximo vence em {mins:02d}:{secs:02d}", end="")
+
+    def processar_tick(self, p30, p60, preco, momento=None):
+        # `momento`: horário de referência da decisão (fechamento do candle, se conhecido).
+        # Devolve a posição aberta, se houver entrada.
+        
+        # 1. Liquida o que venceu e acompanha as posições abertas
+        self.gerenciar_posicoes(preco, momento)
+        
+        # 2. Procura nova entrada (se houver vaga no livro e ainda não entrou neste candle)
+        if not self.livro.pode_abrir() or (self.candle_ultima_entrada is not None and self.candle_ultima_entrada == self.ultimo_fechado):
+            return None
+        sinal = None
+        
+        # --- CÉREBRO V20 ---
+        # CALL: Tático Forte (>60%) + Estratégico Favorável (>50%)
+        if (p30 > 0.60) and (p60 > 0.50):
+            sinal = "CALL"
+            cor = Fore.GREEN
+        
+        # PUT: Tático Fraco (<40%) + Estratégico Favorável (<50%)
+        elif (p30 < 0.40) and (p60 < 0.50):
+            sinal = "PUT"
+            cor = Fore.RED
+        
+        # Dashboard em Tempo Real
+        print(f"\rETH: {preco:.2f} | Tático(30m): {p30:.1%}" + 
+              f" | Estratégico(60m): {p60:.1%} | Sinal: {sinal if sinal else 'NEUTRO'}", end="")
+        
+        # Disparo
+        if sinal:
+            print(f"\n{cor}⚡ SINAL CONFIRMADO: {sinal} @ {preco}")
+            print(f"   Motivo: Alinhamento Estatístico (30m={p30:.2f}, 60m={p60:.2f})")
             
-            if tempo_restante <= 0:
-                # Trade acabou
-                resultado = "LOSS"
-                lucro = -1.0
-                
-                if self.active_trade['tipo'] == "CALL":
-                    if preco_atual > self.active_trade['preco']:
-                        resultado = "WIN"
-                        lucro = 0.85
-                elif self.active_trade['tipo'] == "PUT":
-                    if preco_atual < self.active_trade['preco']:
-                        resultado = "WIN"
-                        lucro = 0.85
-                
-                print(f"\n{Fore.MAGENTA}🏁 TRADE FINALIZADO: {resultado} (PnL: {lucro})")
-                
-                # Salva no log
-                with open(self.file_log, 'a') as f:
-                    d = self.active_trade['entrada'].strftime("%Y-%m-%d %H:%M:%S")
-                    f.write(f"{d},{self.active_trade['tipo']},{self.active_trade['preco']},{self.active_trade['p30']:.2f},{self.active_trade['p60']:.2f},{resultado}\n")
-                
-                self.active_trade = None # Libera para novo trade
-            else:
-                # Status de espera
-                mins = int(tempo_restante // 60)
-                secs = int(tempo_restante % 60)
-                print(f"\r🔒 Trade em andamento ({self.active_trade['tipo']})... Faltam {mins:02d}:{secs:02d}", end="")
+            entrada = momento or self.relogio.agora()
+            posicao = {
+                'entrada': entrada,
+                'saida': entrada + timedelta(minutes=15),
+                'tipo': sinal,
+                'preco': preco,
+                'p30': p30,
+                'p60': p60
+            }
+            self.livro.abrir(posicao)
+            self.candle_ultima_entrada = self.ultimo_fechado
+            self.salvar_estado()
+            return posicao
+        return None
 
-    def executar(self):
+    def tick_rest(self):
+        # Um ciclo de polling REST: dados frescos -> cérebro
+        p30, p60, preco = self.obter_probabilidades_reais()
+        if p30 is not None:
+            self.processar_tick(p30, p60, preco)
+
+    def processar_kline(self, ts, close, fechado):
+        # Mensagem do stream de klines 1m
+        if fechado:
+            if self.ultimo_fechado is not None and ts < self.ultimo_fechado:
+                return # Mensagem atrasada de um candle já processado
+            if self.ultimo_fechado is None or ts > self.ultimo_fechado:
+                fechamento = self.horario_candle(ts + 60_000)
+                if self.livro and self.estado.ultimo_close is not None and self.livro.proximo_vencimento() < fechamento:
+                    # Entrada no meio do minuto (parciais) vence dentro deste candle: liquida
+                    # no último close até o vencimento, o do candle anterior (como liquidar_no_vencimento)
+                    self.gerenciar_posicoes(self.estado.ultimo_close, fechamento - timedelta(microseconds=1))
+                self.estado.atualizar(close)
+                self.ultimo_fechado = ts
+                self.salvar_estado()
+            probs = self.estado.probabilidades()
+            momento = self.horario_candle(ts + 60_000) # decisão no fechamento do candle
+        elif self.parciais:
+            probs = self.estado.probabilidades(preco_parcial=close)
+            momento = None
+        else:
+            # Atualização parcial: só serve para acompanhar as posições abertas.
+            # Ela só prova que o candle `ts` abriu: nada que vence depois disso é liquidado.
+            if self.livro:
+                self.gerenciar_posicoes(close, self.horario_candle(ts))
+            return
+        
+        self.processar_tick(probs[30], probs[60], close, momento)
+
+    async def consumir_stream(self, url):
+        import aiohttp
+        
+        async with aiohttp.ClientSession() as sessao:
+            async with sessao.ws_connect(url, heartbeat=20) as ws:
+                print(f"\n{Fore.CYAN}📡 Stream conectado: {url}")
+                while True:
+                    msg = await ws.receive(timeout=90)
+                    if msg.type != aiohttp.WSMsgType.TEXT:
+                        raise ConnectionError(f"Stream encerrado ({msg.type.name})")
+                    
+                    k = json.loads(msg.data)['k']
+                    ts, close, fechado = k['t'], float(k['c']), k['x']
+                    
+                    # Buraco no stream (candle fechado pulado): recupera via REST
+                    if fechado and self.ultimo_fechado is not None and ts > self.ultimo_fechado + 60_000:
+                        await asyncio.to_thread(self.obter_probabilidades_reais)
+                    
+                    self.processar_kline(ts, close, fechado)
+
+    async def executar_stream(self, url=None):
+        url = url or f"{WS_BINANCE}/{self.symbol.replace('/', '').lower()}@kline_1m"
+        
+        while True:
+            try:
+                # Warm-up via REST (60+ candles) antes de ouvir o stream
+                if self.ultimo_fechado is None:
+                    await asyncio.to_thread(self.obter_probabilidades_reais)
+                await self.consumir_stream(url)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"\n{Fore.RED}Stream indisponível: {e!r}")
+            
+            # Fallback: um tick REST e nova tentativa de conexão
+            print(f"{Fore.YELLOW}↩️  Usando REST até reconectar...")
+            try:
+                await asyncio.to_thread(self.tick_rest)
+            except Exception as e:
+                print(f"\nErro Crítico: {e}")
+                self.diario.flush()
+            await asyncio.sleep(self.intervalo_rest)
+
+    def cabecalho(self):
         print(f"{Fore.YELLOW}🚀 ETH SENTINEL V21 INICIADO")
         print(f"Estratégia: Hull Tide Alignment (30m + 60m)")
         print(f"Alvo: Prob Tática > 60% e Estratégica > 50%")
         print("-" * 50)
+
+    # --- MODO REST AGENDADO (alinhado ao fechamento dos candles) ---
+
+    @staticmethod
+    def horario_candle(ms):
+        return datetime.fromtimestamp(ms / 1000)
+
+    def registrar_latencia(self, evento, referencia, latencia):
+        if not self.file_latencia:
+            return
+        pasta = os.path.dirname(self.file_latencia)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        novo = not os.path.exists(self.file_latencia)
+        with open(self.file_latencia, 'a') as f:
+            if novo:
+                f.write("Data,Evento,Referencia,Latencia_s\n")
+            f.write(f"{self.relogio.agora():%Y-%m-%d %H:%M:%S},{evento},{referencia:%Y-%m-%d %H:%M:%S},{latencia:.3f}\n")
+
+    def agendar_fechamento(self, agenda):
+        # Próximo fechamento de candle 1m (+ margem para o candle aparecer na API)
+        fechamento = (self.relogio.segundos() // 60 + 1) * 60
+        agenda.enterabs(fechamento + self.margem_fechamento, 1, self.evento_fechamento, (agenda, fechamento, 0))
+
+    def evento_fechamento(self, agenda, fechamento, tentativa):
+        if tentativa == 0:
+            self.agendar_fechamento(agenda)
+        
+        p30, p60, preco = self.obter_probabilidades_reais(parcial=False)
+        fechado_ms = int(fechamento * 1000) - 60_000
+        if p30 is None or self.ultimo_fechado is None or self.ultimo_fechado < fechado_ms:
+            # Candle recém-fechado ainda não publicado: tenta de novo em instantes
+            if tentativa + 1 < self.tentativas_candle:
+                agenda.enter(self.margem_fechamento, 1, self.evento_fechamento, (agenda, fechamento, tentativa + 1))
+            return
+        
+        momento = self.horario_candle(fechamento * 1000)
+        posicao = self.processar_tick(p30, p60, preco, momento)
+        latencia = self.relogio.segundos() - fechamento
+        self.registrar_latencia('decisao', momento, latencia)
+        
+        if posicao is not None:
+            self.agendar_vencimento(agenda, posicao)
+            print(f"   ⏱️  Decisão {latencia:.2f}s após o fechamento | vence {posicao['saida']:%H:%M:%S}")
+
+    def agendar_vencimento(self, agenda, posicao):
+        vencimento = posicao['saida'].timestamp()
+        agenda.enterabs(vencimento + self.margem_fechamento, 0, self.evento_vencimento, (agenda, posicao, 0))
+
+    def liquidar_no_vencimento(self, posicao):
+        # Liquida contra o close do último candle fechado até o vencimento: o que fecha
+        # no vencimento ou, com entrada no meio do minuto (STREAM_PARCIAIS), o anterior
+        # ao que o contém (o close deste ainda não existe no vencimento).
+        # False se esse candle ainda não está disponível.
+        saida_ms = int(posicao['saida'].timestamp() * 1000)
+        alvo_ms = saida_ms // 60_000 * 60_000 - 60_000
+        try:
+            ohlcv = self.exchange.fetch_ohlcv(self.symbol, timeframe='1m', since=alvo_ms, limit=1)
+        except Exception as e:
+            print(f"{Fore.RED}Erro na API (vencimento): {e}")
+            return False
+        if not ohlcv or ohlcv[0][0] != alvo_ms:
+            return False
+        self.gerenciar_posicoes(ohlcv[0][4], posicao['saida'])
+        return True
+
+    def evento_vencimento(self, agenda, posicao, tentativa):
+        if not any(aberta is posicao for aberta in self.livro.abertas()):
+            return # já liquidada por outro caminho
+        if not self.liquidar_no_vencimento(posicao):
+            if tentativa + 1 < self.tentativas_candle:
+                agenda.enter(self.margem_fechamento, 0, self.evento_vencimento, (agenda, posicao, tentativa + 1))
+            return # sem o candle: a próxima decisão liquida com o preço disponível
+        
+        latencia = self.relogio.segundos() - posicao['saida'].timestamp()
+        self.registrar_latencia('liquidacao', posicao['saida'], latencia)
+        print(f"   ⏱️  Liquidação {latencia:.2f}s após o vencimento")
+
+    def criar_agenda(self):
+        # Fechamentos e vencimentos no relógio do bot: com o relógio virtual do
+        # replay a espera entre eventos é só um salto no tempo
+        agenda = sched.scheduler(self.relogio.segundos, self.relogio.dormir)
+        for posicao in self.livro.abertas():
+            self.agendar_vencimento(agenda, posicao)
+        self.agendar_fechamento(agenda)
+        return agenda
+
+    def executar(self):
+        self.cabecalho()
+        
+        # Depois do retomar() tudo acontece nos eventos agendados
+        agenda = self.criar_agenda()
         
         while True:
             try:
-                # 1. Pega dados frescos
-                p30, p60, preco = self.obter_probabilidades_reais()
-                
-                if p30 is not None:
-                    # 2. Gerencia trade aberto (se houver)
-                    if self.active_trade:
-                        self.gerenciar_trade_ativo(preco)
-                    
-                    # 3. Procura nova entrada (se estiver livre)
-                    else:
-                        sinal = None
-                        
-                        # --- CÉREBRO V20 ---
-                        # CALL: Tático Forte (>60%) + Estratégico Favorável (>50%)
-                        if (p30 > 0.60) and (p60 > 0.50):
-                            sinal = "CALL"
-                            cor = Fore.GREEN
-                        
-                        # PUT: Tático Fraco (<40%) + Estratégico Favorável (<50%)
-                        elif (p30 < 0.40) and (p60 < 0.50):
-                            sinal = "PUT"
-                            cor = Fore.RED
-                        
-                        # Dashboard em Tempo Real
-                        print(f"\rETH: {preco:.2f} | Tático(30m): {p30:.1%}" + 
-                              f" | Estratégico(60m): {p60:.1%} | Sinal: {sinal if sinal else 'NEUTRO'}", end="")
-                        
-                        # Disparo
-                        if sinal:
-                            print(f"\n{cor}⚡ SINAL CONFIRMADO: {sinal} @ {preco}")
-                            print(f"   Motivo: Alinhamento Estatístico (30m={p30:.2f}, 60m={p60:.2f})")
-                            
-                            self.active_trade = {
-                                'entrada': datetime.now(),
-                                'saida': datetime.now() + timedelta(minutes=15),
-                                'tipo': sinal,
-                                'preco': preco,
-                                'p30': p30,
-                                'p60': p60
-                            }
-                
-                # Aguarda 30s antes do próximo tick (reduz flood na API)
-                time.sleep(30)
-                
+                agenda.run()
             except KeyboardInterrupt:
                 print("\n🛑 Bot parado pelo usuário.")
+                self.diario.fechar()
                 break
             except Exception as e:
                 print(f"\nErro Crítico: {e}")
-                time.sleep(10)
+                self.diario.flush()
+                self.relogio.dormir(10)
+                if agenda.empty():
+                    self.agendar_fechamento(agenda)
+
+    def executar_async(self, url=None):
+        self.cabecalho()
+        try:
+            asyncio.run(self.executar_stream(url))
+        except KeyboardInterrupt:
+            print("\n🛑 Bot parado pelo usuário.")
+            self.diario.fechar()
+
+def encerrar_com_sigterm(bot):
+    # `docker stop` manda SIGTERM: vira KeyboardInterrupt e cai no mesmo encerramento
+    # do Ctrl+C (diario.fechar). O atexit cobre qualquer outra saída do interpretador
+    def parar(signum, frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, parar)
+    atexit.register(bot.diario.fechar)
 
 # Start
-bot = EthSentinelV21()
-bot.executar()
\ No newline at end of file
+if __name__ == "__main__":
+    bot = EthSentinelV21()
+    encerrar_com_sigterm(bot)
+    bot.retomar()
+    
+    # MODO_FEED=stream (websocket, padrão) ou rest (REST agendado no fechamento de cada candle)
+    if os.getenv('MODO_FEED', 'stream') == 'stream':
+        bot.executar_async(os.getenv('STREAM_URL') or None)
+    else:
+        bot.executar()
\ No newline at end of file
@@ -0,0 +1,71 @@
+import heapq
+import itertools
+
+# Livro de posições binárias abertas ao mesmo tempo.
+# Cada posição fica num heap ordenado pelo vencimento: o bot só olha o topo
+# para saber se alguma venceu, e liquida todas as vencidas em ordem, cada uma
+# com o preço do seu próprio vencimento. O limite de exposição é dado pelo
+# número de posições e, opcionalmente, pela soma dos stakes abertos.
+
+PAYOUT = 0.85 # Lucro por 1.0 arriscado no Polymarket
+
+
+def resultado_binario(tipo, preco_entrada, preco_saida, stake=1.0, payout=PAYOUT):
+    # (resultado, pnl) de uma opção binária CALL/PUT; empate perde, como nos backtests
+    ganhou = preco_saida > preco_entrada if tipo == "CALL" else preco_saida < preco_entrada
+    return ("WIN", stake * payout) if ganhou else ("LOSS", -stake)
+
+
+class LivroPosicoes:
+    def __init__(self, max_posicoes=1, exposicao_max=None):
+        self.max_posicoes = max_posicoes # None = sem limite de quantidade
+        self.exposicao_max = exposicao_max # None = sem limite de stake somado
+        self.exposicao = 0.0
+        self._heap = []
+        self._seq = itertools.count() # desempate estável para vencimentos iguais
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __bool__(self):
+        return bool(self._heap)
+
+    def pode_abrir(self, stake=1.0):
+        if self.max_posicoes is not None and len(self._heap) >= self.max_posicoes:
+            return False
+        if self.exposicao_max is not None and self.exposicao + stake > self.exposicao_max + 1e-12:
+            return False
+        return True
+
+    def abrir(self, posicao):
+        # `posicao` é um dict com pelo menos 'saida' (vencimento) e, opcionalmente, 'stake'
+        stake = posicao.setdefault('stake', 1.0)
+        if not self.pode_abrir(stake):
+            return False
+        heapq.heappush(self._heap, (posicao['saida'], next(self._seq), posicao))
+        self.exposicao += stake
+        return True
+
+    def proximo_vencimento(self):
+        return self._heap[0][0] if self._heap else None
+
+    def vencidas(self, agora):
+        # Remove e devolve, em ordem de vencimento, as posições com saida <= agora
+        saida = []
+        while self._heap and self._heap[0][0] <= agora:
+            _, _, posicao = heapq.heappop(self._heap)
+            self.exposicao -= posicao['stake']
+            saida.append(posicao)
+        if not self._heap:
+            self.exposicao = 0.0 # zera o resíduo de ponto flutuante
+        return saida
+
+    def restaurar(self, posicoes):
+        # Recoloca posições de um snapshot (já estavam abertas: não passam pelo limite)
+        for posicao in posicoes:
+            posicao.setdefault('stake', 1.0)
+            heapq.heappush(self._heap, (posicao['saida'], next(self._seq), posicao))
+            self.exposicao += posicao['stake']
+
+    def abertas(self):
+        return [posicao for _, _, posicao in sorted(self._heap, key=lambda item: item[:2])]
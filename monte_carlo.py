@@ -0,0 +1,139 @@
+import numpy as np
+from colorama import Fore, Style
+
+# Bootstrap / Monte Carlo dos resultados de um backtest.
+# Uma taxa de acerto de poucas dezenas de trades não diz quase nada; aqui cada
+# relatório ganha intervalos de confiança para taxa, Kelly e drawdown.
+#
+# Como cada trade é binário (WIN/LOSS), reamostrar o array de resultados com
+# reposição é o mesmo que sortear Bernoulli(W) com o W observado:
+#  - taxa e Kelly: o nº de wins de cada amostra é Binomial(n, W), 100k amostras
+#    num único rng.binomial (Kelly é monótono em W, então o IC vem direto);
+#  - drawdown e banca: caminhos inteiros, sorteados em lotes (amostras x trades).
+#    PnL com stake fixo e log da banca são ambos afins no nº acumulado de wins,
+#    então um cumsum por lote serve aos dois. O total de elementos é limitado
+#    para o relatório sair em menos de 1s: com muitos trades, menos caminhos e,
+#    abaixo de MIN_CAMINHOS, caminhos em blocos de `passo` trades (nº de wins do
+#    bloco ~ Binomial(passo, W), drawdown medido nas bordas dos blocos).
+
+PAYOUT = 0.85 # R: lucro por 1.0 arriscado no Polymarket
+AMOSTRAS = 100_000
+MIN_CAMINHOS = 1_000
+MAX_ELEMENTOS = 2**24 # total (caminhos x trades) simulado por relatório
+MAX_LOTE = 2**22 # elementos por lote (~16 MB em float32)
+MAX_PONTOS = 2**11 # pontos por caminho em blocos (um sorteio binomial custa ~10x um de Bernoulli)
+
+
+def kelly(W, R=PAYOUT):
+    return W - ((1 - W) / R)
+
+
+def _quantis(x, nivel):
+    a = (1 - nivel) / 2
+    return np.quantile(x, [a, 0.5, 1 - a])
+
+
+def caminhos(W, n, amostras, R=PAYOUT, fracao=0.0, rng=None, passo=1):
+    # Por amostra: (drawdown máx. em unidades com stake fixo, drawdown máx. da banca
+    # apostando `fracao` dela por trade, log da banca final em múltiplos da inicial).
+    # `passo` > 1: cada ponto do caminho é um bloco de `passo` trades (o último, o resto)
+    rng = rng if rng is not None else np.random.default_rng()
+    dd_unidades = np.empty(amostras, dtype=np.float32)
+    dd_banca = np.empty(amostras, dtype=np.float32)
+    log_final = np.empty(amostras, dtype=np.float64)
+
+    # pnl_k = (R + 1) * wins_k - k ; log_banca_k = (lg - lp) * wins_k + lp * k
+    tamanhos = np.full(-(-n // passo), passo, dtype=np.int64)
+    tamanhos[-1] = n - passo * (len(tamanhos) - 1)
+    k = np.cumsum(tamanhos).astype(np.float32) # trades até o fim de cada ponto
+    pontos = len(k)
+    lg = np.log1p(fracao * R)
+    lp = np.log1p(-fracao) if fracao < 1 else -np.inf
+    base_banca = np.float32(lp) * k
+
+    lote = max(1, MAX_LOTE // pontos)
+    for inicio in range(0, amostras, lote):
+        b = min(lote, amostras - inicio)
+        if passo == 1:
+            sorteio = rng.random((b, n), dtype=np.float32) < W
+        else:
+            sorteio = rng.binomial(tamanhos, W, (b, pontos))
+        wins = np.cumsum(sorteio, axis=1, dtype=np.float32)
+
+        pnl = np.float32(R + 1) * wins - k
+        topo = np.maximum(np.maximum.accumulate(pnl, axis=1), 0) # topo inicial = 0
+        dd_unidades[inicio:inicio + b] = (topo - pnl).max(axis=1)
+
+        log_banca = np.float32(lg - lp) * wins + base_banca if fracao > 0 else np.zeros_like(pnl)
+        topo = np.maximum(np.maximum.accumulate(log_banca, axis=1), 0)
+        dd_banca[inicio:inicio + b] = -np.expm1((log_banca - topo).min(axis=1))
+        log_final[inicio:inicio + b] = log_banca[:, -1]
+    return dd_unidades, dd_banca, log_final
+
+
+def analisar(resultados, R=PAYOUT, amostras=AMOSTRAS, nivel=0.95, fracao_kelly=0.5, seed=42):
+    # `resultados`: sequência de bool (True = WIN) ou de 'WIN'/'LOSS'
+    resultados = np.asarray(resultados)
+    ganhou = resultados == 'WIN' if resultados.dtype.kind in 'US' else resultados.astype(bool)
+    n = len(ganhou)
+    if n == 0:
+        return None
+    rng = np.random.default_rng(seed)
+    W = ganhou.mean()
+
+    taxas = rng.binomial(n, W, amostras) / n
+    kellys = kelly(taxas, R)
+
+    # Aposta pelo Kelly pontual (o que se usaria na prática), só se for positivo
+    fracao = fracao_kelly * max(kelly(W, R), 0.0)
+    n_caminhos = int(min(amostras, max(MIN_CAMINHOS, MAX_ELEMENTOS // n)))
+    # Acima do teto de elementos mesmo com MIN_CAMINHOS: caminhos em blocos de trades
+    passo = 1 if n * n_caminhos <= MAX_ELEMENTOS else -(-n // MAX_PONTOS)
+    dd_unidades, dd_banca, log_final = caminhos(W, n, n_caminhos, R, fracao, rng, passo)
+
+    return {
+        'trades': n,
+        'amostras': amostras,
+        'caminhos': n_caminhos,
+        'passo': passo,
+        'nivel': nivel,
+        'taxa': W,
+        'taxa_ic': _quantis(taxas, nivel),
+        'kelly': kelly(W, R),
+        'kelly_ic': _quantis(kellys, nivel),
+        'prob_kelly_positivo': (kellys > 0).mean(),
+        'dd_unidades': _quantis(dd_unidades, nivel),
+        'fracao_kelly': fracao_kelly,
+        'aposta': fracao,
+        'dd_banca': _quantis(dd_banca, nivel),
+        'banca_final': np.exp(_quantis(log_final, nivel)), # em log: não estoura com muitos trades
+        'prob_perda': (log_final < 0).mean(),
+    }
+
+
+def imprimir_monte_carlo(resultados, **kwargs):
+    # Bloco padrão dos relatórios: intervalos de confiança do bootstrap
+    mc = analisar(resultados, **kwargs)
+    if mc is None:
+        return None
+    nivel = f"{mc['nivel']*100:.0f}%"
+    t_lo, _, t_hi = mc['taxa_ic']
+    k_lo, _, k_hi = mc['kelly_ic']
+    cor = Fore.GREEN if k_lo > 0 else Fore.YELLOW if mc['kelly'] > 0 else Fore.RED
+
+    blocos = f" em blocos de {mc['passo']} trades" if mc['passo'] > 1 else ""
+    print(f"\n{Fore.YELLOW}🎲 MONTE CARLO (IC {nivel}: {mc['amostras']} amostras, {mc['caminhos']} caminhos{blocos}):")
+    print(f"Taxa de Acerto: {mc['taxa']*100:.2f}% [{t_lo*100:.2f}% – {t_hi*100:.2f}%]")
+    print(f"Kelly: {cor}{mc['kelly']*100:.2f}% [{k_lo*100:.2f}% – {k_hi*100:.2f}%]{Style.RESET_ALL}"
+          f" | P(Kelly > 0): {mc['prob_kelly_positivo']*100:.1f}%")
+    _, dd_med, dd_hi = mc['dd_unidades']
+    print(f"Drawdown máx. (stake fixo 1u): mediana {dd_med:.1f}u | pior {nivel}: {dd_hi:.1f}u")
+    if mc['aposta'] > 0:
+        b_lo, b_med, b_hi = mc['banca_final']
+        _, _, ddb_hi = mc['dd_banca']
+        print(f"Banca com {mc['fracao_kelly']:g}x Kelly ({mc['aposta']*100:.2f}% por trade): "
+              f"final x{b_med:.2f} [x{b_lo:.2f} – x{b_hi:.2f}] | DD pior {nivel}: {ddb_hi*100:.1f}%"
+              f" | P(perda): {mc['prob_perda']*100:.1f}%")
+    else:
+        print(f"Banca: {Fore.RED}sem aposta (Kelly pontual ≤ 0){Style.RESET_ALL}")
+    return mc
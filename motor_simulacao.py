@@ -0,0 +1,91 @@
+import heapq
+import argparse
+import numpy as np
+from collections import namedtuple
+from armazem_candles import argumentos_periodo
+from odds_polymarket import ArmazemOdds
+
+# Motor de simulação compartilhado pelos backtests.
+# Substitui o laço `while i < len(df) - 16: row = df.iloc[i]` por arrays NumPy:
+# os sinais CALL/PUT chegam como vetores booleanos, o resultado em i+15 vira um
+# array deslocado e o cooldown é aplicado numa varredura que só visita os sinais.
+# Com `max_posicoes` != 1 as posições se sobrepõem como no livro do bot ao vivo:
+# cada entrada ocupa uma vaga até o vencimento, no máximo uma entrada por candle.
+
+HORIZONTE = 15  # Candles até o vencimento (15m no gráfico de 1m)
+COOLDOWN = 15   # Candles bloqueados após uma entrada
+
+ResultadoSimulacao = namedtuple('ResultadoSimulacao', ['indices', 'eh_call', 'diff', 'ganhou', 'sinais'])
+
+
+def aplicar_cooldown(candidatos, cooldown=COOLDOWN):
+    # Recebe os índices (ordenados) onde há sinal e devolve os que viram trade.
+    # Após uma entrada em i, o próximo trade só pode sair em i + cooldown,
+    # exatamente como o `i += 15` dos laços originais.
+    candidatos = np.asarray(candidatos, dtype=np.int64)
+    if cooldown <= 1 or len(candidatos) == 0:
+        return candidatos
+
+    # Para cada candidato, posição do primeiro candidato liberado depois dele
+    proximo = np.searchsorted(candidatos, candidatos + cooldown).tolist()
+    escolhidos = []
+    k = 0
+    total = len(proximo)
+    while k < total:
+        escolhidos.append(k)
+        k = proximo[k]
+    return candidatos[escolhidos]
+
+
+def aplicar_livro(candidatos, horizonte=HORIZONTE, max_posicoes=None, vencimentos=None):
+    # Várias posições abertas: uma entrada em i ocupa uma vaga até i + horizonte
+    # (vencimentos num heap, como no LivroPosicoes). None = sem limite de vagas.
+    # `vencimentos` permite continuar o heap de uma chamada anterior (simulação em blocos).
+    candidatos = np.asarray(candidatos, dtype=np.int64)
+    if max_posicoes is None:
+        return candidatos
+
+    vencimentos = [] if vencimentos is None else vencimentos
+    escolhidos = []
+    for k, i in enumerate(candidatos.tolist()):
+        while vencimentos and vencimentos[0] <= i:
+            heapq.heappop(vencimentos)
+        if len(vencimentos) < max_posicoes:
+            heapq.heappush(vencimentos, i + horizonte)
+            escolhidos.append(k)
+    return candidatos[escolhidos]
+
+
+def varrer_sinais(call, put, close, horizonte=HORIZONTE, cooldown=COOLDOWN, max_posicoes=1, diffs=None):
+    # `call` e `put` devem ser mutuamente exclusivos: a prioridade do
+    # if/elif de cada estratégia é resolvida por quem chama (ex.: put & ~call).
+    # `max_posicoes=1` é o slot único original (cooldown); acima disso (ou None)
+    # vale o livro de posições e o cooldown deixa de ser usado.
+    # `diffs`: close[i + horizonte] - close[i] já pronto (rótulos pré-calculados)
+    call = np.asarray(call, dtype=bool)
+    put = np.asarray(put, dtype=bool)
+    close = np.asarray(close, dtype=np.float64)
+
+    # Mesmo limite do laço original: i < len(df) - 16
+    limite = max(len(close) - (horizonte + 1), 0)
+    candidatos = np.flatnonzero((call | put)[:limite])
+    if max_posicoes == 1:
+        indices = aplicar_cooldown(candidatos, cooldown)
+    else:
+        indices = aplicar_livro(candidatos, horizonte, max_posicoes)
+
+    eh_call = call[indices]
+    diff = close[indices + horizonte] - close[indices] if diffs is None else np.asarray(diffs)[indices]
+    ganhou = np.where(eh_call, diff > 0, diff < 0)
+    return ResultadoSimulacao(indices, eh_call, diff, ganhou, len(candidatos))
+
+
+def argumentos_backtest(argv=None):
+    # argumentos_periodo + --max-posicoes (0 = sem limite) + --odds para os backtests:
+    #   python backtest_v40.py --armazem dados/candles --max-posicoes 5 --odds dados/odds
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--max-posicoes', type=int, default=1, help="Posições simultâneas (1 = slot único)")
+    parser.add_argument('--odds', help="Diretório das odds do Polymarket (PnL com o payout real)")
+    args, resto = parser.parse_known_args(argv)
+    odds = ArmazemOdds(args.odds) if args.odds else None
+    return {**argumentos_periodo(resto), 'max_posicoes': args.max_posicoes or None, 'odds': odds}
@@ -0,0 +1,204 @@
+import os
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+from colorama import Fore, Style, init
+
+from armazem_candles import para_ms
+from monte_carlo import kelly, imprimir_monte_carlo
+
+init(autoreset=True)
+
+# Odds históricas do Polymarket para o PnL dos backtests.
+# Os relatórios assumiam R = 0.85 em todo trade. No mercado binário o token
+# "Up" custa p e paga 1: o lucro por 1.0 arriscado é R = (1 - p) / p, e o p muda
+# o tempo todo. Aqui os snapshots (ts, p_up, p_down) de cada ativo ficam num
+# binário ordenado por ts (um por símbolo, mesmo esquema do armazém de candles,
+# aberto com memmap) e cada trade pega as odds vigentes na entrada com um
+# np.searchsorted de todos os trades de uma vez (as-of): milhões de ticks
+# juntam em segundos, sem merge_asof por linha.
+#
+# Snapshot mais velho que a tolerância (buraco na coleta) não vale: o trade
+# fica com o R fixo e aparece na contagem "sem odds" do relatório.
+
+DTYPE_ODDS = np.dtype([('ts', '<i8'), ('p_up', '<f8'), ('p_down', '<f8')])
+DIR_ODDS = os.getenv('DIR_ODDS', 'dados/odds')
+PAYOUT_FIXO = 0.85
+TOLERANCIA_MS = 5 * 60_000
+
+
+def payout(p):
+    # Lucro por 1.0 apostado comprando o token a p (paga 1 se acertar)
+    p = np.asarray(p, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where((p > 0) & (p < 1), (1 - p) / p, np.nan)
+
+
+def para_odds(ts, p_up, p_down=None):
+    # Arrays -> registros DTYPE_ODDS ordenados, sem ts repetido (fica o último)
+    dados = np.empty(len(ts), dtype=DTYPE_ODDS)
+    dados['ts'] = ts
+    dados['p_up'] = p_up
+    # Sem o lado "Down" no arquivo: o complemento (livro sem spread)
+    dados['p_down'] = 1.0 - dados['p_up'] if p_down is None else p_down
+    dados = dados[np.argsort(dados['ts'], kind='stable')]
+    ultimo = np.r_[dados['ts'][1:] != dados['ts'][:-1], True]
+    return dados[ultimo]
+
+
+class ArmazemOdds:
+    def __init__(self, diretorio=DIR_ODDS):
+        self.diretorio = diretorio
+
+    def caminho(self, symbol):
+        return os.path.join(self.diretorio, f"{symbol.replace('/', '_')}.bin")
+
+    def abrir(self, symbol):
+        caminho = self.caminho(symbol)
+        if not os.path.exists(caminho) or os.path.getsize(caminho) == 0:
+            return np.empty(0, dtype=DTYPE_ODDS)
+        return np.memmap(caminho, dtype=DTYPE_ODDS, mode='r')
+
+    def mesclar(self, symbol, dados):
+        # Append se tudo for mais novo que o último snapshot; senão reescreve ordenado.
+        # Mesmo ts gravado de novo: vale o que chegou agora
+        dados = np.asarray(dados, dtype=DTYPE_ODDS)
+        dados = para_odds(dados['ts'], dados['p_up'], dados['p_down'])
+        if len(dados) == 0:
+            return 0
+        atuais = self.abrir(symbol)
+        caminho = self.caminho(symbol)
+        os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+        if len(atuais) == 0 or dados['ts'][0] > atuais['ts'][-1]:
+            with open(caminho, 'ab') as f:
+                f.write(dados.tobytes())
+            return len(dados)
+
+        todos = np.concatenate([np.array(atuais), dados])
+        n_atuais = len(atuais)
+        del atuais
+        todos = todos[np.argsort(todos['ts'], kind='stable')]
+        todos = todos[np.r_[todos['ts'][1:] != todos['ts'][:-1], True]]
+        temporario = caminho + '.tmp'
+        with open(temporario, 'wb') as f:
+            f.write(todos.tobytes())
+        os.replace(temporario, caminho)
+        return len(todos) - n_atuais
+
+    def importar(self, symbol, arquivo):
+        # CSV ou JSON lines com colunas ts (ms ou data), p_up e, opcionalmente, p_down
+        if arquivo.endswith(('.jsonl', '.json')):
+            df = pd.read_json(arquivo, lines=arquivo.endswith('.jsonl'))
+        else:
+            df = pd.read_csv(arquivo)
+        ts = df['ts']
+        if ts.dtype.kind in 'iu':
+            ts = ts.to_numpy(np.int64)
+        else:
+            datas = pd.to_datetime(ts, utc=True).dt.tz_localize(None)
+            ts = datas.to_numpy('datetime64[ms]').astype(np.int64)
+        p_down = df['p_down'].to_numpy(np.float64) if 'p_down' in df else None
+        return self.mesclar(symbol, para_odds(ts, df['p_up'].to_numpy(np.float64), p_down))
+
+    def sincronizar(self, fonte, symbol, limit=1000):
+        # Fonte com buscar_odds(symbol, since, limit) -> [[ts, p_up, p_down], ...]
+        # (API local ou a FonteOddsFalsa): só o que falta desde o último snapshot
+        total = 0
+        while True:
+            atuais = self.abrir(symbol)
+            since = int(atuais['ts'][-1]) + 1 if len(atuais) else None
+            del atuais
+            lote = fonte.buscar_odds(symbol, since=since, limit=limit)
+            if not lote:
+                return total
+            lote = np.asarray(lote, dtype=np.float64)
+            total += self.mesclar(symbol, para_odds(lote[:, 0].astype(np.int64), lote[:, 1], lote[:, 2]))
+            if len(lote) < limit:
+                return total
+
+    def juntar(self, symbol, instantes_ms, tolerancia=TOLERANCIA_MS):
+        # (p_up, p_down, válido) vigentes em cada instante: último snapshot com ts <= instante
+        instantes_ms = np.asarray(instantes_ms, dtype=np.int64)
+        odds = self.abrir(symbol)
+        if len(odds) == 0:
+            vazio = np.full(len(instantes_ms), np.nan)
+            return vazio, vazio.copy(), np.zeros(len(instantes_ms), dtype=bool)
+        idx = np.searchsorted(odds['ts'], instantes_ms, side='right') - 1
+        pos = np.maximum(idx, 0)
+        valido = (idx >= 0) & (instantes_ms - np.asarray(odds['ts'][pos]) <= tolerancia)
+        p_up = np.where(valido, np.asarray(odds['p_up'][pos]), np.nan)
+        p_down = np.where(valido, np.asarray(odds['p_down'][pos]), np.nan)
+        return p_up, p_down, valido
+
+    def payouts(self, symbol, instantes_ms, eh_call, tolerancia=TOLERANCIA_MS):
+        # R de cada trade pelo lado comprado (Up = CALL, Down = PUT); NaN sem odds
+        p_up, p_down, _ = self.juntar(symbol, instantes_ms, tolerancia)
+        return payout(np.where(eh_call, p_up, p_down))
+
+
+def payouts_resultado(odds, symbol, ts_1m, res, tolerancia=TOLERANCIA_MS, atraso_s=0.0):
+    # R de cada trade do motor: odds vigentes no fechamento do candle do sinal +
+    # `atraso_s` (mesmo instante de entrada da liquidacao_segundos.reliquidar)
+    atraso_ms = np.round(np.asarray(atraso_s) * 1_000).astype(np.int64)
+    entradas = np.asarray(ts_1m, dtype=np.int64)[res.indices] + 60_000 + atraso_ms
+    return odds.payouts(symbol, entradas, res.eh_call, tolerancia)
+
+
+def imprimir_payout_real(resultados, payouts, R_fixo=PAYOUT_FIXO):
+    # Bloco dos relatórios: PnL e Kelly com o R que estava no livro em cada entrada.
+    # `resultados`: bool ou 'WIN'/'LOSS'; trades sem odds ficam com R_fixo
+    resultados = np.asarray(resultados)
+    ganhou = resultados == 'WIN' if resultados.dtype.kind in 'US' else resultados.astype(bool)
+    payouts = np.asarray(payouts, dtype=np.float64)
+    total = len(ganhou)
+    if total == 0:
+        return None
+    sem_odds = int(np.isnan(payouts).sum())
+    R = np.where(np.isnan(payouts), R_fixo, payouts)
+    pnl = np.where(ganhou, R, -1.0)
+    pnl_fixo = ganhou.sum() * R_fixo - (total - ganhou.sum())
+    W = ganhou.mean()
+    R_medio = R.mean()
+    # Kelly com o R médio dos trades (aproximação: cada aposta tem seu próprio R)
+    k = kelly(W, R_medio)
+
+    print(f"\n{Fore.YELLOW}💵 PAYOUT REAL (odds Polymarket, {total - sem_odds}/{total} trades com odds):")
+    print(f"R médio: {R_medio:.3f} (nos WINs: {R[ganhou].mean() if ganhou.any() else float('nan'):.3f}) | R fixo: {R_fixo}")
+    cor = Fore.GREEN if pnl.sum() > 0 else Fore.RED
+    print(f"PnL (stake 1u): {cor}{pnl.sum():+.2f}u{Style.RESET_ALL} | com R fixo: {pnl_fixo:+.2f}u"
+          f" | por trade: {pnl.mean():+.4f}u")
+    cor = Fore.GREEN if k > 0 else Fore.RED
+    print(f"💰 Kelly com R real: {cor}{k*100:.2f}%{Style.RESET_ALL}")
+    imprimir_monte_carlo(ganhou, R=R_medio)
+    return {'trades': total, 'sem_odds': sem_odds, 'R_medio': R_medio, 'pnl': pnl.sum(), 'kelly': k}
+
+
+if __name__ == "__main__":
+    # Importa um arquivo:    python odds_polymarket.py ETH/USDT --importar odds_eth.csv
+    # Consulta um instante:  python odds_polymarket.py ETH/USDT --em 2026-01-10T12:00
+    parser = argparse.ArgumentParser()
+    parser.add_argument('symbol')
+    parser.add_argument('--diretorio', default=DIR_ODDS)
+    parser.add_argument('--importar', nargs='+', default=[], help="CSV / JSON lines com ts, p_up[, p_down]")
+    parser.add_argument('--em', help="Mostra as odds vigentes neste instante")
+    args = parser.parse_args()
+
+    armazem = ArmazemOdds(args.diretorio)
+    for arquivo in args.importar:
+        try:
+            novos = armazem.importar(args.symbol, arquivo)
+            print(f"{Fore.GREEN}✅ {arquivo}: +{novos} snapshots")
+        except Exception as e:
+            print(f"{Fore.RED}Erro ao importar {arquivo}: {e}", file=sys.stderr)
+
+    odds = armazem.abrir(args.symbol)
+    if len(odds):
+        inicio, fim = (pd.to_datetime(int(t), unit='ms') for t in (odds['ts'][0], odds['ts'][-1]))
+        print(f"{Fore.CYAN}📊 {args.symbol}: {len(odds)} snapshots de {inicio} a {fim}")
+    if args.em:
+        p_up, p_down, valido = armazem.juntar(args.symbol, [para_ms(args.em)])
+        if valido[0]:
+            print(f"Up {p_up[0]:.3f} (R {payout(p_up[0]):.3f}) | Down {p_down[0]:.3f} (R {payout(p_down[0]):.3f})")
+        else:
+            print(f"{Fore.RED}⚠️ Sem snapshot nos {TOLERANCIA_MS // 60_000} min anteriores.")
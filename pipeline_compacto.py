@@ -0,0 +1,216 @@
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+# Pipeline compacto de indicadores para backtests longos.
+# O caminho normal (Indicadores -> ~20 colunas float64 no DataFrame -> dropna +
+# reset_index) guarda todas as séries intermediárias, o cache e ainda uma cópia
+# do frame. Aqui saem só as colunas que a função de sinal da estratégia lê, em
+# float32 (as regras só comparam com limites); os intermediários (log-retornos,
+# médias, DI...) passam por cinco buffers float64 pré-alocados, reaproveitados
+# entre colunas e entre chamadas. O close continua float64: é ele que decide
+# WIN/LOSS no vencimento.
+#
+# Em vez do dropna, as linhas de aquecimento do começo são cortadas com uma view;
+# só se aparecer NaN no meio da série (candles parados) é que há uma cópia.
+
+BUFFERS = 5
+
+
+def diff(x, out):
+    out[0] = np.nan
+    np.subtract(x[1:], x[:-1], out=out[1:])
+    return out
+
+
+def soma_movel(x, janela, out):
+    # Soma com janela cheia (NaN nas primeiras janela - 1 linhas), somando fatias
+    # deslocadas: sem o erro acumulado de um cumsum. `out` não pode ser `x`.
+    t = len(x) - janela + 1
+    out[:min(janela - 1, len(x))] = np.nan
+    if t <= 0:
+        return out
+    soma = out[janela - 1:]
+    np.copyto(soma, x[:t])
+    for k in range(1, janela):
+        soma += x[k:k + t]
+    return out
+
+
+def media_movel(x, janela, out):
+    soma_movel(x, janela, out)
+    out[janela - 1:] /= janela
+    return out
+
+
+def desvio_movel(x, janela, media, out, tmp):
+    # Desvio amostral (ddof=1) em duas passadas sobre a média já calculada
+    t = len(x) - janela + 1
+    out[:min(janela - 1, len(x))] = np.nan
+    if t <= 0:
+        return out
+    m, quadrados, d = media[janela - 1:], out[janela - 1:], tmp[:t]
+    quadrados[:] = 0
+    for k in range(janela):
+        np.subtract(x[k:k + t], m, out=d)
+        d *= d
+        quadrados += d
+    quadrados /= janela - 1
+    np.sqrt(quadrados, out=quadrados)
+    return out
+
+
+class PipelineCompacto:
+    # Colunas suportadas: os nomes do CATALOGO de estrategias.py usados pelas V20-V40
+    COLUNAS = ('c', 'v', 'prob_tac', 'prob_str', 'z_score', 'bandwidth', 'bw_ma20',
+               'vol_ma5', 'body', 'upper_wick', 'lower_wick', 'adx_di', 'rsi')
+
+    def __init__(self, n=0):
+        self._n = 0
+        self._buffers = []
+        self.reservar(n)
+
+    def reservar(self, n):
+        # Buffers de trabalho para até n candles (só crescem; chamadas menores usam views)
+        if n > self._n:
+            self._buffers = [np.empty(n) for _ in range(BUFFERS)]
+            self._n = n
+
+    def calcular(self, o, h, l, c, v, nomes):
+        # ({nome: array} com as colunas pedidas (float32, close em float64),
+        #  máscara das linhas sem NaN em nenhuma delas)
+        faltando = [nome for nome in nomes if nome not in self.COLUNAS]
+        if faltando:
+            raise KeyError(f"colunas sem versão compacta: {faltando}")
+        n = len(c)
+        self.reservar(n)
+        b = [buf[:n] for buf in self._buffers]
+        saida = {}
+        saida_32 = lambda nome: saida.setdefault(nome, np.empty(n, dtype=np.float32))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if 'c' in nomes:
+                saida['c'] = c
+            if 'v' in nomes:
+                saida['v'] = v.astype(np.float32)
+
+            for nome, janela in (('prob_tac', 30), ('prob_str', 60)):
+                if nome in nomes:
+                    self._prob_hull(c, janela, 15, b, saida_32(nome))
+
+            if {'z_score', 'bandwidth', 'bw_ma20'} & set(nomes):
+                self._bollinger(c, 20, 2.0, b, nomes, saida_32)
+
+            if 'vol_ma5' in nomes:
+                np.copyto(saida_32('vol_ma5'), media_movel(v, 5, b[0]))
+
+            if {'body', 'upper_wick', 'lower_wick'} & set(nomes):
+                np.abs(np.subtract(c, o, out=b[0]), out=saida_32('body'))
+                np.subtract(h, np.maximum(o, c, out=b[0]), out=saida_32('upper_wick'))
+                np.subtract(np.minimum(o, c, out=b[0]), l, out=saida_32('lower_wick'))
+
+            if 'adx_di' in nomes:
+                self._adx_di(h, l, c, 14, b, saida_32('adx_di'))
+
+            if 'rsi' in nomes:
+                self._rsi(c, 7, b, saida_32('rsi'))
+
+        # Pavios calculados juntos: devolve só os pedidos
+        saida = {nome: saida[nome] for nome in nomes}
+        valido = np.ones(n, dtype=bool)
+        for valores in saida.values():
+            valido &= ~np.isnan(valores)
+        return saida, valido
+
+    # --- GRUPOS (mesmas fórmulas da biblioteca `indicadores`) ---
+
+    @staticmethod
+    def _prob_hull(c, janela, T, b, out):
+        log_ret = b[0]
+        log_ret[0] = np.nan
+        np.divide(c[1:], c[:-1], out=log_ret[1:])
+        np.log(log_ret[1:], out=log_ret[1:])
+        mu = media_movel(log_ret, janela, b[1])
+        sigma = desvio_movel(log_ret, janela, mu, b[2], b[3])
+        mu *= T
+        sigma *= np.sqrt(T)
+        return ndtr(np.divide(mu, sigma, out=mu), out=out)
+
+    @staticmethod
+    def _bollinger(c, janela, desvios, b, nomes, saida_32):
+        ma = media_movel(c, janela, b[0])
+        std = desvio_movel(c, janela, ma, b[1], b[2])
+        # Janela com preço parado: o rolling do pandas devolve média exata e desvio 0
+        # (Z-Score 0/0 = NaN); a soma de fatias pode errar 1 ulp e gerar um Z falso
+        mudancas = b[2]
+        mudancas[0] = 0
+        np.not_equal(c[1:], c[:-1], out=mudancas[1:])
+        parada = soma_movel(mudancas, janela - 1, b[3]) == 0
+        np.copyto(ma, c, where=parada)
+        np.copyto(std, 0.0, where=parada)
+        if 'z_score' in nomes:
+            np.divide(np.subtract(c, ma, out=b[2]), std, out=saida_32('z_score'))
+        if 'bandwidth' in nomes or 'bw_ma20' in nomes:
+            # (upper - lower) / ma, na mesma ordem de operações do caminho normal
+            upper = np.add(ma, np.multiply(std, desvios, out=b[2]), out=b[3])
+            lower = np.subtract(ma, b[2], out=b[2])
+            bandwidth = np.divide(np.subtract(upper, lower, out=b[3]), ma, out=b[3])
+            if 'bandwidth' in nomes:
+                np.copyto(saida_32('bandwidth'), bandwidth)
+            if 'bw_ma20' in nomes:
+                np.copyto(saida_32('bw_ma20'), media_movel(bandwidth, 20, b[4]))
+
+    @staticmethod
+    def _adx_di(h, l, c, periodo, b, out):
+        dh, dl = diff(h, b[0]), diff(l, b[1])
+        # true range: max(|Δh|, |Δl|, |Δc|) ignorando NaN
+        tr = np.abs(dh, out=b[3])
+        np.fmax(tr, np.abs(dl, out=b[2]), out=tr)
+        np.fmax(tr, np.abs(diff(c, b[2]), out=b[2]), out=tr)
+        tr_smooth = soma_movel(tr, periodo, b[4])
+
+        plus_dm = np.clip(dh, 0, None, out=dh)
+        minus_dm = np.abs(np.clip(dl, None, 0, out=dl), out=dl)
+        plus_di = soma_movel(plus_dm, periodo, b[2])
+        plus_di /= tr_smooth
+        plus_di *= 100
+        minus_di = soma_movel(minus_dm, periodo, b[3])
+        minus_di /= tr_smooth
+        minus_di *= 100
+
+        dx = np.abs(np.subtract(plus_di, minus_di, out=b[0]), out=b[0])
+        dx *= 100
+        dx /= np.add(plus_di, minus_di, out=b[1])
+        np.copyto(out, media_movel(dx, periodo, b[1]))
+        return out
+
+    @staticmethod
+    def _rsi(c, periodo, b, out):
+        delta = diff(c, b[0])
+        # where(delta > 0, 0) do pandas: NaN vira 0
+        ganho, perda = b[1], b[2]
+        ganho[:] = 0
+        np.copyto(ganho, delta, where=delta > 0)
+        perda[:] = 0
+        np.negative(delta, out=perda, where=delta < 0)
+        rs = np.divide(media_movel(ganho, periodo, b[3]), media_movel(perda, periodo, b[4]), out=b[3])
+        rs += 1
+        np.divide(100, rs, out=rs)
+        np.subtract(100, rs, out=out)
+        return out
+
+
+def frame_compacto(df, nomes, renomear=None, pipeline=None, extras=()):
+    # DataFrame só com as colunas pedidas, sem o aquecimento e sem NaN, como o
+    # dropna + reset_index do caminho normal (views sem cópia quando possível).
+    # `extras`: colunas do frame original levadas como estão (ex.: 'ts')
+    pipeline = pipeline or PipelineCompacto(len(df))
+    colunas, valido = pipeline.calcular(*(df[k].to_numpy(dtype=np.float64) for k in 'ohlcv'), nomes)
+    colunas.update({nome: df[nome].to_numpy() for nome in extras})
+    inicio = int(np.argmax(valido)) if valido.any() else len(valido)
+    if valido[inicio:].all():
+        colunas = {nome: valores[inicio:] for nome, valores in colunas.items()}
+    else:
+        colunas = {nome: valores[valido] for nome, valores in colunas.items()}
+    renomear = renomear or {}
+    return pd.DataFrame({renomear.get(nome, nome): valores for nome, valores in colunas.items()}, copy=False)
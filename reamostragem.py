@@ -0,0 +1,204 @@
+import argparse
+import numpy as np
+import pandas as pd
+from colorama import Fore, init
+
+from armazem_candles import ArmazemCandles, DTYPE_CANDLE, COLUNAS, ms_timeframe, para_ms
+from indicadores import Indicadores
+
+init(autoreset=True)
+
+# Barras de 5m/15m/1h/4h derivadas da série de 1m do armazém.
+# Nada de fetch_ohlcv por timeframe nem resample do histórico inteiro a cada tick:
+# cada timeframe guarda suas barras num array que só cresce, e os minutos novos
+# (um candle do bot ao vivo ou um lote lido do armazém) só mexem na última barra
+# ou abrem as seguintes. Minuto faltando no 1m não quebra nada: a barra é
+# definida pelo início do intervalo (ts - ts % passo), como na exchange.
+#
+# Sem lookahead: num candle de 1m que fecha em t, só contam as barras com
+# ts + passo <= t (ver `alinhar`).
+
+TIMEFRAMES = ('5m', '15m', '1h', '4h')
+MS_MINUTO = 60_000
+
+# Maré 1h: Hull das barras de 1h fechadas. Só o lado (prob > 0.5 ou < 0.5) filtra,
+# então o T não muda nada além da escala
+JANELA_MARE = 12 # 12 barras de 1h: precisa de 13h de histórico antes do 1º sinal
+T_MARE = 1
+
+
+def reamostrar(candles, timeframe):
+    # Array DTYPE_CANDLE de 1m (ordenado) -> barras do timeframe; a última pode
+    # estar incompleta (ver Reamostrador.fechadas)
+    if len(candles) == 0:
+        return np.empty(0, dtype=DTYPE_CANDLE)
+    passo = ms_timeframe(timeframe)
+    balde = candles['ts'] - candles['ts'] % passo
+    inicio = np.flatnonzero(np.r_[True, balde[1:] != balde[:-1]])
+    fim = np.r_[inicio[1:], len(candles)] - 1
+
+    barras = np.empty(len(inicio), dtype=DTYPE_CANDLE)
+    barras['ts'] = balde[inicio]
+    barras['o'] = candles['o'][inicio]
+    barras['h'] = np.maximum.reduceat(candles['h'], inicio)
+    barras['l'] = np.minimum.reduceat(candles['l'], inicio)
+    barras['c'] = candles['c'][fim]
+    barras['v'] = np.add.reduceat(candles['v'], inicio)
+    return barras
+
+
+def candles_de_frame(df, colunas=COLUNAS):
+    # DataFrame dos backtests (ts em datetime ou ms) -> array DTYPE_CANDLE
+    candles = np.empty(len(df), dtype=DTYPE_CANDLE)
+    ts = df[colunas[0]]
+    candles['ts'] = ts.to_numpy('datetime64[ms]').astype(np.int64) if ts.dtype.kind == 'M' else ts.to_numpy(np.int64)
+    for orig, nome in zip(colunas[1:], COLUNAS[1:]):
+        candles[nome] = df[orig].to_numpy(np.float64)
+    return candles
+
+
+def alinhar(ts_1m, barras, timeframe):
+    # Índice da última barra já fechada no fechamento de cada candle de 1m
+    # (ts_1m = abertura do candle, em ms); -1 = nenhuma ainda
+    fechamento_barras = barras['ts'] + ms_timeframe(timeframe)
+    return np.searchsorted(fechamento_barras, np.asarray(ts_1m) + MS_MINUTO, side='right') - 1
+
+
+def valores_alinhados(ts_1m, barras, timeframe, valores):
+    # `valores` (um por barra) levados para a grade de 1m, NaN antes da 1ª barra fechada
+    idx = alinhar(ts_1m, barras, timeframe)
+    return np.where(idx >= 0, np.asarray(valores, dtype=np.float64)[np.maximum(idx, 0)], np.nan)
+
+
+def frame_barras(barras):
+    df = pd.DataFrame({nome: barras[nome] for nome in COLUNAS})
+    df['ts'] = pd.to_datetime(df['ts'], unit='ms')
+    return df
+
+
+def prob_mare(barras, symbol=None, janela=JANELA_MARE, T=T_MARE):
+    # Probabilidade de Hull por barra de 1h (mesma fórmula dos backtests)
+    return Indicadores(frame_barras(barras), symbol, timeframe='1h').prob_hull(janela, T).to_numpy()
+
+
+def mare_1h(df, symbol=None, janela=JANELA_MARE, T=T_MARE, colunas=COLUNAS):
+    # Coluna de maré 1h para um DataFrame de 1m: Hull das barras de 1h já fechadas
+    candles = candles_de_frame(df, colunas)
+    reamostrador = Reamostrador(('1h',))
+    reamostrador.anexar(candles)
+    barras = reamostrador.fechadas('1h')
+    return valores_alinhados(candles['ts'], barras, '1h', prob_mare(barras, symbol, janela, T))
+
+
+class Reamostrador:
+    def __init__(self, timeframes=TIMEFRAMES, manter=None):
+        # manter: máximo de barras guardadas por timeframe (bot ao vivo); None = todas
+        self.passos = {tf: ms_timeframe(tf) for tf in timeframes}
+        self.manter = manter
+        self._barras = {tf: np.empty(0, dtype=DTYPE_CANDLE) for tf in timeframes}
+        self._n = dict.fromkeys(timeframes, 0)
+        self.ultimo_ts = None # abertura do último candle de 1m recebido
+
+    @classmethod
+    def do_armazem(cls, armazem, symbol, timeframes=TIMEFRAMES, inicio=None, fim=None, manter=None):
+        reamostrador = cls(timeframes, manter)
+        reamostrador.sincronizar(armazem, symbol, inicio, fim)
+        return reamostrador
+
+    def sincronizar(self, armazem, symbol, inicio=None, fim=None):
+        # Lê do armazém só os minutos depois do último já recebido
+        if self.ultimo_ts is not None:
+            inicio = self.ultimo_ts + MS_MINUTO if inicio is None else max(para_ms(inicio), self.ultimo_ts + MS_MINUTO)
+        a, b = armazem.intervalo(symbol, '1m', inicio, fim)
+        return self.anexar(armazem.ler(symbol, '1m', a, b))
+
+    def atualizar(self, ts, o, h, l, c, v):
+        # Um candle de 1m fechado (o bot ao vivo chama a cada minuto)
+        candle = np.array([(ts, o, h, l, c, v)], dtype=DTYPE_CANDLE)
+        return self.anexar(candle)
+
+    def anexar(self, candles):
+        # Lote de 1m ordenado. Minutos já vistos são ignorados. Devolve
+        # {timeframe: nº de barras que fecharam com este lote}
+        if self.ultimo_ts is not None:
+            candles = candles[candles['ts'] > self.ultimo_ts]
+        if len(candles) == 0:
+            return dict.fromkeys(self.passos, 0)
+        antes = {tf: self.n_fechadas(tf) for tf in self.passos}
+        for tf in self.passos:
+            novas = reamostrar(candles, tf)
+            n = self._n[tf]
+            barras = self._barras[tf]
+            if n and barras['ts'][n - 1] == novas['ts'][0]:
+                # O lote continua a barra aberta: só ela muda
+                ultima = barras[n - 1:n]
+                ultima['h'] = max(ultima['h'][0], novas['h'][0])
+                ultima['l'] = min(ultima['l'][0], novas['l'][0])
+                ultima['c'] = novas['c'][0]
+                ultima['v'] += novas['v'][0]
+                novas = novas[1:]
+            self._acrescentar(tf, novas)
+        self.ultimo_ts = int(candles['ts'][-1])
+        return {tf: self.n_fechadas(tf) - antes[tf] for tf in self.passos}
+
+    def _acrescentar(self, tf, novas):
+        if len(novas) == 0:
+            return
+        n = self._n[tf]
+        barras = self._barras[tf]
+        if self.manter is not None and n + len(novas) > self.manter:
+            # Descarta as mais antigas (cópia só quando estoura o limite, não por minuto)
+            guardar = min(n, max(self.manter // 2, self.manter - len(novas)))
+            barras[:guardar] = barras[n - guardar:n].copy()
+            n = guardar
+        if n + len(novas) > len(barras):
+            # Capacidade dobra: append amortizado O(1)
+            maior = np.empty(max(2 * len(barras), n + len(novas), 64), dtype=DTYPE_CANDLE)
+            maior[:n] = barras[:n]
+            self._barras[tf] = barras = maior
+        barras[n:n + len(novas)] = novas
+        self._n[tf] = n + len(novas)
+
+    def n_fechadas(self, tf):
+        # A última barra fecha quando chega o minuto que completa o intervalo
+        # (ou quando começa a próxima, se esse minuto faltar)
+        n = self._n[tf]
+        if n == 0:
+            return 0
+        fim_ultima = self._barras[tf]['ts'][n - 1] + self.passos[tf]
+        return n if self.ultimo_ts + MS_MINUTO >= fim_ultima else n - 1
+
+    def barras(self, tf):
+        # View com todas as barras, incluindo a aberta
+        return self._barras[tf][:self._n[tf]]
+
+    def fechadas(self, tf):
+        return self._barras[tf][:self.n_fechadas(tf)]
+
+    def aberta(self, tf):
+        # Barra em formação (None se a última já fechou)
+        n = self._n[tf]
+        return self._barras[tf][n - 1] if n and self.n_fechadas(tf) < n else None
+
+    def frame(self, tf, incluir_aberta=False):
+        return frame_barras(self.barras(tf) if incluir_aberta else self.fechadas(tf))
+
+
+if __name__ == "__main__":
+    # python reamostragem.py ETH/USDT --armazem dados/candles --inicio 2026-01-01
+    parser = argparse.ArgumentParser()
+    parser.add_argument('symbol')
+    parser.add_argument('--armazem', default='dados/candles')
+    parser.add_argument('--inicio')
+    parser.add_argument('--fim')
+    parser.add_argument('--timeframes', nargs='+', default=list(TIMEFRAMES))
+    args = parser.parse_args()
+
+    reamostrador = Reamostrador.do_armazem(ArmazemCandles(args.armazem), args.symbol, args.timeframes,
+                                           args.inicio, args.fim)
+    for tf in args.timeframes:
+        df = reamostrador.frame(tf, incluir_aberta=True)
+        aberta = "com" if reamostrador.aberta(tf) is not None else "sem"
+        print(f"{Fore.CYAN}📊 {args.symbol} {tf}: {reamostrador.n_fechadas(tf)} barras fechadas ({aberta} barra em formação)")
+        if not df.empty:
+            print(df.tail(3).to_string(index=False))
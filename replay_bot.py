@@ -0,0 +1,212 @@
+import os
+import sys
+import time
+import difflib
+import argparse
+import tempfile
+import contextlib
+import numpy as np
+from datetime import datetime
+from colorama import Fore, init
+
+from armazem_candles import ArmazemCandles, DTYPE_CANDLE
+from diario_trades import DiarioTrades, de_ms
+from live_bot_v1 import EthSentinelV21, Relogio
+from reamostragem import frame_barras
+
+init(autoreset=True)
+
+# Replay do bot ao vivo (EthSentinelV21) sobre candles gravados, em tempo virtual.
+# O cérebro do bot (alinhamento p30 > 0.60 e p60 > 0.50, livro de posições,
+# diário) não é o mesmo código do backtest_v20/script_v4; aqui o próprio bot
+# recebe o histórico candle a candle, com um relógio que só anda quando o bot
+# "dorme", e o diário que ele grava é comparado com os trades do V20 nos mesmos
+# candles. Um dia inteiro roda em menos de um segundo.
+#
+# Modos:
+#  - stream: cada candle fechado entra por processar_kline (caminho do websocket);
+#  - rest: a agenda do bot (fechamentos + vencimentos, com retentativas) roda no
+#    relógio virtual e busca candles numa exchange que só mostra o que já fechou.
+# Nos dois o bot liquida o que vence num fechamento antes de avaliar a entrada
+# desse mesmo candle, como o cooldown de 15 candles do motor.
+
+MS_MINUTO = 60_000
+HORIZONTE = 15
+
+
+class RelogioVirtual(Relogio):
+    # Tempo parado até alguém dormir (a agenda) ou o driver avançar
+    def __init__(self, inicio_s):
+        self.t = float(inicio_s)
+
+    def agora(self):
+        return datetime.fromtimestamp(self.t)
+
+    def segundos(self):
+        return self.t
+
+    def dormir(self, segundos):
+        self.t += max(segundos, 0.0)
+
+    def avancar_ate(self, t):
+        self.t = max(self.t, float(t))
+
+
+class ExchangeReplay:
+    # Exchange "ao vivo" sobre candles gravados: só existe o que já fechou no relógio
+    # (mais `publicacao_s` de atraso da API, para exercitar as retentativas do bot)
+    def __init__(self, candles, relogio, publicacao_s=0.0):
+        self.candles = candles
+        self.ts = np.asarray(candles['ts'])
+        self.relogio = relogio
+        self.publicacao_ms = int(publicacao_s * 1000)
+        self.rateLimit = 0
+        self.chamadas = 0
+
+    def milliseconds(self):
+        return int(self.relogio.segundos() * 1000)
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None):
+        self.chamadas += 1
+        limit = limit or 500 # padrão da Binance
+        visiveis = int(np.searchsorted(self.ts, self.milliseconds() - MS_MINUTO - self.publicacao_ms, side='right'))
+        a = max(visiveis - limit, 0) if since is None else int(np.searchsorted(self.ts, since, side='left'))
+        b = min(a + limit, visiveis)
+        return [list(linha) for linha in self.candles[a:b].tolist()]
+
+
+def preparar_bot(relogio, pasta, caminho_diario=None, arquivos=False):
+    # Bot com diário, snapshot e log de latência isolados (nada do bot real é tocado).
+    # Snapshot e latências (um arquivo reescrito por candle) só com `arquivos`
+    # Sem espera para juntar lote: o flush do fim não fica parado no intervalo do escritor
+    diario = DiarioTrades(caminho_diario or os.path.join(pasta, 'diario_replay.db'), intervalo_flush=0.0)
+    bot = EthSentinelV21(relogio=relogio, diario=diario)
+    bot.file_estado = os.path.join(pasta, 'estado_replay.json') if arquivos else ''
+    bot.file_latencia = os.path.join(pasta, 'latencias_replay.csv') if arquivos else ''
+    return bot
+
+
+def replay_stream(bot, candles):
+    for ts, close in zip(candles['ts'].tolist(), candles['c'].tolist()):
+        bot.relogio.avancar_ate((ts + MS_MINUTO) / 1000)
+        bot.processar_kline(ts, close, True)
+
+
+def replay_rest(bot, candles, publicacao_s=0.0):
+    bot.exchange = ExchangeReplay(candles, bot.relogio, publicacao_s)
+    bot.relogio.avancar_ate((candles['ts'][0] + MS_MINUTO) / 1000 + bot.margem_fechamento)
+    bot.retomar()
+    agenda = bot.criar_agenda()
+    # Para depois do último fechamento, com folga para as retentativas pendentes
+    fim = (candles['ts'][-1] + MS_MINUTO) / 1000 + bot.margem_fechamento * (bot.tentativas_candle + 1)
+    agenda.enterabs(fim, -1, lambda: [agenda.cancel(evento) for evento in agenda.queue])
+    agenda.run()
+
+
+def replay(candles, modo='stream', caminho_diario=None, publicacao_s=0.0, verbose=False, arquivos=False):
+    # Roda o bot sobre `candles` (DTYPE_CANDLE, 1m). Devolve (trades do diário, bot, segundos)
+    pasta = tempfile.mkdtemp(prefix='replay_bot_')
+    relogio = RelogioVirtual(candles['ts'][0] / 1000)
+    bot = preparar_bot(relogio, pasta, caminho_diario, arquivos)
+    saida = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(open(os.devnull, 'w'))
+    t0 = time.perf_counter()
+    with saida:
+        if modo == 'stream':
+            replay_stream(bot, candles)
+        else:
+            replay_rest(bot, candles, publicacao_s)
+    bot.diario.flush()
+    segundos = time.perf_counter() - t0
+    trades = bot.diario.trades()
+    bot.diario.fechar()
+    return trades, bot, segundos
+
+
+def linhas_replay(trades, candles):
+    # Diário do bot -> (ts do candle do sinal, tipo, resultado). A entrada é o
+    # fechamento do candle em hora local (horario_candle); trades que o V20 não
+    # alcança (entrada nos últimos 16 candles: laço até len - 16) ficam de fora
+    n = len(candles)
+    limite = candles['ts'][n - HORIZONTE - 1] if n > HORIZONTE else -1
+    linhas = []
+    for trade in trades:
+        ts = int(round(de_ms(trade['entrada_ms']).timestamp() * 1000)) - MS_MINUTO
+        if ts < limite:
+            linhas.append(formatar(ts, trade['tipo'], trade['status']))
+    return linhas
+
+
+def linhas_backtest(candles, symbol='ETH/USDT'):
+    from backtest_v20 import EthHullTideV20
+
+    bot = EthHullTideV20()
+    bot.symbol = symbol
+    bot.df = frame_barras(candles)
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        bot.calcular_metricas()
+        bot.executar_simulacao()
+    return [formatar(t['Timestamp'].value // 1_000_000, t['Tipo'], t['Resultado']) for t in bot.trades]
+
+
+def formatar(ts, tipo, resultado):
+    return f"{de_ms(int(ts)):%Y-%m-%d %H:%M} {tipo} {resultado}"
+
+
+def comparar(candles, trades, symbol='ETH/USDT'):
+    # Diff (unified) entre o log do backtest e o do replay; vazio = idênticos
+    esperado = linhas_backtest(candles, symbol)
+    obtido = linhas_replay(trades, candles)
+    return list(difflib.unified_diff(esperado, obtido, 'backtest_v20', 'live_bot_v1 (replay)', lineterm='', n=1))
+
+
+def candles_falsos(n, seed=42):
+    from exchange_falsa import gerar_candles
+
+    # Início num minuto cheio, como na exchange (a agenda do modo rest acorda nos fechamentos)
+    inicio_ms = 1_700_000_000_000 // MS_MINUTO * MS_MINUTO
+    bruto = gerar_candles(n, inicio_ms=inicio_ms, seed=seed)
+    candles = np.empty(n, dtype=DTYPE_CANDLE)
+    for j, nome in enumerate(DTYPE_CANDLE.names):
+        candles[nome] = bruto[:, j]
+    return candles
+
+
+if __name__ == "__main__":
+    # python replay_bot.py --armazem dados/candles --inicio 2026-01-10 --fim 2026-01-11
+    # python replay_bot.py --falsa 1440 --modo rest --publicacao-s 3
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--armazem', help="Diretório do armazém de candles")
+    parser.add_argument('--symbol', default='ETH/USDT')
+    parser.add_argument('--inicio')
+    parser.add_argument('--fim')
+    parser.add_argument('--falsa', type=int, help="N candles sintéticos (exchange_falsa) em vez do armazém")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--modo', choices=('stream', 'rest'), default='stream')
+    parser.add_argument('--publicacao-s', type=float, default=0.0, help="Atraso da API para publicar um candle (modo rest)")
+    parser.add_argument('--diario', help="Grava o diário do replay aqui (padrão: pasta temporária)")
+    parser.add_argument('--verbose', action='store_true', help="Mostra a saída do bot")
+    parser.add_argument('--arquivos', action='store_true', help="Grava snapshot e latências a cada candle, como ao vivo")
+    args = parser.parse_args()
+
+    if args.falsa:
+        candles = candles_falsos(args.falsa, args.seed)
+    elif args.armazem:
+        candles = np.array(ArmazemCandles(args.armazem).carregar_array(args.symbol, '1m', args.inicio, args.fim))
+    else:
+        parser.error("informe --armazem ou --falsa")
+    if len(candles) <= HORIZONTE + 1:
+        print(f"{Fore.RED}⚠️ Poucos candles para o replay ({len(candles)}).", file=sys.stderr)
+        sys.exit(1)
+
+    trades, bot, segundos = replay(candles, args.modo, args.diario, args.publicacao_s, args.verbose, args.arquivos)
+    wins = sum(t['status'] == 'WIN' for t in trades)
+    print(f"{Fore.CYAN}🎬 Replay {args.modo}: {len(candles)} candles em {segundos:.3f}s | "
+          f"{len(trades)} trades ({wins} WIN) | {len(bot.livro)} posição(ões) ainda aberta(s)")
+
+    diferencas = comparar(candles, trades, args.symbol)
+    if diferencas:
+        print(f"{Fore.RED}❌ Log do bot diverge do backtest_v20:")
+        for linha in diferencas:
+            print(linha)
+        sys.exit(1)
+    print(f"{Fore.GREEN}✅ Log de trades idêntico ao backtest_v20 ({len(linhas_replay(trades, candles))} trades)")
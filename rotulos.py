@@ -0,0 +1,192 @@
+import os
+import argparse
+import numpy as np
+from colorama import Fore, init
+
+from armazem_candles import ArmazemCandles
+from motor_simulacao import varrer_sinais
+from estrategias import ESTRATEGIAS, colunas_necessarias, calcular_colunas
+from torneio import linha_resultado, ordenar, imprimir_tabela
+
+init(autoreset=True)
+
+# Rótulos de resultado futuro pré-calculados por dataset.
+# O resultado de qualquer trade é close[i + h] - close[i]; em vez de refazer isso
+# por simulação e por horizonte, cada linha do armazém ganha de uma vez (arrays
+# deslocados) o diff para os horizontes 1/5/10/15/30/60 e a faixa do movimento,
+# gravados num .npy ao lado do binário dos candles, linha a linha com ele.
+# Quando o armazém cresce, só as últimas max(h) linhas (que ainda não tinham
+# futuro) são refeitas. Rodar de novo uma estratégia ou varrer horizontes vira
+# um gather nesses arrays.
+#
+# Faixa: sinal do movimento x quantos limiares ele passou (|diff| > close * lim),
+# os mesmos dos diagnósticos: 0.1% = "Band Riding" do V11, 0.2% = "Evento de
+# Cauda" do V20/script_v4. Vai de -2 a 2; perda com faixa 2 contra a posição = cauda.
+
+HORIZONTES = (1, 5, 10, 15, 30, 60) # candles de 1m até o vencimento
+LIMIARES = (0.001, 0.002)
+
+
+def dtype_rotulos(horizontes=HORIZONTES):
+    campos = [('ts', '<i8')]
+    campos += [(f'diff_{h}', '<f8') for h in horizontes]
+    campos += [(f'faixa_{h}', 'i1') for h in horizontes]
+    return np.dtype(campos)
+
+
+def faixas(diff, close, limiares=LIMIARES):
+    # -len(limiares) .. len(limiares); diff NaN (sem futuro) fica 0
+    passou = sum((np.abs(diff) > close * lim).astype(np.int8) for lim in limiares)
+    return (np.sign(np.nan_to_num(diff)).astype(np.int8) * passou).astype(np.int8)
+
+
+def rotular(ts, close, horizontes=HORIZONTES, limiares=LIMIARES, inicio=0):
+    # Rótulos das linhas [inicio, n) a partir da série inteira de closes.
+    # NaN nas últimas h linhas: o vencimento ainda não existe
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+    rotulos = np.empty(max(n - inicio, 0), dtype=dtype_rotulos(horizontes))
+    rotulos['ts'] = ts[inicio:]
+    entrada = close[inicio:]
+    for h in horizontes:
+        diff = rotulos[f'diff_{h}']
+        diff[:] = np.nan
+        fim = max(n - h - inicio, 0)
+        np.subtract(close[inicio + h:inicio + h + fim], entrada[:fim], out=diff[:fim])
+        rotulos[f'faixa_{h}'] = faixas(diff, entrada, limiares)
+    return rotulos
+
+
+class CacheRotulos:
+    def __init__(self, armazem, horizontes=HORIZONTES, limiares=LIMIARES):
+        self.armazem = armazem
+        self.horizontes = tuple(horizontes)
+        self.limiares = tuple(limiares)
+        self.dtype = dtype_rotulos(self.horizontes)
+
+    def caminho(self, symbol, timeframe='1m'):
+        # dados/candles/ETH_USDT/1m.bin -> dados/candles/ETH_USDT/1m.rotulos.npy
+        return os.path.splitext(self.armazem.caminho(symbol, timeframe))[0] + '.rotulos.npy'
+
+    def _gravados(self, symbol, timeframe):
+        caminho = self.caminho(symbol, timeframe)
+        if not os.path.exists(caminho):
+            return None
+        rotulos = np.load(caminho, mmap_mode='r')
+        return rotulos if rotulos.dtype == self.dtype else None
+
+    def atualizar(self, symbol, timeframe='1m'):
+        # Deixa o .npy alinhado com o binário dos candles; devolve as linhas recalculadas
+        candles = self.armazem.abrir(symbol, timeframe)
+        gravados = self._gravados(symbol, timeframe)
+        n = len(candles)
+        if n == 0:
+            return 0
+        if gravados is not None and len(gravados) == n and gravados['ts'][-1] == candles['ts'][-1]:
+            return 0
+
+        # Reaproveita o prefixo se os candles antigos continuam nas mesmas linhas
+        # (o backfill pode inserir candles antigos e deslocar tudo)
+        manter = 0
+        if gravados is not None and 0 < len(gravados) <= n:
+            k = len(gravados) - 1
+            if gravados['ts'][0] == candles['ts'][0] and gravados['ts'][k] == candles['ts'][k]:
+                manter = max(len(gravados) - max(self.horizontes), 0)
+        novos = rotular(candles['ts'], candles['c'], self.horizontes, self.limiares, inicio=manter)
+
+        caminho = self.caminho(symbol, timeframe)
+        temporario = caminho + '.tmp.npy'
+        saida = np.lib.format.open_memmap(temporario, mode='w+', dtype=self.dtype, shape=(n,))
+        if manter:
+            saida[:manter] = gravados[:manter]
+        saida[manter:] = novos
+        saida.flush()
+        del saida, gravados
+        os.replace(temporario, caminho)
+        return n - manter
+
+    def carregar(self, symbol, timeframe='1m', inicio=None, fim=None):
+        # Rótulos das mesmas linhas que ArmazemCandles.carregar(symbol, timeframe, inicio, fim).
+        # Perto do `fim` o diff olha candles além do período: o motor nunca chega lá
+        # (mesmo limite len - h - 1 do laço original)
+        self.atualizar(symbol, timeframe)
+        a, b = self.armazem.intervalo(symbol, timeframe, inicio, fim)
+        return np.load(self.caminho(symbol, timeframe), mmap_mode='r')[a:b]
+
+
+def rotulos_validos(rotulos, valido, close, limiares=LIMIARES):
+    # Rótulos no recorte sem NaN que o backtest usa. Se só o aquecimento do começo
+    # saiu, o "i + h" do recorte é o mesmo do armazém e basta fatiar; com buracos no
+    # meio (candles parados) o vencimento conta linhas do recorte e é refeito
+    inicio = int(np.argmax(valido)) if valido.any() else len(valido)
+    if valido[inicio:].all():
+        return rotulos[inicio:]
+    horizontes = [int(nome[5:]) for nome in rotulos.dtype.names if nome.startswith('diff_')]
+    return rotular(rotulos['ts'][valido], close, horizontes, limiares)
+
+
+def varrer_horizontes(est, colunas, rotulos, horizontes=HORIZONTES, max_posicoes=1):
+    # Uma estratégia, vários vencimentos: os sinais saem uma vez e cada horizonte é
+    # um gather nos rótulos (slot único: cooldown = horizonte, como na varredura)
+    valido = np.ones(len(colunas['c']), dtype=bool)
+    for nome in est.colunas + est.validar + ('c',):
+        valido &= ~np.isnan(colunas[nome])
+    close = colunas['c'][valido]
+    call, put = est.sinais(**{nome: colunas[nome][valido] for nome in est.colunas})
+    rotulos = rotulos_validos(rotulos, valido, close)
+    # Horizonte fora dos gravados: calculado na hora, só para esta chamada
+    faltando = [h for h in horizontes if f'diff_{h}' not in rotulos.dtype.names]
+    extras = rotular(rotulos['ts'], close, faltando) if faltando else None
+
+    resultados = {}
+    for h in horizontes:
+        fonte = extras if h in faltando else rotulos
+        res = varrer_sinais(call, put, close, horizonte=h, cooldown=h, max_posicoes=max_posicoes,
+                            diffs=fonte[f'diff_{h}'])
+        contra = np.where(res.eh_call, -1, 1) * fonte[f'faixa_{h}'][res.indices]
+        resultados[h] = (res, contra)
+    return resultados
+
+
+def linha_horizonte(est, symbol, candles, h, res, contra):
+    # Linha do torneio + quanto das perdas foi movimento forte contra a posição
+    linha = {**linha_resultado(est.nome, symbol, candles, res), 'horizonte': h}
+    perdas = max(linha['trades'] - linha['wins'], 1)
+    linha['perdas_0.1%'] = (contra >= 1).sum() / perdas * 100  # Band Riding (V11)
+    linha['perdas_0.2%'] = (contra >= 2).sum() / perdas * 100  # Evento de Cauda (V20)
+    return linha
+
+
+if __name__ == "__main__":
+    # python rotulos.py SOL/USDT --armazem dados/candles --estrategias V36,V40 --horizontes 5 15 30
+    parser = argparse.ArgumentParser()
+    parser.add_argument('symbol')
+    parser.add_argument('--armazem', default='dados/candles')
+    parser.add_argument('--estrategias', help="Lista separada por vírgula (padrão: todas registradas)")
+    parser.add_argument('--inicio')
+    parser.add_argument('--fim')
+    parser.add_argument('--horizontes', type=int, nargs='+', default=list(HORIZONTES))
+    parser.add_argument('--max-posicoes', type=int, default=1, help="Posições simultâneas (0 = sem limite)")
+    args = parser.parse_args()
+
+    nomes = args.estrategias.split(',') if args.estrategias else list(ESTRATEGIAS)
+    desconhecidas = [n for n in nomes if n not in ESTRATEGIAS]
+    if desconhecidas:
+        parser.error(f"estratégias não registradas: {desconhecidas} (disponíveis: {list(ESTRATEGIAS)})")
+
+    armazem = ArmazemCandles(args.armazem)
+    cache = CacheRotulos(armazem)
+    recalculadas = cache.atualizar(args.symbol)
+    print(f"{Fore.CYAN}🏷️  Rótulos de {args.symbol}: {recalculadas} linhas recalculadas ({cache.caminho(args.symbol)})")
+
+    df = armazem.carregar(args.symbol, '1m', args.inicio, args.fim)
+    rotulos = cache.carregar(args.symbol, '1m', args.inicio, args.fim)
+    estrategias = [ESTRATEGIAS[n] for n in nomes]
+    colunas = calcular_colunas(df, colunas_necessarias(estrategias), args.symbol)
+
+    linhas = []
+    for est in estrategias:
+        for h, (res, contra) in varrer_horizontes(est, colunas, rotulos, args.horizontes, args.max_posicoes or None).items():
+            linhas.append(linha_horizonte(est, args.symbol, len(df), h, res, contra))
+    tabela = ordenar(linhas)
+    imprimir_tabela(tabela, titulo=f"HORIZONTES {args.symbol}")
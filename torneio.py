@@ -0,0 +1,113 @@
+import time
+import argparse
+import pandas as pd
+from colorama import Fore, Style, init
+
+from armazem_candles import ArmazemCandles
+from estrategias import ESTRATEGIAS, colunas_necessarias, calcular_colunas, avaliar
+
+init(autoreset=True)
+
+# Torneio das estratégias registradas sobre os mesmos dados.
+# Em vez de rodar seis backtests (cada um baixando e calculando tudo de novo),
+# carrega um dataset por ativo, calcula a união dos indicadores uma vez e avalia
+# todas as regras em cima dos mesmos arrays. Sai uma tabela comparativa.
+
+PAYOUT = 0.85 # Lucro por 1.0 arriscado no Polymarket (mesmo R dos relatórios)
+
+
+def carregar(symbol, armazem=None, inicio=None, fim=None, limit=1440):
+    if armazem is not None:
+        return armazem.carregar(symbol, '1m', inicio, fim)
+    from cliente_exchange import obter_cliente
+    ohlcv = obter_cliente().fetch_ohlcv(symbol, timeframe='1m', limit=limit)
+    df = pd.DataFrame(ohlcv, columns=['ts', 'o', 'h', 'l', 'c', 'v'])
+    df['ts'] = pd.to_datetime(df['ts'], unit='ms')
+    return df
+
+
+def linha_resultado(nome, symbol, candles, res):
+    trades = len(res.indices)
+    wins = int(res.ganhou.sum())
+    W = wins / trades if trades else 0.0
+    return {
+        'estrategia': nome,
+        'symbol': symbol,
+        'candles': candles,
+        'sinais': res.sinais,
+        'trades': trades,
+        'wins': wins,
+        'taxa': W * 100,
+        'kelly': (W - ((1 - W) / PAYOUT)) * 100 if trades else float('nan'),
+        'pnl': wins * PAYOUT - (trades - wins),
+    }
+
+
+def ordenar(linhas):
+    tabela = pd.DataFrame(linhas)
+    if tabela.empty:
+        return tabela
+    return tabela.sort_values(['kelly', 'taxa', 'trades'], ascending=False, na_position='last').reset_index(drop=True)
+
+
+def disputar(frames, nomes=None, max_posicoes=1):
+    # {symbol: DataFrame} -> tabela com uma linha por (estratégia, ativo)
+    estrategias = [ESTRATEGIAS[n] for n in (nomes or ESTRATEGIAS)]
+    necessarias = colunas_necessarias(estrategias)
+    linhas = []
+    for symbol, df in frames.items():
+        colunas = calcular_colunas(df, necessarias, symbol)
+        for est in estrategias:
+            linhas.append(linha_resultado(est.nome, symbol, len(df), avaliar(est, colunas, max_posicoes)))
+    return ordenar(linhas)
+
+
+def imprimir_tabela(tabela, titulo="TORNEIO DE ESTRATÉGIAS"):
+    print(f"\n{Fore.WHITE}{'='*40}")
+    print(f"{Fore.MAGENTA}{titulo} ({len(tabela)} disputas)")
+    print(f"{Fore.WHITE}{'='*40}")
+    if tabela.empty:
+        print(f"{Fore.RED}⚠️ Nenhum dado carregado.")
+        return
+    with pd.option_context('display.width', 160, 'display.max_columns', 20):
+        print(tabela.to_string(float_format=lambda x: f"{x:.2f}"))
+    melhor = tabela.iloc[0]
+    cor = Fore.GREEN if melhor['kelly'] > 0 else Fore.RED
+    print(f"\n🏆 Vencedora: {melhor['estrategia']} em {melhor['symbol']} | Kelly {cor}{melhor['kelly']:.2f}%{Style.RESET_ALL} "
+          f"({int(melhor['trades'])} trades, {melhor['taxa']:.2f}% de acerto)")
+
+
+if __name__ == "__main__":
+    # python torneio.py ETH/USDT SOL/USDT --armazem dados/candles --inicio 2026-01-01
+    parser = argparse.ArgumentParser()
+    parser.add_argument('symbols', nargs='*', help="Ativos (padrão: o ativo de cada estratégia)")
+    parser.add_argument('--estrategias', help="Lista separada por vírgula (padrão: todas registradas)")
+    parser.add_argument('--armazem', help="Diretório do armazém local (sem rede)")
+    parser.add_argument('--inicio')
+    parser.add_argument('--fim')
+    parser.add_argument('--max-posicoes', type=int, default=1, help="Posições simultâneas (0 = sem limite)")
+    parser.add_argument('--saida', help="Salva a tabela em CSV")
+    args = parser.parse_args()
+
+    nomes = args.estrategias.split(',') if args.estrategias else list(ESTRATEGIAS)
+    desconhecidas = [n for n in nomes if n not in ESTRATEGIAS]
+    if desconhecidas:
+        parser.error(f"estratégias não registradas: {desconhecidas} (disponíveis: {list(ESTRATEGIAS)})")
+    symbols = args.symbols or sorted({ESTRATEGIAS[n].symbol for n in nomes})
+    armazem = ArmazemCandles(args.armazem) if args.armazem else None
+
+    frames = {}
+    for symbol in symbols:
+        df = carregar(symbol, armazem, args.inicio, args.fim)
+        if df.empty:
+            print(f"{Fore.RED}⚠️ {symbol}: sem candles no período, fora do torneio.")
+            continue
+        frames[symbol] = df
+        print(f"{Fore.CYAN}📥 {symbol}: {len(df)} candles")
+
+    inicio = time.perf_counter()
+    tabela = disputar(frames, nomes, args.max_posicoes or None)
+    print(f"⏱️  {len(nomes)} estratégias x {len(frames)} ativos em {time.perf_counter() - inicio:.2f}s")
+    imprimir_tabela(tabela)
+    if args.saida:
+        tabela.to_csv(args.saida, index=False)
@@ -0,0 +1,215 @@
+import os
+import json
+import itertools
+import argparse
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+from concurrent.futures import ProcessPoolExecutor
+from colorama import Fore, Style, init
+
+from motor_simulacao import varrer_sinais
+from armazem_candles import ArmazemCandles
+from indicadores import Indicadores, CACHE
+
+init(autoreset=True)
+
+# Varredura de parâmetros da família V36 -> V40 (reversão com Hull + Z-Score).
+# Os indicadores são calculados uma única vez por dataset; cada combinação de
+# limites vira só um punhado de comparações NumPy + o motor de simulação,
+# distribuídas num pool de processos. Cada combinação só descarta os candles com
+# NaN nas colunas que ela lê, como o dropna do backtest equivalente (V36 não perde
+# o aquecimento do ADX, do RSI nem da média do bandwidth).
+
+PAYOUT = 0.85 # Lucro por 1.0 arriscado no Polymarket (mesmo R dos relatórios)
+
+# Grade padrão cobrindo os valores usados entre V36 e V40
+GRADE_PADRAO = {
+    'prob': [0.55, 0.60, 0.65],       # PUT se prob_tac > p, CALL se < 1 - p
+    'z': [1.5, 2.0, 2.5],             # |Z-Score| mínimo (mola)
+    'pavio': [None, 0.6, 0.7],        # pavio de rejeição > body * pavio
+    'adx_max': [None, 25, 30],        # tendência calma: ADX < adx_max
+    'rsi': [None, 70],                # PUT se RSI > rsi, CALL se RSI < 100 - rsi
+    'bandwidth': [False, True],       # bandas mais abertas que a média (V40)
+    'horizonte': [5, 10, 15],         # vencimento / cooldown em candles
+}
+
+
+def calcular_indicadores(df, symbol=None, descartar=0, cache=CACHE):
+    # Mesmas fórmulas dos backtests V36-V40, todas de uma vez (via cache compartilhado).
+    # `descartar`: linhas iniciais que só servem de aquecimento (walk-forward)
+    ind = Indicadores(df, symbol, cache=cache)
+    body, upper_wick, lower_wick = ind.pavios()
+    colunas = {
+        'c': df['c'],
+        'v': df['v'],
+        # Hull guardado como mu/sigma: a prob depende do horizonte T da combinação
+        'mu30': ind.media_movel('log_ret', 30),
+        'sig30': ind.desvio_movel('log_ret', 30),
+        'z_score': ind.z_score(20),
+        'bandwidth': ind.bandwidth(20, 2.0),
+        'bw_ma20': ind.media_movel('bandwidth', 20),
+        'vol_ma5': ind.vol_ma(5),
+        'body': body,
+        'upper_wick': upper_wick,
+        'lower_wick': lower_wick,
+        'adx': ind.adx_di(14),
+        'rsi': ind.rsi(7),
+    }
+    # Sem dropna: os NaN ficam e cada combinação monta a sua máscara (ver sinais)
+    return {col: serie.to_numpy(dtype=np.float64)[descartar:] for col, serie in colunas.items()}
+
+
+def colunas_lidas(params):
+    # Colunas que a combinação lê (as do dropna do backtest equivalente)
+    colunas = ['c', 'v', 'vol_ma5', 'mu30', 'sig30', 'z_score']
+    if params['pavio'] is not None:
+        colunas += ['body', 'upper_wick', 'lower_wick']
+    if params['adx_max'] is not None:
+        colunas.append('adx')
+    if params['rsi'] is not None:
+        colunas.append('rsi')
+    if params['bandwidth']:
+        colunas += ['bandwidth', 'bw_ma20']
+    return tuple(colunas)
+
+
+def combinacoes(grade):
+    chaves = list(grade)
+    return [dict(zip(chaves, valores)) for valores in itertools.product(*(grade[k] for k in chaves))]
+
+
+def sinais(ind, params, cache_prob=None):
+    # Uma combinação -> (call, put, close) só nos candles válidos para ela, como o
+    # dropna do backtest isolado: o vencimento conta candles desse recorte.
+    # `cache_prob`: prob por horizonte e máscara por conjunto de colunas (por processo)
+    T = params['horizonte']
+    if cache_prob is not None and T in cache_prob:
+        prob = cache_prob[T]
+    else:
+        prob = ndtr((ind['mu30'] * T) / (ind['sig30'] * np.sqrt(T)))
+        if cache_prob is not None:
+            cache_prob[T] = prob
+
+    lidas = colunas_lidas(params)
+    if cache_prob is not None and lidas in cache_prob:
+        valido = cache_prob[lidas]
+    else:
+        # prob_tac é NaN (0/0) numa janela parada, e o backtest também a descarta
+        valido = ~np.isnan(prob)
+        for col in lidas:
+            valido &= ~np.isnan(ind[col])
+        if cache_prob is not None:
+            cache_prob[lidas] = valido
+
+    z = ind['z_score']
+    comum = ind['v'] < ind['vol_ma5']
+    if params['adx_max'] is not None:
+        comum = comum & (ind['adx'] < params['adx_max'])
+    if params['bandwidth']:
+        comum = comum & (ind['bandwidth'] > ind['bw_ma20'])
+
+    put = comum & (prob > params['prob']) & (z > params['z'])
+    call = comum & (prob < 1 - params['prob']) & (z < -params['z'])
+    if params['pavio'] is not None:
+        put = put & (ind['upper_wick'] > ind['body'] * params['pavio'])
+        call = call & (ind['lower_wick'] > ind['body'] * params['pavio'])
+    if params['rsi'] is not None:
+        put = put & (ind['rsi'] > params['rsi'])
+        call = call & (ind['rsi'] < 100 - params['rsi'])
+    return (call & ~put)[valido], put[valido], ind['c'][valido]
+
+
+def avaliar(ind, params, cache_prob=None):
+    # Uma combinação -> (trades, wins, taxa, kelly)
+    T = params['horizonte']
+    call, put, close = sinais(ind, params, cache_prob)
+    res = varrer_sinais(call, put, close, horizonte=T, cooldown=T)
+    trades = len(res.indices)
+    wins = int(res.ganhou.sum())
+    W = wins / trades if trades else 0.0
+    kelly = W - ((1 - W) / PAYOUT) if trades else float('nan')
+    return trades, wins, W * 100, kelly * 100
+
+
+# Estado de cada processo do pool: indicadores recebidos uma vez só
+_IND = None
+_CACHE_PROB = {}
+
+
+def _iniciar_worker(ind):
+    global _IND
+    _IND = ind
+    _CACHE_PROB.clear()
+
+
+def _avaliar_lote(lote):
+    return [(params,) + avaliar(_IND, params, _CACHE_PROB) for params in lote]
+
+
+def varrer(ind, grade=GRADE_PADRAO, processos=None, min_trades=10, tamanho_lote=64):
+    combos = combinacoes(grade)
+    lotes = [combos[i:i + tamanho_lote] for i in range(0, len(combos), tamanho_lote)]
+
+    linhas = []
+    if processos == 1:
+        _iniciar_worker(ind)
+        for lote in lotes:
+            linhas.extend(_avaliar_lote(lote))
+    else:
+        with ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_worker, initargs=(ind,)) as pool:
+            for resultado in pool.map(_avaliar_lote, lotes):
+                linhas.extend(resultado)
+
+    tabela = pd.DataFrame([{**params, 'trades': t, 'wins': w, 'taxa': taxa, 'kelly': k}
+                           for params, t, w, taxa, k in linhas])
+    tabela = tabela[tabela['trades'] >= min_trades]
+    return tabela.sort_values(['kelly', 'taxa', 'trades'], ascending=False).reset_index(drop=True)
+
+
+def imprimir_ranking(tabela, top=20):
+    print(f"\n{Fore.WHITE}{'='*40}")
+    print(f"{Fore.MAGENTA}RANKING DA VARREDURA ({len(tabela)} combinações válidas)")
+    print(f"{Fore.WHITE}{'='*40}")
+    if tabela.empty:
+        print(f"{Fore.RED}⚠️ Nenhuma combinação atingiu o mínimo de trades.")
+        return
+    with pd.option_context('display.width', 160, 'display.max_columns', 20):
+        print(tabela.head(top).to_string(float_format=lambda x: f"{x:.2f}"))
+    melhor = tabela.iloc[0]
+    cor = Fore.GREEN if melhor['kelly'] > 0 else Fore.RED
+    print(f"\n💰 Melhor Kelly: {cor}{melhor['kelly']:.2f}%{Style.RESET_ALL} "
+          f"({int(melhor['trades'])} trades, {melhor['taxa']:.2f}% de acerto)")
+
+
+if __name__ == "__main__":
+    # python varredura_parametros.py SOL/USDT --armazem dados/candles --inicio 2026-01-01
+    parser = argparse.ArgumentParser()
+    parser.add_argument('symbol', nargs='?', default='SOL/USDT')
+    parser.add_argument('--armazem', help="Diretório do armazém local (sem rede)")
+    parser.add_argument('--inicio')
+    parser.add_argument('--fim')
+    parser.add_argument('--grade', help="JSON com a grade {parametro: [valores]}")
+    parser.add_argument('--processos', type=int, default=os.cpu_count())
+    parser.add_argument('--min-trades', type=int, default=10)
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--saida', help="Salva a tabela completa em CSV")
+    args = parser.parse_args()
+
+    if args.armazem:
+        df = ArmazemCandles(args.armazem).carregar(args.symbol, '1m', args.inicio, args.fim)
+    else:
+        from cliente_exchange import obter_cliente
+        ohlcv = obter_cliente().fetch_ohlcv(args.symbol, timeframe='1m', limit=1440)
+        df = pd.DataFrame(ohlcv, columns=['ts', 'o', 'h', 'l', 'c', 'v'])
+
+    grade = GRADE_PADRAO
+    if args.grade:
+        with open(args.grade) as f:
+            grade = {**GRADE_PADRAO, **json.load(f)}
+
+    print(f"{Fore.CYAN}📥 {args.symbol}: {len(df)} candles | {len(combinacoes(grade))} combinações")
+    tabela = varrer(calcular_indicadores(df, args.symbol), grade, args.processos, args.min_trades)
+    imprimir_ranking(tabela, args.top)
+    if args.saida:
+        tabela.to_csv(args.saida, index=False)
@@ -0,0 +1,236 @@
+import time
+import resource
+import argparse
+import numpy as np
+import pandas as pd
+from colorama import Fore, Style, init
+
+import varredura_parametros as vp
+from armazem_candles import ArmazemCandles, COLUNAS, ms_timeframe
+from indicadores import CacheIndicadores
+from motor_simulacao import HORIZONTE, COOLDOWN, ResultadoSimulacao, aplicar_cooldown, aplicar_livro
+from estrategias import ESTRATEGIAS, colunas_necessarias, calcular_colunas, sinais_validos
+from monte_carlo import imprimir_monte_carlo
+from torneio import linha_resultado, ordenar, imprimir_tabela
+
+init(autoreset=True)
+
+# Backtest em blocos sobre o armazém de candles (meses de 1m sem carregar tudo).
+# O arquivo é lido em fatias de `tamanho_bloco` candles, cada uma precedida de
+# AQUECIMENTO candles do bloco anterior: os indicadores das linhas do bloco saem
+# iguais aos de uma carga completa e o aquecimento é descartado. A simulação
+# (cooldown, livro de posições e vencimentos pendentes) continua de um bloco para
+# o outro em SimulacaoContinua, então o resultado é o do backtest inteiro, com a
+# memória limitada ao bloco + aquecimento qualquer que seja o tamanho do histórico.
+#
+# Com --treino/--teste vira walk-forward: a cada passo a varredura de parâmetros
+# escolhe os limites na janela de treino e eles operam a janela de teste seguinte.
+
+# Hull 60 precisa de 61 candles e o bw_ma20 de 39, mas o ADX ewm (V11) tem memória
+# infinita: com 300 candles o peso do que ficou de fora é menor que 1e-18.
+AQUECIMENTO = 300
+TAMANHO_BLOCO = 50_000 # ~20 MB de colunas float64 por bloco
+
+
+def blocos(armazem, symbol, inicio=None, fim=None, tamanho=TAMANHO_BLOCO, aquecimento=AQUECIMENTO):
+    # (DataFrame, linhas de aquecimento) por fatia do período: só a fatia corrente
+    # fica na memória. O primeiro bloco começa frio, como o backtest com --inicio.
+    a, b = armazem.intervalo(symbol, '1m', inicio, fim)
+    for k in range(a, b, tamanho):
+        desde = max(k - aquecimento, a)
+        yield frame(armazem.ler(symbol, '1m', desde, min(k + tamanho, b))), k - desde
+
+
+def frame(fatia):
+    df = pd.DataFrame({k: np.asarray(fatia[k]) for k in COLUNAS})
+    df['ts'] = pd.to_datetime(df['ts'], unit='ms')
+    return df
+
+
+class SimulacaoContinua:
+    # varrer_sinais alimentado por blocos consecutivos da mesma série.
+    # A entrada só depende dos sinais e do cooldown/livro, então é decidida na hora;
+    # o resultado espera o close do vencimento, que pode vir no bloco seguinte.
+    def __init__(self, max_posicoes=1):
+        self.max_posicoes = max_posicoes
+        self.n = 0 # candles recebidos
+        self.horizonte = HORIZONTE # do último bloco (define o corte do fim da série)
+        self.livre_em = 0 # slot único: primeiro índice fora do cooldown
+        self.vencimentos = [] # livro: heap das vagas ocupadas
+        self.pendentes = [] # [indice, eh_call, entrada, horizonte, saida]
+        self.trades = [] # (indice, eh_call, diff)
+        self.sinais = 0
+        self._recentes = np.empty(0, dtype=np.int64) # sinais que ainda podem cair no corte final
+        self._horizonte_max = HORIZONTE
+
+    def alimentar(self, call, put, close, horizonte=HORIZONTE, cooldown=COOLDOWN):
+        call = np.asarray(call, dtype=bool)
+        put = np.asarray(put, dtype=bool)
+        close = np.asarray(close, dtype=np.float64)
+        base = self.n
+        self.horizonte = horizonte
+        self._horizonte_max = max(self._horizonte_max, horizonte)
+
+        candidatos = np.flatnonzero(call | put) + base
+        self.sinais += len(candidatos)
+        if self.max_posicoes == 1:
+            entradas = aplicar_cooldown(candidatos[candidatos >= self.livre_em], cooldown)
+            if len(entradas):
+                self.livre_em = int(entradas[-1]) + cooldown
+        else:
+            entradas = aplicar_livro(candidatos, horizonte, self.max_posicoes, self.vencimentos)
+        for i in entradas.tolist():
+            self.pendentes.append([i, bool(call[i - base]), close[i - base], horizonte, None])
+
+        self.n += len(close)
+        self._recentes = np.concatenate([self._recentes, candidatos])
+        self._recentes = self._recentes[self._recentes >= self.n - (self._horizonte_max + 1)]
+
+        # Vencimentos que caem neste bloco. Como no `i < len(df) - 16` original, o
+        # trade só conta quando existe o candle seguinte ao vencimento.
+        pendentes = []
+        for posicao in self.pendentes:
+            i, eh_call, entrada, h, saida = posicao
+            if saida is None and base <= i + h < self.n:
+                saida = posicao[4] = close[i + h - base]
+            if saida is not None and self.n >= i + h + 2:
+                self.trades.append((i, eh_call, saida - entrada))
+            else:
+                pendentes.append(posicao)
+        self.pendentes = pendentes
+
+    def finalizar(self):
+        # Fim da série: pendentes e sinais nos últimos horizonte + 1 candles ficam de fora
+        sinais = self.sinais - int(np.count_nonzero(self._recentes >= self.n - (self.horizonte + 1)))
+        trades = sorted(self.trades)
+        indices = np.array([t[0] for t in trades], dtype=np.int64)
+        eh_call = np.array([t[1] for t in trades], dtype=bool)
+        diff = np.array([t[2] for t in trades], dtype=np.float64)
+        ganhou = np.where(eh_call, diff > 0, diff < 0)
+        return ResultadoSimulacao(indices, eh_call, diff, ganhou, sinais)
+
+
+def backtest_continuo(armazem, symbol, nomes, inicio=None, fim=None, max_posicoes=1,
+                      tamanho_bloco=TAMANHO_BLOCO, aquecimento=AQUECIMENTO):
+    # Estratégias registradas sobre o período inteiro, bloco a bloco -> ({nome: resultado}, candles)
+    estrategias = [ESTRATEGIAS[n] for n in nomes]
+    necessarias = colunas_necessarias(estrategias)
+    simulacoes = {est.nome: SimulacaoContinua(max_posicoes) for est in estrategias}
+    candles = 0
+    for df, descartar in blocos(armazem, symbol, inicio, fim, tamanho_bloco, aquecimento):
+        candles += len(df) - descartar
+        # Cache só do bloco: as séries não se repetem e não devem ocupar o global
+        colunas = calcular_colunas(df, necessarias, symbol, cache=CacheIndicadores())
+        colunas = {nome: valores[descartar:] for nome, valores in colunas.items()}
+        for est in estrategias:
+            simulacoes[est.nome].alimentar(*sinais_validos(est, colunas))
+    return {nome: sim.finalizar() for nome, sim in simulacoes.items()}, candles
+
+
+def _params(linha, grade):
+    # Linha do ranking -> combinação com os valores originais da grade (None, int...)
+    return {k: next(g for g in grade[k] if (g is None and pd.isna(linha[k])) or g == linha[k])
+            for k in grade}
+
+
+def walk_forward(armazem, symbol, treino, teste, inicio=None, fim=None, grade=vp.GRADE_PADRAO,
+                 min_trades=10, max_posicoes=1, processos=1, aquecimento=AQUECIMENTO):
+    # treino/teste em candles. A cada passo a varredura roda em [t - treino, t), a melhor
+    # combinação (Kelly) opera [t, t + teste) e a janela anda `teste` candles.
+    primeira, ultima = armazem.intervalo(symbol, '1m', inicio, fim)
+    sim = SimulacaoContinua(max_posicoes)
+    janelas = []
+    for t in range(primeira + treino, ultima, teste):
+        a = max(t - treino - aquecimento, 0)
+        df = frame(armazem.ler(symbol, '1m', a, min(t + teste, ultima)))
+        cache = CacheIndicadores()
+        ind_treino = vp.calcular_indicadores(df.iloc[:t - a], symbol, descartar=t - treino - a, cache=cache)
+        ind_teste = vp.calcular_indicadores(df, symbol, descartar=t - a, cache=cache)
+        ranking = vp.varrer(ind_treino, grade, processos, min_trades)
+
+        janela = {'inicio': df['ts'].iloc[t - a], 'linha': sim.n, 'params': None, 'kelly_treino': float('nan')}
+        if ranking.empty:
+            # Nada passou no treino: fica de fora, mas os candles seguem contando
+            vazio = np.zeros(len(ind_teste['c']), dtype=bool)
+            sim.alimentar(vazio, vazio, ind_teste['c'], sim.horizonte, sim.horizonte)
+        else:
+            params = _params(ranking.iloc[0], grade)
+            call, put, close = vp.sinais(ind_teste, params)
+            sim.alimentar(call, put, close, params['horizonte'], params['horizonte'])
+            janela.update(params=params, kelly_treino=ranking['kelly'].iloc[0])
+        janelas.append(janela)
+
+    res = sim.finalizar()
+    # Trades de cada janela de teste (pelo índice da entrada)
+    inicios = np.array([j['linha'] for j in janelas], dtype=np.int64)
+    janela_trade = np.searchsorted(inicios, res.indices, side='right') - 1
+    for k, janela in enumerate(janelas):
+        ganhou = res.ganhou[janela_trade == k]
+        janela.update(trades=len(ganhou), wins=int(ganhou.sum()))
+    return janelas, res
+
+
+def imprimir_walk_forward(janelas, res):
+    print(f"\n{Fore.WHITE}{'='*40}")
+    print(f"{Fore.MAGENTA}WALK-FORWARD ({len(janelas)} janelas de teste)")
+    print(f"{Fore.WHITE}{'='*40}")
+    for j in janelas:
+        if j['params'] is None:
+            print(f"{j['inicio']:%Y-%m-%d %H:%M} | {Fore.RED}sem combinação no treino{Style.RESET_ALL}")
+            continue
+        p = j['params']
+        taxa = j['wins'] / j['trades'] * 100 if j['trades'] else 0.0
+        print(f"{j['inicio']:%Y-%m-%d %H:%M} | prob {p['prob']} z {p['z']} pavio {p['pavio']} adx {p['adx_max']} "
+              f"rsi {p['rsi']} bw {p['bandwidth']} T {p['horizonte']} | treino Kelly {j['kelly_treino']:.2f}% "
+              f"| teste {j['trades']} trades, {taxa:.2f}%")
+
+    total = len(res.indices)
+    if total == 0:
+        print(f"{Fore.RED}⚠️ Nenhum trade fora da amostra.")
+        return
+    W = res.ganhou.mean()
+    kelly = (W - ((1 - W) / vp.PAYOUT)) * 100
+    print(f"\nFora da amostra: {total} trades | Taxa de Acerto: {W*100:.2f}% | "
+          f"Kelly: {Fore.GREEN if kelly > 0 else Fore.RED}{kelly:.2f}%{Style.RESET_ALL}")
+    imprimir_monte_carlo(res.ganhou)
+
+
+if __name__ == "__main__":
+    # Backtest contínuo de meses, sem carregar tudo:
+    #   python walk_forward.py SOL/USDT --armazem dados/candles --inicio 2026-01-01 --estrategias V38,V40
+    # Walk-forward com reajuste da varredura (7 dias de treino, 1 de teste):
+    #   python walk_forward.py SOL/USDT --armazem dados/candles --treino 7d --teste 1d
+    parser = argparse.ArgumentParser()
+    parser.add_argument('symbol', nargs='?', default='SOL/USDT')
+    parser.add_argument('--armazem', default='dados/candles', help="Diretório do armazém local")
+    parser.add_argument('--inicio')
+    parser.add_argument('--fim')
+    parser.add_argument('--estrategias', help="Modo contínuo: lista separada por vírgula (padrão: todas)")
+    parser.add_argument('--treino', help="Janela de treino do walk-forward (ex.: 7d, 12h)")
+    parser.add_argument('--teste', default='1d', help="Janela de teste / passo do walk-forward")
+    parser.add_argument('--min-trades', type=int, default=10)
+    parser.add_argument('--processos', type=int, default=1, help="Processos da varredura a cada janela")
+    parser.add_argument('--max-posicoes', type=int, default=1, help="Posições simultâneas (0 = sem limite)")
+    parser.add_argument('--bloco', type=int, default=TAMANHO_BLOCO, help="Candles por bloco no modo contínuo")
+    args = parser.parse_args()
+
+    armazem = ArmazemCandles(args.armazem)
+    max_posicoes = args.max_posicoes or None
+    inicio = time.perf_counter()
+    if args.treino:
+        treino = ms_timeframe(args.treino) // 60_000
+        teste = ms_timeframe(args.teste) // 60_000
+        print(f"{Fore.CYAN}🔁 Walk-forward {args.symbol}: treino {treino} candles, teste {teste} candles")
+        janelas, res = walk_forward(armazem, args.symbol, treino, teste, args.inicio, args.fim,
+                                    min_trades=args.min_trades, max_posicoes=max_posicoes,
+                                    processos=args.processos)
+        imprimir_walk_forward(janelas, res)
+    else:
+        nomes = args.estrategias.split(',') if args.estrategias else list(ESTRATEGIAS)
+        resultados, candles = backtest_continuo(armazem, args.symbol, nomes, args.inicio, args.fim,
+                                                max_posicoes, args.bloco)
+        imprimir_tabela(ordenar([linha_resultado(n, args.symbol, candles, r) for n, r in resultados.items()]),
+                        titulo=f"BACKTEST CONTÍNUO ({candles} candles em blocos de {args.bloco})")
+    # ru_maxrss vem em KB no Linux
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"\n⏱️  {time.perf_counter() - inicio:.1f}s | 🧠 Pico de memória (RSS): {pico:.0f} MB")